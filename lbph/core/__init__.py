@@ -30,9 +30,30 @@
 
 __all__     = [
     'access',
+    'batch',
+    'benchmark',
     'capture',
+    'detection',
+    'engine',
+    'events',
+    'index',
+    'journal',
+    'loader',
+    'manifest',
+    'metrics',
+    'motion',
+    'network',
+    'pipeline',
+    'quality',
     'recognize',
-    'train'
+    'replay',
+    'sampling',
+    'service',
+    'shared',
+    'storage',
+    'tracking',
+    'train',
+    'video'
 ]
 
 __version__ = '0.0.1'
\ No newline at end of file
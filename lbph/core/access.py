@@ -53,6 +53,7 @@
 """
 
 import filetype, os, re
+from lbph.core.replay import recorder
 
 class argv(object):
     """!
@@ -113,4 +114,24 @@ class argv(object):
             @param[in]      given_argv      Given argument
             @return         True if given_argv is a valid remote device, False otherwise
         """
-        pass
\ No newline at end of file
+        # Check if pattern matches with an RTSP or HTTP URL with a host
+        if re.compile('^(rtsps?|https?)://([^/?#@\\s]+@)?([A-Za-z0-9.-]+|\\[[0-9A-Fa-f:.]+\\])(:[0-9]{1,5})?([/?#]\\S*)?$').match(given_argv):
+            # Return True statement
+            return True
+        # Return False statement
+        return False
+
+    @staticmethod
+    def is_recording(given_argv = None):
+        """!
+            @fn     is_recording
+            @brief  Returns True if given argument is a valid readable recording of frames, False otherwise
+            @param[in]      given_argv      Given argument
+            @return         True if given_argv is a valid readable recording, False otherwise
+        """
+        # Check if given argument is an existing and readable recording
+        if os.path.isfile(given_argv) and os.access(given_argv, os.R_OK) and given_argv.endswith(recorder.EXTENSION):
+            # Return True statement
+            return True
+        # Return False statement
+        return False
\ No newline at end of file
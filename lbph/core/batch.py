@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       batch.py
+    @brief      Basic Processing Algorithm to recognize faces of many images
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import csv, cv2, glob, io, json, os
+from multiprocessing import Pool
+from lbph.core.recognize import recognition
+
+class batch(object):
+    """!
+        @class      batch
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Bulk face recognition over directories and glob patterns
+                        - Resumable JSON Lines or CSV results
+    """
+
+    # Define extensions of images to recognize
+    EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.ppm', '.tif', '.tiff', '.webp')
+
+    # Model, labels dictionnary and classifiers of a worker process
+    state = None
+
+    @staticmethod
+    def paths(sources = None):
+        """!
+            @fn             paths
+            @brief          Returns paths of images of given directories, glob patterns or files
+
+            @param[in]      sources             List of directories, glob patterns or files
+            @return         Generator of paths of images
+        """
+
+        for source in sources:
+            # Walk directories recursively
+            if os.path.isdir(source):
+                for root, directories, files in os.walk(source):
+                    directories.sort()
+                    for name in sorted(files):
+                        if name.lower().endswith(batch.EXTENSIONS):
+                            yield os.path.join(root, name)
+            # Expand glob patterns and files
+            else:
+                for path in sorted(glob.iglob(source, recursive = True)):
+                    if os.path.isfile(path) and path.lower().endswith(batch.EXTENSIONS):
+                        yield path
+
+    @staticmethod
+    def resume(output = None):
+        """!
+            @fn             resume
+            @brief          Returns paths of images already recognized in given output,
+                            dropping its last line if it has been interrupted, with
+                            previous rows of the same image in CSV
+
+            @param[in]      output              Path of the JSON Lines or CSV results
+            @return         Set of paths of images
+        """
+
+        # Check if there is a previous run
+        if not os.path.isfile(output):
+            return set()
+
+        # Check if results are written as CSV
+        is_csv = output.lower().endswith('.csv')
+
+        done, end, start, last = set(), 0, 0, None
+        with open(output, 'rb+') as f:
+            # Check if last line has been interrupted, without reading the whole file
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+            clean = not size or f.read(1) == b'\n'
+
+            # Stream complete lines, rows of an image follow each other in CSV
+            f.seek(0)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                if not is_csv:
+                    done.add(json.loads(line)['path'])
+                elif end:
+                    path = next(csv.reader([line.decode()]))[0]
+                    if path != last:
+                        start, last = end, path
+                    done.add(path)
+                end += len(line)
+
+            # Drop interrupted last line, and previous rows of the last image in CSV
+            if not clean:
+                if is_csv and last is not None:
+                    done.discard(last)
+                    end = start
+                f.truncate(end)
+
+        return done
+
+    @staticmethod
+    def __initialize__(downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             __initialize__
+            @brief          Load model, labels dictionnary and classifiers once per worker process
+
+            @param[in]      downscale           Downscale factor of the coarse search, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+        """
+        batch.state = recognition.__load__(backend = backend, strategy = strategy) + (downscale, padding)
+
+    @staticmethod
+    def __process__(path = None):
+        """!
+            @fn             __process__
+            @brief          Recognize faces of given image
+
+            @param[in]      path                Path of the image
+            @return         Dictionnary (path, faces, error)
+        """
+
+        recognizer, names, detector, downscale, padding = batch.state
+
+        # Read an image in grayscale
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return {'path': path, 'faces': [], 'error': 'unreadable image'}
+
+        # Detect and predict every face of the image at once
+        faces = recognition.__search__(gray = gray,
+                                        detector = detector,
+                                        minW = 0.1 * gray.shape[1],
+                                        minH = 0.1 * gray.shape[0],
+                                        downscale = downscale,
+                                        padding = padding)
+        results = recognition.__identify__(recognizer = recognizer, names = names, gray = gray, faces = faces)
+
+        return {
+            'path': path,
+            'faces': [{'box': [int(value) for value in box], 'name': name, 'distance': distance} for box, name, distance in results],
+            'error': None
+        }
+
+    @staticmethod
+    def make(sources = None, output = None, workers = None, chunksize = 16, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             make
+            @brief          Recognize faces of every image of given sources across a process pool,
+                            skipping images already recognized in given output
+
+            @param[in]      sources             List of directories, glob patterns or files
+            @param[in]      output              Path of the JSON Lines or CSV results
+            @param[in]      workers             Number of processes, None for one per core
+            @param[in]      chunksize           Number of images sent to a process at once
+            @param[in]      downscale           Downscale factor of the coarse search, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+        """
+
+        # Displaying message
+        print("[+] Initiating The Batch Recognition Process ...")
+
+        # Resume previous run
+        done = batch.resume(output = output)
+        if done:
+            print("[+] Resuming After {0} Images".format(len(done)))
+        paths = (path for path in batch.paths(sources = sources) if path not in done)
+
+        # Check if results are written as CSV
+        is_csv = output.lower().endswith('.csv')
+
+        count = 0
+        with open(output, 'a', newline = '') as f, Pool(processes = workers, initializer = batch.__initialize__, initargs = (downscale, padding, backend, strategy)) as pool:
+            # Rows of an image are buffered and written at once
+            if is_csv:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                if not f.tell():
+                    writer.writerow(['path', 'x', 'y', 'w', 'h', 'name', 'distance', 'error'])
+                    f.write(buffer.getvalue())
+
+            for result in pool.imap_unordered(batch.__process__, paths, chunksize = chunksize):
+                # Write one row per face, or a single row for images without face
+                if is_csv:
+                    buffer.seek(0)
+                    buffer.truncate()
+                    for face in result['faces'] or [{'box': [''] * 4, 'name': '', 'distance': ''}]:
+                        writer.writerow([result['path']] + face['box'] + [face['name'], face['distance'], result['error'] or ''])
+                    f.write(buffer.getvalue())
+                else:
+                    f.write(json.dumps(result) + '\n')
+
+                # Displaying progress
+                count += 1
+                if not count % 1000:
+                    f.flush()
+                    print("[+] {0} Images Recognized".format(count))
+
+        print("[+] {0} Images Recognized".format(count))
+        print("[+] End Of The Batch Recognition Process")
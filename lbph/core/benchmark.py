@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       benchmark.py
+    @brief      Basic Processing Algorithm to benchmark training, loading and recognition
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, json, os, platform, shutil, tempfile, time
+import numpy as np
+from lbph.core.detection import detector
+from lbph.core.engine import model
+from lbph.core.storage import storage
+from lbph.core.train import training
+
+class benchmark(object):
+    """!
+        @class      benchmark
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Generation of reproducible synthetic face datasets
+                        - Timing of training, model storage, detection and prediction
+                        - JSON results, comparable between versions
+    """
+
+    @staticmethod
+    def face(rng = None, size = 100):
+        """!
+            @fn             face
+            @brief          Returns a random synthetic face of a new person
+
+            @param[in]      rng                 Random generator
+            @param[in]      size                Width and height of the face
+            @return         Grayscale image
+        """
+
+        # Smooth random texture, specific to the person
+        texture = cv2.resize(rng.uniform(60, 200, (8, 8)).astype(np.float32), (size, size), interpolation = cv2.INTER_CUBIC)
+
+        # Draw face, eyes, eyebrows and mouth, at places specific to the person
+        img = np.full((size, size), 40, np.float32)
+        center = size // 2
+        cv2.ellipse(img, (center, center), (int(size * rng.uniform(0.34, 0.42)), int(size * rng.uniform(0.44, 0.49))), 0, 0, 360, 1, -1)
+        img = np.where(img == 1, texture, img)
+        eye = int(size * rng.uniform(0.15, 0.22))
+        height = int(size * rng.uniform(0.36, 0.44))
+        for side in (-1, 1):
+            cv2.circle(img, (center + side * eye, height), int(size * rng.uniform(0.04, 0.07)), 20, -1)
+            cv2.line(img, (center + side * eye - 8, height - 10), (center + side * eye + 8, height - int(rng.uniform(8, 14))), 30, 3)
+        cv2.ellipse(img, (center, int(size * rng.uniform(0.68, 0.76))), (int(size * rng.uniform(0.1, 0.2)), 5), 0, 0, 180, 30, 3)
+
+        return img
+
+    @staticmethod
+    def sample(rng = None, face = None):
+        """!
+            @fn             sample
+            @brief          Returns a sample of a synthetic face, slightly moved, lit and noised
+
+            @param[in]      rng                 Random generator
+            @param[in]      face                Synthetic face
+            @return         Grayscale image
+        """
+        size = face.shape[0]
+        matrix = cv2.getRotationMatrix2D((size / 2, size / 2), rng.uniform(-8, 8), rng.uniform(0.95, 1.05))
+        matrix[:, 2] += rng.uniform(-3, 3, 2)
+        img = cv2.warpAffine(face, matrix, (size, size), borderMode = cv2.BORDER_REFLECT)
+        img = img * rng.uniform(0.8, 1.2) + rng.uniform(-20, 20) + rng.normal(0, 6, img.shape)
+        return np.clip(img, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def dataset(path = None, people = 20, samples = 30, seed = 0):
+        """!
+            @fn             dataset
+            @brief          Write a synthetic dataset of given people and samples per person
+
+            @param[in]      path                Directory of the dataset, a folder per person
+            @param[in]      people              Number of people
+            @param[in]      samples             Number of samples per person
+            @param[in]      seed                Seed of the random generator
+            @return         List of synthetic faces of every person
+        """
+        rng = np.random.default_rng(seed)
+        faces = []
+        for person in range(people):
+            faces.append(benchmark.face(rng = rng))
+            os.makedirs(os.path.join(path, 'person{0:04d}'.format(person)))
+            for number in range(samples):
+                cv2.imwrite(os.path.join(path, 'person{0:04d}'.format(person), '{0}.jpg'.format(number + 1)), benchmark.sample(rng = rng, face = faces[-1]))
+        return faces
+
+    @staticmethod
+    def frame(rng = None, faces = None, count = 2, width = 640, height = 480):
+        """!
+            @fn             frame
+            @brief          Returns a synthetic frame holding samples of given faces
+
+            @param[in]      rng                 Random generator
+            @param[in]      faces               List of synthetic faces
+            @param[in]      count               Number of faces of the frame
+            @param[in]      width               Width of the frame
+            @param[in]      height              Height of the frame
+            @return         Grayscale image
+        """
+        img = cv2.resize(rng.uniform(0, 255, (height // 16, width // 16)).astype(np.uint8), (width, height), interpolation = cv2.INTER_LINEAR)
+        for _ in range(count):
+            size = int(rng.uniform(0.15, 0.3) * height)
+            face = cv2.resize(benchmark.sample(rng = rng, face = faces[rng.integers(len(faces))]), (size, size))
+            x, y = rng.integers(0, width - size), rng.integers(0, height - size)
+            img[y:y + size, x:x + size] = face
+        return img
+
+    @staticmethod
+    def latencies(seconds = None):
+        """!
+            @fn             latencies
+            @brief          Returns statistics of given durations, in milliseconds
+
+            @param[in]      seconds             List of durations in seconds
+            @return         Dictionnary (count, mean, p50, p90, p99, max)
+        """
+        values = 1000 * np.asarray(seconds, dtype = np.float64)
+        return {
+            'count': int(values.size),
+            'mean': float(values.mean()),
+            'p50': float(np.percentile(values, 50)),
+            'p90': float(np.percentile(values, 90)),
+            'p99': float(np.percentile(values, 99)),
+            'max': float(values.max())
+        }
+
+    @staticmethod
+    def timed(function = None, *args, **kwargs):
+        """!
+            @fn             timed
+            @brief          Returns result of given function and its duration in seconds
+        """
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+    @staticmethod
+    def make(output = None, people = 20, samples = 30, frames = 50, predictions = 200, seed = 0, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             make
+            @brief          Run every benchmark on a synthetic dataset, in a temporary directory, and write JSON results
+
+            @param[in]      output              Path of the JSON results
+            @param[in]      people              Number of people of the synthetic dataset
+            @param[in]      samples             Number of samples per person
+            @param[in]      frames              Number of synthetic frames whose faces are detected
+            @param[in]      predictions         Number of faces predicted one at a time
+            @param[in]      seed                Seed of the random generator
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @return         Dictionnary of results
+        """
+
+        # Displaying message
+        print("[+] Initiating The Benchmark Process ...")
+
+        results = {
+            'settings': {'people': people, 'samples': samples, 'frames': frames, 'predictions': predictions, 'seed': seed, 'backend': backend if isinstance(backend, str) else ','.join(backend), 'strategy': strategy},
+            'environment': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'opencv': cv2.__version__,
+                'platform': platform.platform(),
+                'cpus': os.cpu_count()
+            }
+        }
+
+        # Classifiers are loaded before leaving the working directory
+        classifiers = detector(backend = backend, strategy = strategy)
+
+        # Training writes into models/, run it in a temporary working directory
+        directory, cwd = tempfile.mkdtemp(prefix = 'mwoo-benchmark-'), os.getcwd()
+        try:
+            os.chdir(directory)
+            os.mkdir('models')
+
+            faces, seconds = benchmark.timed(benchmark.dataset, path = 'datasets', people = people, samples = samples, seed = seed)
+            results['dataset'] = {'seconds': seconds}
+            print("[+] Dataset Of {0} People And {1} Samples Generated".format(people, samples))
+
+            # Decode every image, then again with cached decoded images
+            _, cold = benchmark.timed(training.build_labels, datasets_path = 'datasets')
+            (images, labels, _), warm = benchmark.timed(training.build_labels, datasets_path = 'datasets')
+            results['build_labels'] = {'images': len(images), 'cold seconds': cold, 'cached seconds': warm}
+
+            # Train from scratch, without cached decoded images
+            shutil.rmtree('models/cache', ignore_errors = True)
+            _, seconds = benchmark.timed(training.make, datasets_path = 'datasets')
+            results['make'] = {'seconds': seconds}
+
+            # Write and read the model in both formats
+            recognizer = storage.read(path = 'models/mwoo.bin', mmap = False)
+            results['model'] = {'samples': len(recognizer.labels)}
+            results['model']['binary write seconds'] = benchmark.timed(storage.write, recognizer = recognizer, path = 'models/bench.bin')[1]
+            results['model']['binary bytes'] = os.path.getsize('models/bench.bin')
+            results['model']['binary read seconds'] = benchmark.timed(storage.read, path = 'models/bench.bin', mmap = False)[1]
+            results['model']['binary mapped read seconds'] = benchmark.timed(storage.read, path = 'models/bench.bin')[1]
+            results['model']['yaml write seconds'] = benchmark.timed(recognizer.write, 'models/bench.yml')[1]
+            results['model']['yaml bytes'] = os.path.getsize('models/bench.yml')
+            results['model']['yaml read seconds'] = benchmark.timed(model().read, 'models/bench.yml')[1]
+            print("[+] Model Of {0} Samples Written And Read".format(len(recognizer.labels)))
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(directory, ignore_errors = True)
+
+        # Detect faces of synthetic frames
+        rng = np.random.default_rng(seed)
+        durations, found = [], 0
+        for _ in range(frames):
+            gray = benchmark.frame(rng = rng, faces = faces)
+            boxes, seconds = benchmark.timed(classifiers, gray = gray, minW = 0.1 * gray.shape[1], minH = 0.1 * gray.shape[0])
+            durations.append(seconds)
+            found += len(boxes)
+        classifiers.close()
+        results['detect'] = benchmark.latencies(seconds = durations)
+        results['detect']['faces'] = found
+
+        # Predict new samples one at a time, then all at once
+        crops = [benchmark.sample(rng = rng, face = faces[rng.integers(len(faces))]) for _ in range(predictions)]
+        results['predict'] = benchmark.latencies(seconds = [benchmark.timed(recognizer.predict, [crop])[1] for crop in crops])
+        results['predict']['batch seconds'] = benchmark.timed(recognizer.predict, crops)[1]
+
+        # Compare with the recognizer of OpenCV contributions, if it is installed
+        if hasattr(cv2, 'face'):
+            reference = cv2.face.LBPHFaceRecognizer_create()
+            reference.train(images, np.asarray(labels, dtype = np.int32))
+            expected = [benchmark.timed(reference.predict, crop) for crop in crops]
+            results['predict']['opencv'] = benchmark.latencies(seconds = [seconds for _, seconds in expected])
+            results['predict']['opencv']['batch seconds'] = sum(seconds for _, seconds in expected)
+            results['predict']['opencv']['same labels'] = float(np.mean(recognizer.predict(crops)[0] == np.asarray([label for (label, _), _ in expected])))
+        print("[+] {0} Frames Detected And {1} Faces Predicted".format(frames, predictions))
+
+        with open(output, 'w') as f:
+            json.dump(results, f, indent = 4)
+
+        print("[+] Results Written Into {0}".format(output))
+        print("[+] End Of The Benchmark Process")
+
+        return results
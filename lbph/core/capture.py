@@ -53,6 +53,9 @@
 """
 
 import cv2, os
+from lbph.core.detection import detector
+from lbph.core.replay import player, recorder
+from lbph.core.sampling import sampling
 
 class shooting(object):
     """!
@@ -63,20 +66,25 @@ class shooting(object):
     """
 
     @staticmethod
-    def __take__(video_source = None, path = None, detector = None, lower = int(), upper = int()):
+    def __take__(video_source = None, path = None, detector = None, lower = int(), upper = int(), selection = None):
         """!
             @fn             __take__
             @brief          Take shooting photo for training process
 
             @param[in]      video_source        Source video file to capture frame by frame
             @param[in]      path                Directory of images
-            @param[in]      detector            Haar Cascade classifier
+            @param[in]      detector            Cascade classifier
             @param[in]      lower               Lower bound interval of face count
             @param[in]      upper               Upper bound interval of face count
+            @param[in]      selection           Selection of samples rejecting blurry, small and near-duplicate faces,
+                                                None to save every face
         """
 
-        # Create a VideoCapture object
-        cap = cv2.VideoCapture(video_source)
+        # Create a VideoCapture object, or a player of a recording
+        if isinstance(video_source, str) and video_source.endswith(recorder.EXTENSION):
+            cap = player(path = video_source)
+        else:
+            cap = cv2.VideoCapture(video_source)
 
         # Define video resolution (width * height)
         cap.set(3, 640)
@@ -89,17 +97,24 @@ class shooting(object):
         while(True):
             # Read image
             ret, img = cap.read()
+            if not ret:
+                break
 
             # Convert the image to grayscale
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             faces = detector.detectMultiScale(gray, 1.3, 5)
             for (x, y, w, h) in faces:
+                # Check if face is blurry, too small or a near-duplicate of a saved one
+                if selection is not None and selection.check(gray = gray[y:y + h, x:x + w]) is not None:
+                    cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 255), 2)
+                    continue
+
                 cv2.rectangle(img, (x, y), (x + w, y + h), (255, 0, 0), 2)     
                 counter += 1
 
                 # Save the captured image into the datasets folder
                 cv2.imwrite(path + '/' + str(counter) + '.jpg', gray[y:y + h, x:x + w])
-                cv2.imshow('<-> MWOO <->', img)
+            cv2.imshow('<-> MWOO <->', img)
 
             # Check user interruptions
             # Press 'ESC' for exiting video
@@ -115,11 +130,15 @@ class shooting(object):
         cv2.destroyAllWindows()
 
     @staticmethod
-    def make(video_source = None):
+    def make(video_source = None, backend = 'haar', sharpness = 50.0, size = 64, distance = 4):
         """!
             @fn             make
             @brief          Capture live stream and make shooting photo for training process
             @param[in]      video_source        Source video file to capture frame by frame  
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      sharpness           Minimum variance of the Laplacian of a face, resized to 100 * 100
+            @param[in]      size                Minimum width and height of a face, in pixels
+            @param[in]      distance            Number of different bits at or below which a face is a near-duplicate
         """
 
         # Take the name of new person
@@ -135,6 +154,12 @@ class shooting(object):
             print('[+] Look At The Camera ...')
             input('[+] We Are Going To Take 50 Pictures. Press [ENTER] When You Are Ready ...')
 
+            # Load front and profile classifiers
+            classifiers = detector(backend = backend)
+
+            # Front and profile pictures must differ from every saved picture
+            selection = sampling(sharpness = sharpness, size = size, distance = distance)
+
             # Create new folder
             os.mkdir(path)
 
@@ -142,20 +167,26 @@ class shooting(object):
             print('[+] Take front pictures ...')
             shooting.__take__(video_source = video_source, 
                                 path = path, 
-                                detector = cv2.CascadeClassifier('res/haarcascade_frontalface_default.xml'),
+                                detector = classifiers.front,
                                 lower = 0,
-                                upper = 25)
+                                upper = 25,
+                                selection = selection)
 
             # Take profile pictures
             print('[+] Take profile pictures ...')
             shooting.__take__(video_source = video_source, 
                                 path = path, 
-                                detector = cv2.CascadeClassifier('res/haarcascade_profileface.xml'),
+                                detector = classifiers.profile,
                                 lower = 25,
-                                upper = 50)
+                                upper = 50,
+                                selection = selection)
+
+            # Displaying rejected faces
+            print('[+] {0} Blurry, {1} Small And {2} Near-Duplicate Faces Rejected'.format(selection.rejected['blurry'], selection.rejected['small'], selection.rejected['duplicate']))
 
             # Do a bit of cleanup
             print('[+] End Of The Capturing Process')
+            print('[+] Run The Update Process To Add This Person To The Model')
         else:
             print('[-] This Person Already Exists In The Datasets')
             pass
\ No newline at end of file
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       detection.py
+    @brief      Basic Processing Algorithm to detect faces at multiple resolutions
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, json, time
+from concurrent.futures import ThreadPoolExecutor
+from lbph.core.metrics import metrics
+from lbph.core.tracking import tracker
+
+class detection(object):
+    """!
+        @class      detection
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Coarse face detection on a downscaled frame
+                        - Refinement of candidates within padded regions at full resolution
+                        - Non-maximum suppression of overlapping rectangles
+                        - Benchmark of detectors on a labeled set
+
+                    Detection functions given to these methods have the signature
+                    detect(gray, minW, minH, maxW, maxH, minNeighbors, scaleFactor),
+                    a null maximum size meaning no maximum, and may tell the size
+                    (width, height) of their smallest detectable face as window.
+    """
+
+    # Define smallest detectable face of a detection function without window, the window of Haar front faces
+    WINDOW = (24, 24)
+
+    @staticmethod
+    def merge(faces = None, scores = None, overlap = 0.3):
+        """!
+            @fn             merge
+            @brief          Returns given rectangles without duplicates, by non-maximum suppression
+                            of the best scored rectangles, or of the larger rectangles without scores
+
+            @param[in]      faces               List of rectangles (x, y, w, h)
+            @param[in]      scores              List of scores of rectangles, None to rank by size
+            @param[in]      overlap             Intersection over union above which two rectangles are duplicates
+            @return         List of rectangles
+        """
+        if scores is None:
+            scores = [face[2] * face[3] for face in faces]
+
+        result = []
+        for _, face in sorted(zip(scores, faces), key = lambda item: (item[0], item[1][2] * item[1][3]), reverse = True):
+            if all(tracker.iou(face, kept) < overlap for kept in result):
+                result.append(face)
+        return result
+
+    @staticmethod
+    def coarse(gray = None, detect = None, downscale = 2.0, minW = 0, minH = 0):
+        """!
+            @fn             coarse
+            @brief          Returns candidates found on a downscaled copy of the frame, in full resolution coordinates.
+                            The frame is never downscaled below the window of the detection function at the
+                            minimum face size, so that a face of the minimum size can still be found
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detect              Detection function
+            @param[in]      downscale           Downscale factor of the frame
+            @param[in]      minW                Min window width to be recognized as a face, in full resolution
+            @param[in]      minH                Min window height to be recognized as a face, in full resolution
+            @return         List of rectangles
+        """
+
+        # Keep faces of the minimum size at least as large as the window of the detection function
+        width, height = getattr(detect, 'window', detection.WINDOW)
+        downscale = max(1.0, min(downscale, minW / width, minH / height))
+
+        # Search a downscaled copy with finer scales and a lower neighbors count, candidates are verified afterwards.
+        # The scale just below the minimum size is searched too, a face of the minimum size falling between two scales
+        small = cv2.resize(gray, (int(gray.shape[1] / downscale), int(gray.shape[0] / downscale)), interpolation = cv2.INTER_AREA)
+        faces = detect(small, minW / downscale / 1.1, minH / downscale / 1.1, 0, 0, 3, 1.1)
+
+        # Map candidates back to full resolution
+        return [tuple(int(round(value * downscale)) for value in face) for face in faces]
+
+    @staticmethod
+    def refine(gray = None, candidates = None, detect = None, padding = 0.5, minW = 0, minH = 0):
+        """!
+            @fn             refine
+            @brief          Returns faces found at full resolution within padded regions around given candidates
+
+            @param[in]      gray                Grayscale image
+            @param[in]      candidates          List of rectangles (x, y, w, h)
+            @param[in]      detect              Detection function
+            @param[in]      padding             Padding of each region, relative to candidate size
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @return         List of rectangles
+        """
+        faces = []
+        for x, y, w, h in candidates:
+            dx, dy = int(padding * w), int(padding * h)
+            left, top = max(0, x - dx), max(0, y - dy)
+            right, bottom = min(gray.shape[1], x + w + dx), min(gray.shape[0], y + h + dy)
+
+            # Search faces of about candidate size only, with finer scales since a region holds a few windows per scale
+            found = detect(gray[top:bottom, left:right],
+                            max(minW, w / (1 + padding)), max(minH, h / (1 + padding)),
+                            min(right - left, w * (1 + padding)), min(bottom - top, h * (1 + padding)),
+                            5, 1.1)
+            faces += [(int(fx) + left, int(fy) + top, int(fw), int(fh)) for fx, fy, fw, fh in found]
+
+        # Padded regions of close candidates overlap
+        return detection.merge(faces = faces)
+
+    @staticmethod
+    def multiresolution(gray = None, detect = None, downscale = 2.0, padding = 0.5, minW = 0, minH = 0):
+        """!
+            @fn             multiresolution
+            @brief          Returns faces found on a downscaled copy of the frame, then refined at full resolution
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detect              Detection function
+            @param[in]      downscale           Downscale factor of the frame
+            @param[in]      padding             Padding of each refined region, relative to candidate size
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @return         List of rectangles
+        """
+        candidates = detection.coarse(gray = gray, detect = detect, downscale = downscale, minW = minW, minH = minH)
+        return detection.refine(gray = gray, candidates = candidates, detect = detect, padding = padding, minW = minW, minH = minH)
+
+    @staticmethod
+    def benchmark(labels = None, backends = None, strategies = None, overlap = 0.5):
+        """!
+            @fn             benchmark
+            @brief          Returns speed, recall and precision of every backend and strategy on a labeled set
+
+            The labeled set is a JSON Lines file whose lines are
+            {"path": ..., "faces": [{"box": [x, y, w, h]}, ...]}, the format of batch results,
+            so that results of a batch recognition can be reviewed and reused as labels.
+
+            @param[in]      labels              Path of the JSON Lines labeled set
+            @param[in]      backends            List of backends, None for every registered backend
+            @param[in]      strategies          List of strategies, None for every strategy
+            @param[in]      overlap             Intersection over union above which a detection matches a labeled face
+            @return         List of dictionnaries (backend, strategy, images, faces, detections, matches,
+                            seconds, images/s, detections/s, recall, precision)
+        """
+
+        # Decode labeled images once, decoding is not part of the benchmark
+        samples = []
+        with open(labels) as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    gray = cv2.imread(item['path'], cv2.IMREAD_GRAYSCALE)
+                    if gray is not None:
+                        samples.append((gray, [tuple(face['box']) for face in item['faces']]))
+
+        reports = []
+        for backend in backends or sorted(detector.BACKENDS):
+            for strategy in strategies or detector.STRATEGIES:
+                detect = detector(backend = backend, strategy = strategy)
+                faces, detections, matches, seconds = 0, 0, 0, 0.0
+                for gray, truth in samples:
+                    start = time.perf_counter()
+                    found = detect(gray, 0.1 * gray.shape[1], 0.1 * gray.shape[0])
+                    seconds += time.perf_counter() - start
+
+                    # Every labeled face matches a single detection
+                    left = [tuple(face) for face in found]
+                    for face in truth:
+                        best = max(left, key = lambda other: tracker.iou(face, other), default = None)
+                        if best is not None and tracker.iou(face, best) >= overlap:
+                            left.remove(best)
+                            matches += 1
+                    faces += len(truth)
+                    detections += len(found)
+                detect.close()
+
+                reports.append({
+                    'backend': backend if isinstance(backend, str) else ','.join(backend),
+                    'strategy': strategy,
+                    'images': len(samples),
+                    'faces': faces,
+                    'detections': detections,
+                    'matches': matches,
+                    'seconds': seconds,
+                    'images/s': len(samples) / seconds if seconds else 0.0,
+                    'detections/s': detections / seconds if seconds else 0.0,
+                    'recall': matches / faces if faces else 0.0,
+                    'precision': matches / detections if detections else 0.0
+                })
+
+        return reports
+
+class detector(object):
+    """!
+        @class      detector
+        @brief      Front and profile cascade classifiers of a backend, used as a detection function
+
+                    A detector must not be shared between threads, each thread creates its own.
+    """
+
+    # Define front and profile cascades of every backend
+    BACKENDS = {
+        'haar': ('res/haarcascade_frontalface_default.xml', 'res/haarcascade_profileface.xml'),
+        'lbp': ('res/lbpcascade_frontalface_improved.xml', 'res/lbpcascade_profileface.xml')
+    }
+
+    # Define ways to combine front and profile cascades :
+    #   - fallback searches profile faces when there is no front face
+    #   - merged searches both, one after the other, and suppresses duplicates
+    #   - concurrent searches both at once, the profile cascade in a second thread
+    STRATEGIES = ('fallback', 'merged', 'concurrent')
+
+    def __init__(self, backend = 'haar', strategy = 'fallback', overlap = 0.3):
+        """!
+            @fn             __init__
+            @brief          Load cascade classifiers of given backend
+
+            @param[in]      backend             Name of a registered backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @param[in]      overlap             Intersection over union above which front and profile faces are duplicates
+        """
+
+        # Check if given backend and strategy are known
+        paths = detector.BACKENDS[backend] if isinstance(backend, str) else tuple(backend)
+        if strategy not in detector.STRATEGIES:
+            raise ValueError('Unknown strategy: {0}'.format(strategy))
+
+        self.front, self.profile = [cv2.CascadeClassifier(path) for path in paths]
+        for path, cascade in zip(paths, (self.front, self.profile)):
+            if cascade.empty():
+                raise ValueError('Unable to load cascade: {0}'.format(path))
+
+        self.strategy = strategy
+        self.overlap = overlap
+        self.executor = ThreadPoolExecutor(max_workers = 1) if strategy == 'concurrent' else None
+
+        # Smallest face found by both cascades
+        sizes = [cascade.getOriginalWindowSize() for cascade in (self.front, self.profile)]
+        self.window = (max(size[0] for size in sizes), max(size[1] for size in sizes))
+
+    def __search__(self, cascade = None, gray = None, minW = 0, minH = 0, maxW = 0, maxH = 0, minNeighbors = 5, scaleFactor = 1.2):
+        """!
+            @fn             __search__
+            @brief          Returns rectangles found by given cascade and their neighbors count
+
+            @return         List of rectangles, list of scores
+        """
+        start = metrics.start()
+        faces, scores = cascade.detectMultiScale2(
+            gray,
+            scaleFactor = scaleFactor,
+            minNeighbors = minNeighbors,
+            minSize = (int(minW), int(minH)),
+            maxSize = (int(maxW), int(maxH))
+        )
+        metrics.stop('detect_front' if cascade is self.front else 'detect_profile', start)
+        return [tuple(int(value) for value in face) for face in faces], [int(score) for score in scores]
+
+    def __call__(self, gray = None, minW = 0, minH = 0, maxW = 0, maxH = 0, minNeighbors = 5, scaleFactor = 1.2):
+        """!
+            @fn             __call__
+            @brief          Detect front and profile faces according to the strategy
+
+            @param[in]      gray                Grayscale image
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @param[in]      maxW                Max window width to be recognized as a face, 0 for no maximum
+            @param[in]      maxH                Max window height to be recognized as a face, 0 for no maximum
+            @param[in]      minNeighbors        Min number of neighbors of a face
+            @param[in]      scaleFactor         Reduction of image size at each image scale
+            @return         List of rectangles of detected faces
+        """
+        arguments = (gray, minW, minH, maxW, maxH, minNeighbors, scaleFactor)
+
+        # Search the profile cascade while searching the front cascade, OpenCV releases the GIL
+        pending = self.executor.submit(self.__search__, self.profile, *arguments) if self.executor else None
+
+        faces, scores = self.__search__(self.front, *arguments)
+
+        # Check if profile faces are searched when there is no front face only
+        if self.strategy == 'fallback':
+            if faces:
+                return faces
+            metrics.count('profile_fallbacks')
+            return self.__search__(self.profile, *arguments)[0]
+
+        profile_faces, profile_scores = pending.result() if pending else self.__search__(self.profile, *arguments)
+        if not profile_faces:
+            return faces
+
+        # Suppress profile faces found as front faces too, best neighbors count first
+        return detection.merge(faces = faces + profile_faces, scores = scores + profile_scores, overlap = self.overlap)
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Stop the thread of the profile cascade, if any
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+class regions(object):
+    """!
+        @class      regions
+        @brief      Multi-resolution detection of a video, restricted to regions
+                    around previous detections between periodic coarse scans
+    """
+
+    def __init__(self, downscale = 2.0, padding = 0.5, interval = 10):
+        """!
+            @fn             __init__
+            @brief          Create a detector without previous detection
+
+            @param[in]      downscale           Downscale factor of coarse scans
+            @param[in]      padding             Padding of refined regions, relative to face size
+            @param[in]      interval            Number of frames between two coarse scans of the whole frame
+        """
+        self.downscale = downscale
+        self.padding = padding
+        self.interval = max(1, interval)
+        self.previous = []
+        self.frames = 0
+
+    def detect(self, gray = None, detect = None, minW = 0, minH = 0):
+        """!
+            @fn             detect
+            @brief          Returns faces of given frame
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detect              Detection function
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @return         List of rectangles
+        """
+        faces = []
+
+        # Search around previous detections only, unless a coarse scan is scheduled
+        if self.previous and self.frames % self.interval:
+            faces = detection.refine(gray = gray, candidates = self.previous, detect = detect, padding = self.padding, minW = minW, minH = minH)
+
+        # Scan the whole frame when it is scheduled, when a face has been lost or when there is no face to follow
+        if not self.previous or len(faces) < len(self.previous) or not self.frames % self.interval:
+            faces = detection.multiresolution(gray = gray, detect = detect, downscale = self.downscale, padding = self.padding, minW = minW, minH = minH)
+
+        self.previous = faces
+        self.frames += 1
+
+        return faces
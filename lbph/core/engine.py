@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       engine.py
+    @brief      Basic Processing Algorithm to compute LBPH descriptors and perform batched prediction
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2
+import numpy as np
+
+class descriptor(object):
+    """!
+        @class      descriptor
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Local Binary Patterns extraction
+                        - Spatial histograms computation
+                        - Chi-Square distance between histograms
+    """
+
+    @staticmethod
+    def codes(image = None, radius = 1, neighbors = 8):
+        """!
+            @fn             codes
+            @brief          Returns extended Local Binary Patterns of given grayscale image
+
+            @param[in]      image               Grayscale image
+            @param[in]      radius              Radius of the circular pattern
+            @param[in]      neighbors           Number of sample points of the circular pattern
+            @return         Matrix of LBP codes, smaller than image by radius on each side
+        """
+
+        # Work on single precision values, as OpenCV does
+        src = np.asarray(image, dtype = np.float32)
+        rows, cols = src.shape
+
+        # Define central pixels and resulting codes
+        center = src[radius:rows - radius, radius:cols - radius]
+        dst = np.zeros(center.shape, dtype = np.int64)
+
+        for n in range(neighbors):
+            # Sample points
+            x = np.float32(radius * np.cos(2.0 * np.pi * n / neighbors))
+            y = np.float32(-radius * np.sin(2.0 * np.pi * n / neighbors))
+
+            # Relative indices
+            fx, fy = int(np.floor(x)), int(np.floor(y))
+            cx, cy = int(np.ceil(x)), int(np.ceil(y))
+
+            # Fractional part
+            ty, tx = y - fy, x - fx
+
+            # Set interpolation weights
+            w1 = np.float32((1 - tx) * (1 - ty))
+            w2 = np.float32(tx * (1 - ty))
+            w3 = np.float32((1 - tx) * ty)
+            w4 = np.float32(tx * ty)
+
+            # Interpolate neighbors values of every central pixel at once
+            t = w1 * src[radius + fy:rows - radius + fy, radius + fx:cols - radius + fx] \
+                + w2 * src[radius + fy:rows - radius + fy, radius + cx:cols - radius + cx] \
+                + w3 * src[radius + cy:rows - radius + cy, radius + fx:cols - radius + fx] \
+                + w4 * src[radius + cy:rows - radius + cy, radius + cx:cols - radius + cx]
+
+            # Floating point precision, so check some machine-dependent epsilon
+            dst |= ((t > center) | (np.abs(t - center) < np.finfo(np.float32).eps)).astype(np.int64) << n
+
+        return dst
+
+    @staticmethod
+    def histogram(image = None, radius = 1, neighbors = 8, grid_x = 8, grid_y = 8):
+        """!
+            @fn             histogram
+            @brief          Returns spatial histogram of Local Binary Patterns of given grayscale image
+
+            @param[in]      image               Grayscale image
+            @param[in]      radius              Radius of the circular pattern
+            @param[in]      neighbors           Number of sample points of the circular pattern
+            @param[in]      grid_x              Number of cells in the horizontal direction
+            @param[in]      grid_y              Number of cells in the vertical direction
+            @return         Row vector of grid_x * grid_y normalized histograms
+        """
+
+        # Get LBP codes
+        codes = descriptor.codes(image = image, radius = radius, neighbors = neighbors)
+
+        # Define number of possible patterns and cell size
+        patterns = 2 ** neighbors
+        height = codes.shape[0] // grid_y
+        width = codes.shape[1] // grid_x
+
+        # Check if image is too small to fill the grid
+        if not height or not width:
+            return np.zeros(grid_x * grid_y * patterns, dtype = np.float32)
+
+        # Split codes into cells, row by row, and shift each cell into its own range of bins
+        cells = codes[:grid_y * height, :grid_x * width].reshape(grid_y, height, grid_x, width)
+        cells = cells.transpose(0, 2, 1, 3).reshape(grid_y * grid_x, height * width)
+        cells = cells + np.arange(grid_y * grid_x)[:, None] * patterns
+
+        # Count every cell in a single pass and normalize by cell size
+        result = np.bincount(cells.ravel(), minlength = grid_x * grid_y * patterns).astype(np.float32)
+        result /= height * width
+
+        return result
+
+    @staticmethod
+    def histograms(images = None, radius = 1, neighbors = 8, grid_x = 8, grid_y = 8):
+        """!
+            @fn             histograms
+            @brief          Returns spatial histograms of given grayscale images
+
+            @param[in]      images              List of grayscale images
+            @param[in]      radius              Radius of the circular pattern
+            @param[in]      neighbors           Number of sample points of the circular pattern
+            @param[in]      grid_x              Number of cells in the horizontal direction
+            @param[in]      grid_y              Number of cells in the vertical direction
+            @return         Matrix of histograms, one row per image
+        """
+
+        # Define resulting matrix
+        result = np.empty((len(images), grid_x * grid_y * 2 ** neighbors), dtype = np.float32)
+
+        for i, image in enumerate(images):
+            result[i] = descriptor.histogram(image = image, radius = radius, neighbors = neighbors, grid_x = grid_x, grid_y = grid_y)
+
+        return result
+
+    @staticmethod
+    def columns(gallery = None):
+        """!
+            @fn             columns
+            @brief          Returns bin-major copy of given gallery, each row holding one bin of every sample,
+                            and the sum of every histogram
+
+            @param[in]      gallery             Matrix of stored histograms, one row per sample
+            @return         columns (bins * gallery), totals
+        """
+        gallery = np.asarray(gallery, dtype = np.float32)
+
+        # OpenCV transposes a few times faster than a NumPy copy
+        columns = cv2.transpose(gallery) if gallery.size else np.ascontiguousarray(gallery.T)
+        return columns, columns.sum(axis = 0)
+
+    @staticmethod
+    def distances(queries = None, gallery = None, columns = None, totals = None, chunk = 2 ** 16):
+        """!
+            @fn             distances
+            @brief          Returns alternative Chi-Square distances between every query and every gallery histogram
+
+                            2 * sum((q - g)^2 / (q + g)) is computed as 2 * (sum(q) + sum(g) - 4 * sum(q * g / (q + g))),
+                            the last sum being null wherever q is null, so that only non-empty bins of the queries
+                            are read, as contiguous rows of the bin-major gallery. Non-empty bins of every query
+                            of the batch are scored together, block by block, and summed per query by a matrix product
+
+            @param[in]      queries             Matrix of query histograms, one row per face
+            @param[in]      gallery             Matrix of stored histograms, one row per sample,
+                                                ignored when its bin-major copy is given
+            @param[in]      columns             Bin-major copy of the gallery, None to make it
+            @param[in]      totals              Sum of every gallery histogram, given with columns
+            @param[in]      chunk               Maximum number of elements of intermediate matrices,
+                                                small enough for them to stay in cache
+            @return         Matrix of distances (queries * gallery)
+        """
+
+        queries = np.asarray(queries, dtype = np.float32)
+        if columns is None:
+            columns, totals = descriptor.columns(gallery = gallery)
+
+        # Non-empty bins of every query, query by query
+        rows, bins = np.nonzero(queries)
+        values = queries[rows, bins][:, None]
+        shared = np.zeros((queries.shape[0], columns.shape[1]), dtype = np.float32)
+
+        # Define number of (query, bin) pairs processed at once to bound memory usage
+        step = max(1, chunk // max(1, columns.shape[1]))
+
+        for start in range(0, len(bins), step):
+            # Compute q * g / (q + g) in place, bins of empty gallery histograms having a null numerator
+            g = columns[bins[start:start + step]]
+            denominator = g + values[start:start + step]
+            np.multiply(g, values[start:start + step], out = g)
+            np.divide(g, denominator, out = g)
+
+            # Sum pairs of each query of the block, pairs being sorted by query
+            owners = rows[start:start + step]
+            first, last = owners[0], owners[-1]
+            members = (owners[None, :] == np.arange(first, last + 1)[:, None]).astype(np.float32)
+            shared[first:last + 1] += members @ g
+
+        result = 2 * (queries.sum(axis = 1)[:, None] + totals[None, :] - 4 * shared)
+
+        # Rounding errors of the difference must not give negative distances
+        return np.maximum(result, 0, out = result)
+
+    @staticmethod
+    def identities(matrix = None, labels = None, k = 1):
+        """!
+            @fn             identities
+            @brief          Returns k closest identities of every query, each identity
+                            being scored by its closest sample
+
+            @param[in]      matrix              Matrix of distances (queries * gallery)
+            @param[in]      labels              Label of each gallery sample
+            @param[in]      k                   Number of identities per query
+            @return         labels, distances as (queries * k) matrices, padded with -1 and infinity
+        """
+
+        # Define resulting matrices
+        result_labels = np.full((matrix.shape[0], k), -1, dtype = np.int32)
+        result_distances = np.full((matrix.shape[0], k), np.inf, dtype = np.float64)
+
+        # Check if there is no sample
+        if not matrix.shape[1]:
+            return result_labels, result_distances
+
+        # Keep closest sample of every identity
+        unique, inverse = np.unique(np.asarray(labels), return_inverse = True)
+        best = np.full((matrix.shape[0], len(unique)), np.inf, dtype = np.float64)
+        np.minimum.at(best, (np.arange(matrix.shape[0])[:, None], inverse.ravel()[None, :]), matrix)
+
+        # Sort identities of every query
+        top = np.argsort(best, axis = 1)[:, :k]
+        result_labels[:, :top.shape[1]] = unique[top]
+        result_distances[:, :top.shape[1]] = np.take_along_axis(best, top, axis = 1)
+
+        return result_labels, result_distances
+
+class model(object):
+    """!
+        @class      model
+        @brief      Local Binary Patterns Histograms face recognizer, scoring
+                    all faces against the gallery in one distance computation.
+                    Searches read a bin-major copy of the gallery, made on the
+                    first search after the gallery changes, which doubles the
+                    memory used by histograms
+    """
+
+    def __init__(self, radius = 1, neighbors = 8, grid_x = 8, grid_y = 8, threshold = np.finfo(np.float64).max):
+        """!
+            @fn             __init__
+            @brief          Create an empty LBPH model
+
+            @param[in]      radius              Radius of the circular pattern
+            @param[in]      neighbors           Number of sample points of the circular pattern
+            @param[in]      grid_x              Number of cells in the horizontal direction
+            @param[in]      grid_y              Number of cells in the vertical direction
+            @param[in]      threshold           Distance above which a face is unknown
+        """
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.threshold = threshold
+        self.histograms = np.empty((0, grid_x * grid_y * 2 ** neighbors), dtype = np.float32)
+        self.labels = np.empty(0, dtype = np.int32)
+
+        # Optional nearest neighbour index, brute force when None
+        self.index = None
+
+        # Bin-major copy of the gallery, with the histograms it has been made of
+        self.cache = None
+
+    def describe(self, images = None):
+        """!
+            @fn             describe
+            @brief          Returns spatial histograms of given images using model parameters
+
+            @param[in]      images              List of grayscale images
+            @return         Matrix of histograms, one row per image
+        """
+        return descriptor.histograms(images = images,
+                                    radius = self.radius,
+                                    neighbors = self.neighbors,
+                                    grid_x = self.grid_x,
+                                    grid_y = self.grid_y)
+
+    def train(self, images = None, labels = None):
+        """!
+            @fn             train
+            @brief          Replace gallery with histograms of given images
+
+            @param[in]      images              List of grayscale images
+            @param[in]      labels              Label of each image
+        """
+        self.histograms = self.describe(images = images)
+        self.labels = np.asarray(labels, dtype = np.int32).ravel()
+
+    def update(self, images = None, labels = None):
+        """!
+            @fn             update
+            @brief          Append histograms of given images to the gallery, copying it,
+                            which suits incremental updates of a few people only
+
+            @param[in]      images              List of grayscale images
+            @param[in]      labels              Label of each image
+        """
+        self.histograms = np.concatenate((self.histograms, self.describe(images = images)))
+        self.labels = np.concatenate((self.labels, np.asarray(labels, dtype = np.int32).ravel()))
+
+    def columns(self):
+        """!
+            @fn             columns
+            @brief          Returns bin-major copy of the gallery and sum of every histogram,
+                            mapped with the model when its file has one, otherwise made
+                            on the first exhaustive search and again when histograms have been replaced
+        """
+        cache = self.cache
+        if cache is None or cache[0] is not self.histograms:
+            cache = (self.histograms,) + descriptor.columns(gallery = self.histograms)
+            self.cache = cache
+        return cache[1], cache[2]
+
+    def search(self, histograms = None, k = 1, chunk = 256):
+        """!
+            @fn             search
+            @brief          Returns k closest identities of given histograms by exhaustive search
+
+            @param[in]      histograms          Matrix of query histograms
+            @param[in]      k                   Number of identities per query
+            @param[in]      chunk               Number of queries scored at once
+            @return         labels, distances as (queries * k) matrices
+        """
+
+        # Define resulting matrices
+        labels = np.full((len(histograms), k), -1, dtype = np.int32)
+        distances = np.full((len(histograms), k), np.inf, dtype = np.float64)
+
+        columns, totals = self.columns()
+        for start in range(0, len(histograms), chunk):
+            # Score a block of queries against the whole gallery
+            matrix = descriptor.distances(queries = histograms[start:start + chunk], columns = columns, totals = totals)
+            labels[start:start + chunk], distances[start:start + chunk] = descriptor.identities(matrix = matrix, labels = self.labels, k = k)
+
+        return labels, distances
+
+    def nearest(self, histograms = None, chunk = 256):
+        """!
+            @fn             nearest
+            @brief          Returns closest gallery label and distance of given histograms
+
+            @param[in]      histograms          Matrix of query histograms
+            @param[in]      chunk               Number of queries scored at once
+            @return         labels, distances
+        """
+
+        # Define resulting arrays
+        labels = np.full(len(histograms), -1, dtype = np.int32)
+        distances = np.full(len(histograms), np.finfo(np.float64).max, dtype = np.float64)
+
+        # Check if gallery is empty
+        if not len(self.labels):
+            return labels, distances
+
+        # Check if an index is available
+        if self.index is not None:
+            found, scores = self.index.search(recognizer = self, histograms = histograms, k = 1)
+            labels, distances = found[:, 0], scores[:, 0]
+            labels[distances >= self.threshold] = -1
+            return labels, distances
+
+        columns, totals = self.columns()
+        for start in range(0, len(histograms), chunk):
+            # Score a block of queries against the whole gallery
+            matrix = descriptor.distances(queries = histograms[start:start + chunk], columns = columns, totals = totals)
+            closest = matrix.argmin(axis = 1)
+            labels[start:start + chunk] = self.labels[closest]
+            distances[start:start + chunk] = matrix[np.arange(len(closest)), closest]
+
+        # Unknown faces are labelled -1
+        labels[distances >= self.threshold] = -1
+
+        return labels, distances
+
+    def predict(self, images = None):
+        """!
+            @fn             predict
+            @brief          Returns closest label and distance of every given image
+
+            @param[in]      images              List of grayscale face images
+            @return         labels, distances
+        """
+        return self.nearest(histograms = self.describe(images = images))
+
+    def write(self, path = None):
+        """!
+            @fn             write
+            @brief          Save the model in a YAML file readable by cv2.face.LBPHFaceRecognizer
+
+            @param[in]      path                Path of the YAML file
+        """
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+        fs.startWriteStruct('opencv_lbphfaces', cv2.FILE_NODE_MAP)
+        fs.write('threshold', float(self.threshold))
+        fs.write('radius', int(self.radius))
+        fs.write('neighbors', int(self.neighbors))
+        fs.write('grid_x', int(self.grid_x))
+        fs.write('grid_y', int(self.grid_y))
+
+        # Write one row matrix per sample
+        fs.startWriteStruct('histograms', cv2.FILE_NODE_SEQ)
+        for histogram in self.histograms:
+            fs.write('', histogram.reshape(1, -1))
+        fs.endWriteStruct()
+
+        fs.write('labels', self.labels.reshape(-1, 1))
+        fs.startWriteStruct('labelsInfo', cv2.FILE_NODE_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+        fs.release()
+
+    def read(self, path = None):
+        """!
+            @fn             read
+            @brief          Load the model from a YAML file written by cv2.face.LBPHFaceRecognizer
+
+            @param[in]      path                Path of the YAML file
+        """
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+        node = fs.getNode('opencv_lbphfaces')
+        self.threshold = node.getNode('threshold').real()
+        self.radius = int(node.getNode('radius').real())
+        self.neighbors = int(node.getNode('neighbors').real())
+        self.grid_x = int(node.getNode('grid_x').real())
+        self.grid_y = int(node.getNode('grid_y').real())
+
+        # Read one row matrix per sample
+        histograms = node.getNode('histograms')
+        self.histograms = np.empty((histograms.size(), self.grid_x * self.grid_y * 2 ** self.neighbors), dtype = np.float32)
+        for i in range(histograms.size()):
+            self.histograms[i] = histograms.at(i).mat().ravel()
+
+        labels = node.getNode('labels').mat()
+        self.labels = np.empty(0, dtype = np.int32) if labels is None else labels.astype(np.int32).ravel()
+        fs.release()
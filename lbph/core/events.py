@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       events.py
+    @brief      Basic Processing Algorithm to write recognition events
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import json, sys, time
+
+class events(object):
+    """!
+        @class      events
+        @brief      Buffered JSON Lines sink of recognition events, one event per
+                    recognized face : {"timestamp", "source", "box", "identity", "distance"}.
+                    Events are written in batches, when the buffer is full or
+                    when the oldest buffered event is too old.
+    """
+
+    def __init__(self, output = '-', size = 256, interval = 1.0):
+        """!
+            @fn             __init__
+            @brief          Open given output
+
+            @param[in]      output              Path of the JSON Lines file, '-' for standard output,
+                                                or an opened text stream
+            @param[in]      size                Maximum number of buffered events
+            @param[in]      interval            Maximum time in seconds an event stays buffered
+        """
+        if output == '-':
+            self.stream, self.owned = sys.stdout, False
+        elif isinstance(output, str):
+            self.stream, self.owned = open(output, 'a'), True
+        else:
+            self.stream, self.owned = output, False
+        self.size = size
+        self.interval = interval
+        self.buffer = []
+        self.oldest = None
+        self.count = 0
+
+    def write(self, source = None, results = None, timestamp = None):
+        """!
+            @fn             write
+            @brief          Buffer events of the recognized faces of a frame
+
+            @param[in]      source              Name of the source of the frame
+            @param[in]      results             List of (rectangle, name, distance)
+            @param[in]      timestamp           Time of the frame in seconds since the epoch, None for now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for box, name, distance in results:
+            self.buffer.append(json.dumps({
+                'timestamp': timestamp,
+                'source': source,
+                'box': [int(value) for value in box],
+                'identity': name,
+                'distance': float(distance)
+            }))
+        if self.buffer and self.oldest is None:
+            self.oldest = timestamp
+
+        # Write a batch when the buffer is full or too old
+        if len(self.buffer) >= self.size or (self.buffer and time.time() - self.oldest >= self.interval):
+            self.flush()
+
+    def flush(self):
+        """!
+            @fn             flush
+            @brief          Write buffered events at once
+        """
+        if self.buffer:
+            self.stream.write('\n'.join(self.buffer) + '\n')
+            self.stream.flush()
+            self.count += len(self.buffer)
+            self.buffer = []
+        self.oldest = None
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Write buffered events and close output, unless it is a standard stream
+        """
+        self.flush()
+        if self.owned:
+            self.stream.close()
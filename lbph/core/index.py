@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       index.py
+    @brief      Basic Processing Algorithm to search LBPH galleries in sublinear time
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import os, time
+import numpy as np
+from lbph.core.engine import descriptor
+
+class index(object):
+    """!
+        @class      index
+        @brief      Inverted file index over LBPH histograms. Histograms are
+                    reduced by a PCA of their square roots, where euclidean
+                    distances approximate Chi-Square distances, then
+                    quantized into cells by k-means. A search scores exactly
+                    the samples of the cells closest to each query only.
+                    The index keeps the digest of the indexed model, so that
+                    it is never attached to another model of the same size.
+    """
+
+    # Version of the index layout
+    VERSION = 2
+
+    def __init__(self):
+        """!
+            @fn             __init__
+            @brief          Create an empty index
+        """
+        self.mean = None
+        self.components = None
+        self.centroids = None
+        self.cells = np.empty(0, dtype = np.int32)
+        self.order = np.empty(0, dtype = np.int64)
+        self.offsets = np.zeros(1, dtype = np.int64)
+        self.digest = ''
+
+    def project(self, histograms = None, chunk = 1024):
+        """!
+            @fn             project
+            @brief          Returns reduced vectors of given histograms
+
+            @param[in]      histograms          Matrix of histograms
+            @param[in]      chunk               Number of histograms projected at once
+            @return         Matrix of reduced vectors
+        """
+        result = np.empty((len(histograms), len(self.components)), dtype = np.float32)
+        for start in range(0, len(histograms), chunk):
+            result[start:start + chunk] = (np.sqrt(histograms[start:start + chunk]) - self.mean) @ self.components.T
+        return result
+
+    def assign(self, reduced = None):
+        """!
+            @fn             assign
+            @brief          Returns closest cells of given reduced vectors, sorted by distance
+
+            @param[in]      reduced             Matrix of reduced vectors
+            @return         Matrix of cells (vectors * cells)
+        """
+        distances = np.square(reduced).sum(axis = 1)[:, None] - 2 * reduced @ self.centroids.T + np.square(self.centroids).sum(axis = 1)[None, :]
+        return np.argsort(distances, axis = 1)
+
+    def sort(self):
+        """!
+            @fn             sort
+            @brief          Group samples by cell, samples of a cell remaining in file order
+        """
+        self.order = np.argsort(self.cells, kind = 'stable')
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(self.cells, minlength = len(self.centroids)))))
+
+    def build(self, histograms = None, dimensions = 64, cells = None, iterations = 10, sample = 4096, seed = 0):
+        """!
+            @fn             build
+            @brief          Build the index over given gallery histograms
+
+            @param[in]      histograms          Matrix of gallery histograms
+            @param[in]      dimensions          Number of principal components
+            @param[in]      cells               Number of cells, square root of gallery size when None
+            @param[in]      iterations          Number of k-means iterations
+            @param[in]      sample              Maximum number of histograms used to learn PCA and cells
+            @param[in]      seed                Seed of random generator
+        """
+
+        rng = np.random.default_rng(seed)
+
+        # Learn on a random sample of the gallery
+        rows = np.sort(rng.choice(len(histograms), size = min(sample, len(histograms)), replace = False))
+        learning = np.sqrt(np.asarray(histograms[rows], dtype = np.float32))
+        self.mean = learning.mean(axis = 0)
+        learning -= self.mean
+
+        # Randomized PCA : find an orthonormal basis of the range, then decompose in it
+        basis = learning.T @ rng.standard_normal((len(rows), min(dimensions + 10, len(rows)))).astype(np.float32)
+        for _ in range(2):
+            basis, _ = np.linalg.qr(learning.T @ (learning @ basis))
+        _, _, vt = np.linalg.svd(learning @ basis, full_matrices = False)
+        self.components = (vt @ basis.T)[:dimensions].astype(np.float32)
+
+        # Learn cells with k-means
+        reduced = learning @ self.components.T
+        cells = cells or max(1, int(np.sqrt(len(histograms))))
+        self.centroids = reduced[rng.choice(len(reduced), size = min(cells, len(reduced)), replace = False)]
+        for _ in range(iterations):
+            assigned = self.assign(reduced = reduced)[:, 0]
+            for cell in range(len(self.centroids)):
+                members = reduced[assigned == cell]
+                if len(members):
+                    self.centroids[cell] = members.mean(axis = 0)
+
+        # Assign every sample of the gallery
+        self.cells = self.assign(reduced = self.project(histograms = histograms))[:, 0].astype(np.int32)
+        self.sort()
+
+    def update(self, histograms = None, keep = None):
+        """!
+            @fn             update
+            @brief          Follow incremental changes of the gallery without learning again
+
+            @param[in]      histograms          Matrix of appended histograms
+            @param[in]      keep                Boolean mask of kept samples, None to keep all
+        """
+        if keep is not None:
+            self.cells = self.cells[keep]
+        if histograms is not None and len(histograms):
+            self.cells = np.concatenate((self.cells, self.assign(reduced = self.project(histograms = histograms))[:, 0].astype(np.int32)))
+        self.sort()
+
+    def search(self, recognizer = None, histograms = None, k = 1, probes = 8):
+        """!
+            @fn             search
+            @brief          Returns k closest identities of given histograms, scoring samples of probed cells only
+
+            @param[in]      recognizer          LBPH model indexed by this index
+            @param[in]      histograms          Matrix of query histograms
+            @param[in]      k                   Number of identities per query
+            @param[in]      probes              Number of cells probed per query
+            @return         labels, distances as (queries * k) matrices
+        """
+
+        # Define resulting matrices
+        labels = np.full((len(histograms), k), -1, dtype = np.int32)
+        distances = np.full((len(histograms), k), np.inf, dtype = np.float64)
+
+        # Find closest cells of every query
+        probed = self.assign(reduced = self.project(histograms = histograms))[:, :probes]
+
+        for i, cells in enumerate(probed):
+            # Gather candidates in file order to read the gallery sequentially
+            rows = np.sort(np.concatenate([self.order[self.offsets[cell]:self.offsets[cell + 1]] for cell in cells]))
+
+            # Re-rank candidates with exact distances
+            matrix = descriptor.distances(queries = histograms[i:i + 1], gallery = recognizer.histograms[rows])
+            labels[i:i + 1], distances[i:i + 1] = descriptor.identities(matrix = matrix, labels = recognizer.labels[rows], k = k)
+
+        return labels, distances
+
+    def write(self, path = None, digest = None):
+        """!
+            @fn             write
+            @brief          Save the index into a file
+
+            @param[in]      path                Path of the index
+            @param[in]      digest              Digest of the indexed model, from its manifest
+        """
+        self.digest = digest
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, version = index.VERSION, digest = self.digest, mean = self.mean, components = self.components, centroids = self.centroids, cells = self.cells)
+        os.replace(path + '.tmp', path)
+
+    def read(self, path = None):
+        """!
+            @fn             read
+            @brief          Load the index from a file
+
+            @param[in]      path                Path of the index
+        """
+        with np.load(path) as data:
+            # Check if index has a known version
+            if int(data['version']) != index.VERSION:
+                raise ValueError('{0} has unsupported version {1}'.format(path, int(data['version'])))
+            self.digest = str(data['digest'])
+            self.mean = data['mean']
+            self.components = data['components']
+            self.centroids = data['centroids']
+            self.cells = data['cells']
+        self.sort()
+
+    @staticmethod
+    def load(path = None, recognizer = None, digest = None):
+        """!
+            @fn             load
+            @brief          Attach index of given path to given model if it indexes this model
+
+            @param[in]      path                Path of the index
+            @param[in]      recognizer          LBPH model
+            @param[in]      digest              Digest of the model, from its manifest
+            @return         True if index has been attached, False otherwise
+        """
+
+        # Check if index exists, with the current layout
+        if not os.path.isfile(path):
+            return False
+        result = index()
+        try:
+            result.read(path = path)
+        except ValueError:
+            return False
+
+        # Check if index follows the model, a model of the same size is not enough
+        if len(result.cells) != len(recognizer.labels) or result.digest != digest:
+            return False
+
+        recognizer.index = result
+        return True
+
+    @staticmethod
+    def report(recognizer = None, k = 1, probes = (1, 2, 4, 8, 16), holdout = 0.1, seed = 0):
+        """!
+            @fn             report
+            @brief          Returns recall and latency of indexed search against exhaustive search,
+                            querying a held out part of the gallery with an index built on the rest
+
+            @param[in]      recognizer          LBPH model
+            @param[in]      k                   Number of identities per query
+            @param[in]      probes              Numbers of probed cells to evaluate
+            @param[in]      holdout             Part of the gallery used as queries
+            @param[in]      seed                Seed of random generator
+            @return         List of dictionnaries (probes, recall, latency in ms), brute force first
+        """
+
+        # Split gallery into queries and remaining samples
+        rng = np.random.default_rng(seed)
+        held = np.zeros(len(recognizer.labels), dtype = bool)
+        held[rng.choice(len(held), size = max(1, int(holdout * len(held))), replace = False)] = True
+        queries = np.asarray(recognizer.histograms[np.flatnonzero(held)])
+        gallery = type(recognizer)(radius = recognizer.radius, neighbors = recognizer.neighbors, grid_x = recognizer.grid_x, grid_y = recognizer.grid_y)
+        gallery.histograms = np.asarray(recognizer.histograms[np.flatnonzero(~held)])
+        gallery.labels = np.asarray(recognizer.labels[np.flatnonzero(~held)])
+
+        # Exhaustive search is the reference
+        start = time.perf_counter()
+        expected, _ = gallery.search(histograms = queries, k = 1)
+        results = [{'probes': 0, 'recall': 1.0, 'latency': 1000 * (time.perf_counter() - start) / len(queries)}]
+
+        # Build index on remaining samples only
+        result = index()
+        result.build(histograms = gallery.histograms)
+
+        for count in probes:
+            start = time.perf_counter()
+            found, _ = result.search(recognizer = gallery, histograms = queries, k = k, probes = count)
+            latency = 1000 * (time.perf_counter() - start) / len(queries)
+
+            # Closest identity must be found among k returned identities
+            results.append({'probes': count, 'recall': float((found == expected).any(axis = 1).mean()), 'latency': latency})
+
+        return results
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       journal.py
+    @brief      Basic Processing Algorithm to keep a durable log of recognition visits
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import collections, os, sqlite3, threading, time, urllib.parse
+
+class journal(object):
+    """!
+        @class      journal
+        @brief      Durable sink of recognition events, an SQLite database in WAL mode
+                    indexed by identity and time. Consecutive sightings of an identity
+                    on a source are coalesced into a single visit (first and last
+                    sightings, count, best distance, last box), so that a face seen
+                    on every frame makes a single row. Visits are committed in batches
+                    by a writer thread, changed visits waiting for it are bounded :
+                    the oldest ones are dropped when the disk stalls.
+    """
+
+    # Define extensions of journals, other outputs of events are JSON Lines files
+    EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+    # Define schema of journals
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS visits (id INTEGER PRIMARY KEY, source TEXT, identity TEXT, first REAL, last REAL, '
+        'sightings INTEGER, distance REAL, x INTEGER, y INTEGER, w INTEGER, h INTEGER)',
+        'CREATE INDEX IF NOT EXISTS visits_identity ON visits (identity, first)',
+        'CREATE INDEX IF NOT EXISTS visits_first ON visits (first)',
+        'CREATE INDEX IF NOT EXISTS visits_last ON visits (last)'
+    )
+
+    # Define columns of a visit
+    COLUMNS = ('id', 'source', 'identity', 'first', 'last', 'sightings', 'distance', 'x', 'y', 'w', 'h')
+
+    def __init__(self, path = None, gap = 2.0, size = 1024, interval = 1.0, capacity = 65536):
+        """!
+            @fn             __init__
+            @brief          Open given journal, creating it if needed, and start its writer
+
+            @param[in]      path                Path of the database
+            @param[in]      gap                 Time in seconds without sighting after which a visit ends
+            @param[in]      size                Number of changed visits committed at once without waiting
+            @param[in]      interval            Maximum time in seconds between two commits
+            @param[in]      capacity            Maximum number of changed visits waiting for a commit
+        """
+        self.path = path
+        self.stream = None
+        self.gap = gap
+        self.size = size
+        self.interval = interval
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.visits = {}
+        self.pending = collections.OrderedDict()
+        self.count = 0
+        self.dropped = 0
+        self.failures = 0
+        self.wake = threading.Event()
+
+        # Create schema at once, so that a wrong path fails before recognition starts
+        connection = journal.__connect__(path = path)
+        self.next_id = connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM visits').fetchone()[0]
+        connection.close()
+
+        self.stopping = threading.Event()
+        self.writer = threading.Thread(target = self.__write__, daemon = True)
+        self.writer.start()
+
+    @staticmethod
+    def __connect__(path = None):
+        """!
+            @fn             __connect__
+            @brief          Returns connection to given journal, in WAL mode with its schema
+
+            @param[in]      path                Path of the database
+            @return         SQLite connection
+        """
+        connection = sqlite3.connect(path, timeout = 1.0)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        for statement in journal.SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+        return connection
+
+    def __change__(self, visit = None):
+        """!
+            @fn             __change__
+            @brief          Queue a changed visit for the next commit, waking the writer up when a batch
+                            is complete and dropping the oldest visit when full
+
+            @param[in]      visit               Visit as a list of column values
+        """
+        self.pending[visit[0]] = visit
+        self.pending.move_to_end(visit[0])
+        if len(self.pending) >= self.size:
+            self.wake.set()
+        if len(self.pending) > self.capacity:
+            self.pending.popitem(last = False)
+            self.dropped += 1
+
+    def write(self, source = None, results = None, timestamp = None):
+        """!
+            @fn             write
+            @brief          Record sightings of the recognized faces of a frame
+
+            @param[in]      source              Name of the source of the frame
+            @param[in]      results             List of (rectangle, name, distance)
+            @param[in]      timestamp           Time of the frame in seconds since the epoch, None for now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            for box, name, distance in results:
+                key = (source, name)
+                visit = self.visits.get(key)
+
+                # Start a visit when the identity has not been seen on the source for a while
+                if visit is None or timestamp - visit[4] > self.gap:
+                    visit = [self.next_id, source, name, timestamp, timestamp, 0, float(distance)] + [0] * 4
+                    self.visits[key] = visit
+                    self.next_id += 1
+
+                visit[4] = timestamp
+                visit[5] += 1
+                visit[6] = min(visit[6], float(distance))
+                visit[7:11] = [int(value) for value in box]
+                self.__change__(visit = visit)
+                self.count += 1
+
+            # Forget ended visits of the source, they have already been queued
+            for key in [key for key, visit in self.visits.items() if key[0] == source and timestamp - visit[4] > self.gap]:
+                del self.visits[key]
+
+    def __commit__(self, connection = None):
+        """!
+            @fn             __commit__
+            @brief          Write changed visits in a single transaction, keeping them for the next commit on failure
+
+            @param[in]      connection          SQLite connection of the writer
+        """
+        with self.lock:
+            batch = list(self.pending.values())
+            rows = [tuple(visit) for visit in batch]
+            self.pending.clear()
+        if not rows:
+            return
+
+        try:
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO visits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error as err:
+            self.failures += 1
+            if self.failures == 1:
+                print("[-] Journal Commit Failed : {0}".format(err))
+
+            # Visits changed meanwhile are newer, older ones are dropped first when full
+            with self.lock:
+                newer = self.pending
+                self.pending = collections.OrderedDict()
+                for visit in batch + list(newer.values()):
+                    self.__change__(visit = visit)
+
+    def __write__(self):
+        """!
+            @fn             __write__
+            @brief          Commit changed visits periodically, or when asked to, until the journal is closed
+        """
+        connection = journal.__connect__(path = self.path)
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            stopping = self.stopping.is_set()
+            self.__commit__(connection = connection)
+            if stopping:
+                break
+        connection.close()
+
+    def flush(self):
+        """!
+            @fn             flush
+            @brief          Ask the writer to commit changed visits at once
+        """
+        self.wake.set()
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Commit remaining visits and stop the writer
+        """
+        self.stopping.set()
+        self.wake.set()
+        self.writer.join()
+        if self.dropped:
+            print("[-] {0} Visits Dropped While The Journal Was Stalled".format(self.dropped))
+
+    @staticmethod
+    def query(path = None, identities = None, since = None, until = None):
+        """!
+            @fn             query
+            @brief          Returns visits of an existing journal, in time order, read only
+
+            @param[in]      path                Path of the database
+            @param[in]      identities          List of identities, None for every identity
+            @param[in]      since               Time in seconds since the epoch, visits ended before are excluded
+            @param[in]      until               Time in seconds since the epoch, visits started after are excluded
+            @return         List of dictionnaries of visits
+        """
+        clauses, parameters = [], []
+        if identities:
+            clauses.append('identity IN ({0})'.format(', '.join('?' * len(identities))))
+            parameters += list(identities)
+        if until is not None:
+            clauses.append('first <= ?')
+            parameters.append(until)
+        if since is not None:
+            clauses.append('last >= ?')
+            parameters.append(since)
+
+        # Recent visits are found on visits_last, then sorted, rather than scanning every visit in order of visits_first
+        order = '+first' if since is not None else 'first'
+
+        # Read without creating a missing journal nor changing its mode
+        if not os.path.isfile(path):
+            raise FileNotFoundError('{0} is not a journal'.format(path))
+        connection = sqlite3.connect('file:{0}?mode=ro'.format(urllib.parse.quote(os.path.abspath(path))), uri = True, timeout = 1.0)
+        try:
+            rows = connection.execute('SELECT * FROM visits' + (' WHERE ' + ' AND '.join(clauses) if clauses else '') + ' ORDER BY ' + order, parameters).fetchall()
+        finally:
+            connection.close()
+
+        return [dict(zip(journal.COLUMNS, row)) for row in rows]
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       loader.py
+    @brief      Basic Processing Algorithm to load datasets in parallel
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, functools, hashlib, os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+class loader(object):
+    """!
+        @class      loader
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Parallel images decoding
+                        - On-disk cache of decoded grayscale images
+                        - Eviction of stale cache entries
+    """
+
+    @staticmethod
+    def key(path = None):
+        """!
+            @fn             key
+            @brief          Returns cache key of given image from its path, size and modification time
+
+            @param[in]      path                Path of the image
+            @return         Hexadecimal digest
+        """
+        stat = os.stat(path)
+        return hashlib.sha1('{0}\0{1}\0{2}'.format(os.path.abspath(path), stat.st_size, stat.st_mtime_ns).encode()).hexdigest()
+
+    @staticmethod
+    def decode(path = None, cache_path = None):
+        """!
+            @fn             decode
+            @brief          Returns grayscale image of given file, decoded at most once
+
+            @param[in]      path                Path of the image
+            @param[in]      cache_path          Directory of decoded images, None to disable cache
+            @return         Grayscale image, None if file is not a readable image
+        """
+
+        # Check if image has already been decoded
+        if cache_path:
+            key = loader.key(path = path)
+            cached = os.path.join(cache_path, key[:2], key + '.npy')
+            if os.path.isfile(cached):
+                return np.load(cached)
+
+        # Decode image
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+        # Save decoded image, concurrent workers never see a partial file
+        if cache_path and image is not None:
+            os.makedirs(os.path.dirname(cached), exist_ok = True)
+            with open('{0}.{1}.tmp'.format(cached, os.getpid()), 'wb') as f:
+                np.save(f, image)
+            os.replace('{0}.{1}.tmp'.format(cached, os.getpid()), cached)
+
+        return image
+
+    @staticmethod
+    def prune(paths = None, cache_path = None):
+        """!
+            @fn             prune
+            @brief          Remove decoded images which no longer match any of given images,
+                            whose file has been removed, renamed or modified
+
+            @param[in]      paths               List of paths of images of the datasets
+            @param[in]      cache_path          Directory of decoded images
+            @return         Number of removed entries
+        """
+
+        # Check if there is a cache to prune
+        if not cache_path or not os.path.isdir(cache_path):
+            return 0
+
+        # Get keys of current images, files removed meanwhile have no entry to keep
+        keys = set()
+        for path in paths:
+            try:
+                keys.add(loader.key(path = path) + '.npy')
+            except OSError:
+                pass
+
+        # Remove other entries, and directories left empty
+        removed = 0
+        for directory in os.listdir(cache_path):
+            directory = os.path.join(cache_path, directory)
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.listdir(directory):
+                if entry.endswith('.npy') and entry not in keys:
+                    os.remove(os.path.join(directory, entry))
+                    removed += 1
+            if not os.listdir(directory):
+                os.rmdir(directory)
+
+        return removed
+
+    @staticmethod
+    def stream(paths = None, workers = None, cache_path = None, chunksize = 16):
+        """!
+            @fn             stream
+            @brief          Decode given images across a process pool, yielding them in given order
+
+            @param[in]      paths               List of paths of images
+            @param[in]      workers             Number of processes, None for one per core, 1 to decode in this process
+            @param[in]      cache_path          Directory of decoded images, None to disable cache
+            @param[in]      chunksize           Number of images sent to a process at once
+            @return         Generator of grayscale images
+        """
+
+        decode = functools.partial(loader.decode, cache_path = cache_path)
+
+        # Check if pool is worth starting
+        if workers == 1 or len(paths) <= chunksize:
+            yield from map(decode, paths)
+            return
+
+        # Results are yielded in submission order, whatever the order of completion
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            yield from executor.map(decode, paths, chunksize = chunksize)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       manifest.py
+    @brief      Basic Processing Algorithm to describe trained models
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import hashlib, json, os
+import numpy as np
+
+class manifest(object):
+    """!
+        @class      manifest
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Label manifest creation, writing and reading
+                        - Dataset fingerprinting
+                        - Consistency check between manifest and model
+    """
+
+    # Version of the manifest layout
+    VERSION = 1
+
+    @staticmethod
+    def fingerprint(path = None):
+        """!
+            @fn             fingerprint
+            @brief          Returns fingerprint of a directory from names, sizes and modification times of its files
+
+            @param[in]      path                Path of the directory
+            @return         Hexadecimal digest
+        """
+
+        # Hash file metadata only, images are never decoded
+        digest = hashlib.sha1()
+        for entry in sorted(os.scandir(path), key = lambda entry: entry.name):
+            if entry.is_file():
+                stat = entry.stat()
+                digest.update('{0}\0{1}\0{2}\n'.format(entry.name, stat.st_size, stat.st_mtime_ns).encode())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def digest(people = None):
+        """!
+            @fn             digest
+            @brief          Returns fingerprint of a dataset from fingerprint of every person
+
+            @param[in]      people              List of people descriptions
+            @return         Hexadecimal digest
+        """
+
+        digest = hashlib.sha1()
+        for person in sorted(people, key = lambda person: person['label']):
+            digest.update('{0}\0{1}\n'.format(person['name'], person['fingerprint']).encode())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def build(recognizer = None, names = None, datasets_path = None):
+        """!
+            @fn             build
+            @brief          Returns manifest of given model
+
+            @param[in]      recognizer          LBPH model
+            @param[in]      names               Labels dictionnary
+            @param[in]      datasets_path       Relative of Absolute path to the datasets
+            @return         Manifest as a dictionnary
+        """
+
+        # Count samples of every label
+        labels, counts = np.unique(np.asarray(recognizer.labels), return_counts = True)
+        samples = dict(zip(labels.tolist(), counts.tolist()))
+
+        # Describe every person
+        people = []
+        for label, name in sorted(names.items()):
+            people.append({
+                'label': int(label),
+                'name': name,
+                'samples': samples.get(int(label), 0),
+                'fingerprint': manifest.fingerprint(path = os.path.join(datasets_path, name))
+            })
+
+        return {
+            'version': manifest.VERSION,
+            'model': {
+                'samples': int(len(recognizer.labels)),
+                'radius': int(recognizer.radius),
+                'neighbors': int(recognizer.neighbors),
+                'grid_x': int(recognizer.grid_x),
+                'grid_y': int(recognizer.grid_y)
+            },
+            'dataset': {
+                'path': datasets_path,
+                'fingerprint': manifest.digest(people = people)
+            },
+            'people': people
+        }
+
+    @staticmethod
+    def write(data = None, path = None):
+        """!
+            @fn             write
+            @brief          Save given manifest into a JSON file
+
+            @param[in]      data                Manifest as a dictionnary
+            @param[in]      path                Path of the JSON file
+        """
+
+        # Write into a temporary file and replace existing manifest at once
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f, indent = 4)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def read(path = None):
+        """!
+            @fn             read
+            @brief          Load a manifest from a JSON file
+
+            @param[in]      path                Path of the JSON file
+            @return         Manifest as a dictionnary
+        """
+
+        with open(path) as f:
+            data = json.load(f)
+
+        # Check if manifest has a known version
+        if data.get('version') != manifest.VERSION:
+            raise ValueError('{0} has unsupported version {1}'.format(path, data.get('version')))
+
+        return data
+
+    @staticmethod
+    def check(data = None, recognizer = None):
+        """!
+            @fn             check
+            @brief          Raise ValueError if given manifest does not describe given model
+
+            @param[in]      data                Manifest as a dictionnary
+            @param[in]      recognizer          LBPH model
+        """
+
+        # Check LBPH parameters and number of samples
+        for key, value in (('samples', len(recognizer.labels)),
+                            ('radius', recognizer.radius),
+                            ('neighbors', recognizer.neighbors),
+                            ('grid_x', recognizer.grid_x),
+                            ('grid_y', recognizer.grid_y)):
+            if data['model'][key] != value:
+                raise ValueError('Manifest and model disagree on {0} ({1} != {2})'.format(key, data['model'][key], value))
+
+        # Check number of samples of every label
+        labels, counts = np.unique(np.asarray(recognizer.labels), return_counts = True)
+        expected = {person['label']: person['samples'] for person in data['people'] if person['samples']}
+        if expected != dict(zip(labels.tolist(), counts.tolist())):
+            raise ValueError('Manifest and model disagree on samples of each person')
+
+    @staticmethod
+    def names(data = None):
+        """!
+            @fn             names
+            @brief          Returns labels dictionnary of given manifest
+
+            @param[in]      data                Manifest as a dictionnary
+            @return         Labels dictionnary
+        """
+        return {person['label']: person['name'] for person in data['people']}
+
+    @staticmethod
+    def load(path = None, recognizer = None):
+        """!
+            @fn             load
+            @brief          Returns labels dictionnary of the manifest of given model
+
+            @param[in]      path                Path of the JSON file
+            @param[in]      recognizer          LBPH model
+            @return         Labels dictionnary
+        """
+
+        # Read and check manifest against model
+        data = manifest.read(path = path)
+        manifest.check(data = data, recognizer = recognizer)
+
+        return manifest.names(data = data)
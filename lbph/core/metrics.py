@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       metrics.py
+    @brief      Basic Processing Algorithm to measure stages of recognition
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import bisect, json, os, threading, time
+
+class histogram(object):
+    """!
+        @class      histogram
+        @brief      Thread-safe cumulative histogram of observed values
+    """
+
+    # Define upper bounds of latency buckets, in seconds
+    LATENCIES = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(self, buckets = LATENCIES):
+        """!
+            @fn             __init__
+            @brief          Create an empty histogram
+
+            @param[in]      buckets             Sorted upper bounds of buckets, an infinite bucket is implied
+        """
+        self.lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value = None):
+        """!
+            @fn             observe
+            @brief          Record a value
+
+            @param[in]      value               Observed value
+        """
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def snapshot(self):
+        """!
+            @fn             snapshot
+            @brief          Returns dictionnary (count, sum, buckets) of cumulative counts per upper bound
+        """
+        with self.lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+                cumulative += count
+                buckets['+Inf' if bound == float('inf') else repr(bound)] = cumulative
+            return {'count': self.count, 'sum': self.total, 'buckets': buckets}
+
+class metrics(object):
+    """!
+        @class      metrics
+        @brief      Process wide latency histograms and counters of recognition stages,
+                    exported as Prometheus text or JSON. Measures are off unless enabled,
+                    a disabled measure costs a single attribute check.
+
+                    Stages are measured with :
+                        start = metrics.start()
+                        ...
+                        metrics.stop('stage', start)
+    """
+
+    # Define whether stages are measured
+    enabled = False
+
+    # Define names of measured stages and counters
+    STAGES = ('capture', 'convert', 'motion', 'detect_front', 'detect_profile', 'predict', 'draw', 'display')
+    COUNTERS = ('frames', 'faces', 'profile_fallbacks', 'unknowns', 'idle_frames', 'partial_scans', 'full_scans')
+
+    # Define upper bounds of faces per frame buckets
+    FACES = (0, 1, 2, 3, 5, 10)
+
+    lock = threading.Lock()
+    stages = {}
+    counters = {}
+    faces = None
+    writer = None
+    stopping = threading.Event()
+
+    @staticmethod
+    def reset():
+        """!
+            @fn             reset
+            @brief          Forget every measure
+        """
+        with metrics.lock:
+            metrics.stages = {stage: histogram() for stage in metrics.STAGES}
+            metrics.counters = {counter: 0 for counter in metrics.COUNTERS}
+            metrics.faces = histogram(buckets = metrics.FACES)
+
+    @staticmethod
+    def enable(path = None, interval = 5.0):
+        """!
+            @fn             enable
+            @brief          Start measuring, and writing snapshots into given file periodically
+
+            @param[in]      path                Path of the snapshot, JSON if it ends with .json,
+                                                Prometheus text otherwise, None to write no snapshot
+            @param[in]      interval            Time in seconds between two snapshots
+        """
+        metrics.reset()
+        metrics.enabled = True
+        if path is not None:
+            metrics.stopping.clear()
+            metrics.writer = threading.Thread(target = metrics.__write__, args = (path, interval), daemon = True)
+            metrics.writer.start()
+
+    @staticmethod
+    def disable(path = None):
+        """!
+            @fn             disable
+            @brief          Stop measuring, writing a last snapshot into given file
+
+            @param[in]      path                Path of the snapshot, None to write no snapshot
+        """
+        metrics.stopping.set()
+        if metrics.writer is not None:
+            metrics.writer.join()
+            metrics.writer = None
+        if metrics.enabled and path is not None:
+            metrics.write(path = path)
+        metrics.enabled = False
+
+    @staticmethod
+    def start():
+        """!
+            @fn             start
+            @brief          Returns start time of a measure, None when measures are off
+        """
+        return time.perf_counter() if metrics.enabled else None
+
+    @staticmethod
+    def stop(stage = None, start = None):
+        """!
+            @fn             stop
+            @brief          Record the duration of a stage since given start time
+
+            @param[in]      stage               Name of the stage
+            @param[in]      start               Start time, None when measures are off
+        """
+        if metrics.enabled and start is not None:
+            metrics.stages[stage].observe(time.perf_counter() - start)
+
+    @staticmethod
+    def count(counter = None, value = 1):
+        """!
+            @fn             count
+            @brief          Increase a counter
+
+            @param[in]      counter             Name of the counter
+            @param[in]      value               Increment
+        """
+        if metrics.enabled:
+            with metrics.lock:
+                metrics.counters[counter] += value
+
+    @staticmethod
+    def frame(results = None):
+        """!
+            @fn             frame
+            @brief          Record faces of a recognized frame
+
+            @param[in]      results             List of (rectangle, name, distance)
+        """
+        if metrics.enabled:
+            metrics.faces.observe(len(results))
+            with metrics.lock:
+                metrics.counters['frames'] += 1
+                metrics.counters['faces'] += len(results)
+
+    @staticmethod
+    def snapshot():
+        """!
+            @fn             snapshot
+            @brief          Returns dictionnary (stages, counters, faces per frame) of every measure
+        """
+        with metrics.lock:
+            counters = dict(metrics.counters)
+        return {
+            'timestamp': time.time(),
+            'stages': {stage: item.snapshot() for stage, item in metrics.stages.items()},
+            'counters': counters,
+            'faces_per_frame': metrics.faces.snapshot() if metrics.faces else None
+        }
+
+    @staticmethod
+    def prometheus():
+        """!
+            @fn             prometheus
+            @brief          Returns every measure in Prometheus text exposition format
+        """
+        data = metrics.snapshot()
+        lines = ['# HELP mwoo_stage_seconds Latency of recognition stages', '# TYPE mwoo_stage_seconds histogram']
+        for stage, item in data['stages'].items():
+            lines += ['mwoo_stage_seconds_bucket{{stage="{0}",le="{1}"}} {2}'.format(stage, bound, count) for bound, count in item['buckets'].items()]
+            lines.append('mwoo_stage_seconds_sum{{stage="{0}"}} {1}'.format(stage, item['sum']))
+            lines.append('mwoo_stage_seconds_count{{stage="{0}"}} {1}'.format(stage, item['count']))
+        for counter, value in data['counters'].items():
+            lines += ['# TYPE mwoo_{0}_total counter'.format(counter), 'mwoo_{0}_total {1}'.format(counter, value)]
+        if data['faces_per_frame']:
+            lines += ['# HELP mwoo_faces_per_frame Faces of recognized frames', '# TYPE mwoo_faces_per_frame histogram']
+            lines += ['mwoo_faces_per_frame_bucket{{le="{0}"}} {1}'.format(bound, count) for bound, count in data['faces_per_frame']['buckets'].items()]
+            lines.append('mwoo_faces_per_frame_sum {0}'.format(data['faces_per_frame']['sum']))
+            lines.append('mwoo_faces_per_frame_count {0}'.format(data['faces_per_frame']['count']))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def write(path = None):
+        """!
+            @fn             write
+            @brief          Write a snapshot into given file, replacing the previous one at once
+
+            @param[in]      path                Path of the snapshot, JSON if it ends with .json, Prometheus text otherwise
+        """
+        with open(path + '.tmp', 'w') as f:
+            if path.lower().endswith('.json'):
+                json.dump(metrics.snapshot(), f, indent = 4)
+            else:
+                f.write(metrics.prometheus())
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def __write__(path = None, interval = 5.0):
+        """!
+            @fn             __write__
+            @brief          Write snapshots periodically until measures are disabled
+        """
+        metrics.write(path = path)
+        while not metrics.stopping.wait(interval):
+            metrics.write(path = path)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       motion.py
+    @brief      Basic Processing Algorithm to skip face detection on unchanged frames
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, threading
+import numpy as np
+from lbph.core.metrics import metrics
+from lbph.core.tracking import tracker
+
+class motion(object):
+    """!
+        @class      motion
+        @brief      Gate face detection of a video with a background model of a downsampled
+                    copy of its frames : detection is skipped while the scene is idle, restricted
+                    to changed regions otherwise, and the whole frame is scanned periodically
+    """
+
+    def __init__(self, threshold = 16.0, area = 0.002, scale = 8, rescan = 50, rate = 0.2, full = 0.5):
+        """!
+            @fn             __init__
+            @brief          Create a gate without background
+
+            @param[in]      threshold           Grey level difference with the background, between 0 and 255,
+                                                above which a pixel has changed
+            @param[in]      area                Ratio of changed pixels of the frame below which the scene is idle
+            @param[in]      scale               Downscale factor of the compared copy of frames
+            @param[in]      rescan              Number of frames between two scans of the whole frame
+            @param[in]      rate                Weight of each frame in the background, following slow lighting changes
+                                                within a few frames
+            @param[in]      full                Ratio of the frame covered by changed regions above which
+                                                the whole frame is scanned instead, and ratio of changed pixels
+                                                above which the background starts again
+        """
+        self.threshold = threshold
+        self.area = area
+        self.scale = max(1, int(scale))
+        self.rescan = max(1, rescan)
+        self.rate = rate
+        self.full = full
+        self.lock = threading.Lock()
+        self.background = None
+        self.previous = []
+        self.frames = 0
+        self.idle = 0
+        self.partial = 0
+        self.scans = 0
+
+    @staticmethod
+    def union(regions = None):
+        """!
+            @fn             union
+            @brief          Returns bounding rectangles of overlapping rectangles, so that no pixel is searched twice
+
+            @param[in]      regions             List of rectangles (x, y, w, h)
+            @return         List of rectangles
+        """
+        regions = list(regions)
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(regions)):
+                for j in range(i + 1, len(regions)):
+                    if tracker.iou(regions[i], regions[j]) > 0:
+                        (x, y, w, h), (u, v, s, t) = regions[i], regions[j]
+                        left, top = min(x, u), min(y, v)
+                        regions[i] = (left, top, max(x + w, u + s) - left, max(y + h, v + t) - top)
+                        del regions[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return regions
+
+    def changes(self, gray = None, minW = 0, minH = 0):
+        """!
+            @fn             changes
+            @brief          Compare given frame with the background, then update the background
+
+            @param[in]      gray                Grayscale image
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @return         None if the whole frame must be scanned, otherwise list of changed regions,
+                            padded by a face size and empty when the scene is idle
+        """
+        start = metrics.start()
+        small = cv2.resize(gray, (max(1, gray.shape[1] // self.scale), max(1, gray.shape[0] // self.scale)), interpolation = cv2.INTER_AREA).astype(np.float32)
+
+        with self.lock:
+            # Check if background must be started again, on the first frame or when frame size changes
+            if self.background is None or self.background.shape != small.shape:
+                self.background = small
+                mask = None
+            else:
+                mask = cv2.threshold(cv2.absdiff(small, self.background), self.threshold, 255, cv2.THRESH_BINARY)[1].astype(np.uint8)
+
+                # A change of most of the frame is a lighting change or a camera move, background starts again
+                if cv2.countNonZero(mask) > self.full * mask.size:
+                    self.background = small
+                    mask = None
+                else:
+                    cv2.accumulateWeighted(small, self.background, self.rate)
+            scheduled = not self.frames % self.rescan
+            self.frames += 1
+
+        regions = None
+        if mask is not None and not scheduled:
+            if cv2.countNonZero(mask) < self.area * mask.size:
+                regions = []
+            else:
+                # Close changed pixels are a single region, padded so that a partly moving face is within it
+                _, _, stats, _ = cv2.connectedComponentsWithStats(cv2.dilate(mask, np.ones((3, 3), np.uint8)))
+                dx, dy = int(minW), int(minH)
+                regions = []
+                for x, y, w, h, _ in stats[1:]:
+                    left, top = max(0, x * self.scale - dx), max(0, y * self.scale - dy)
+                    right, bottom = min(gray.shape[1], (x + w) * self.scale + dx), min(gray.shape[0], (y + h) * self.scale + dy)
+                    regions.append((int(left), int(top), int(right - left), int(bottom - top)))
+                regions = motion.union(regions = regions)
+
+                # Scanning the whole frame at once is cheaper than most of it region by region
+                if sum(w * h for _, _, w, h in regions) > self.full * gray.shape[0] * gray.shape[1]:
+                    regions = None
+
+        with self.lock:
+            if regions is None:
+                self.scans += 1
+            elif regions:
+                self.partial += 1
+            else:
+                self.idle += 1
+        metrics.count('full_scans' if regions is None else ('partial_scans' if regions else 'idle_frames'))
+        metrics.stop('motion', start)
+
+        return regions
+
+    def detect(self, gray = None, scan = None, detect = None, minW = 0, minH = 0):
+        """!
+            @fn             detect
+            @brief          Returns faces of given frame, previous faces when the scene is idle,
+                            previous faces out of changed regions and faces found within them otherwise
+
+            @param[in]      gray                Grayscale image
+            @param[in]      scan                Function (gray -> list of rectangles) detecting faces of a whole frame
+            @param[in]      detect              Detection function searching changed regions
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @return         List of rectangles
+        """
+        regions = self.changes(gray = gray, minW = minW, minH = minH)
+
+        # Search outside of the lock, workers detect faces of their own frames concurrently
+        if regions is None:
+            faces = [tuple(int(value) for value in face) for face in scan(gray)]
+        else:
+            faces = []
+            for x, y, w, h in regions:
+                faces += [(int(fx) + x, int(fy) + y, int(fw), int(fh)) for fx, fy, fw, fh in detect(gray[y:y + h, x:x + w], minW, minH)]
+
+        with self.lock:
+            # Faces out of changed regions have not moved
+            if regions is not None:
+                faces = [face for face in self.previous if not any(tracker.iou(face, region) > 0 for region in regions)] + faces
+            self.previous = faces
+
+        return faces
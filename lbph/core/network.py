@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       network.py
+    @brief      Basic Processing Algorithm to read frames of network cameras
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, threading, time
+from lbph.core.pipeline import newest
+
+class reader(object):
+    """!
+        @class      reader
+        @brief      Video capture of a network stream (RTSP, HTTP MJPEG), decoded
+                    by its own thread which reconnects with an exponential backoff
+                    when the stream fails. Reading always returns the newest frame,
+                    frames decoded before being read are counted as dropped.
+    """
+
+    def __init__(self, url = None, timeout = 5.0, backoff = 0.5, limit = 30.0):
+        """!
+            @fn             __init__
+            @brief          Start reading given stream
+
+            @param[in]      url                 URL of the stream
+            @param[in]      timeout             Maximum time in seconds to open the stream or to read a frame
+            @param[in]      backoff             First delay in seconds before reconnecting, doubled after each failure
+            @param[in]      limit               Maximum delay in seconds before reconnecting
+        """
+        self.url = url
+        self.timeout = timeout
+        self.backoff = backoff
+        self.limit = limit
+        self.frames = newest()
+        self.connected = threading.Event()
+        self.running = threading.Event()
+        self.running.set()
+        self.width = 0
+        self.height = 0
+        self.decoded = 0
+        self.reconnects = 0
+        self.thread = threading.Thread(target = self.__decode__, daemon = True)
+        self.thread.start()
+
+    @property
+    def dropped(self):
+        """!
+            @fn             dropped
+            @brief          Returns number of decoded frames replaced before being read
+        """
+        return self.frames.dropped
+
+    def __open__(self):
+        """!
+            @fn             __open__
+            @brief          Returns opened capture of the stream, None if it cannot be opened
+        """
+        cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(1000 * self.timeout),
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(1000 * self.timeout)
+        ])
+        if cap.isOpened():
+            return cap
+        cap.release()
+        return None
+
+    def __decode__(self):
+        """!
+            @fn             __decode__
+            @brief          Decode frames until reader is released, reconnecting when stream fails
+        """
+        delay = self.backoff
+        while self.running.is_set():
+            cap = self.__open__()
+            if cap is not None:
+                while self.running.is_set():
+                    ret, img = cap.read()
+                    if not ret:
+                        break
+
+                    # A frame has been read, next failure is a new one
+                    delay = self.backoff
+                    self.height, self.width = img.shape[:2]
+                    self.connected.set()
+                    self.decoded += 1
+                    self.frames.put(img)
+                cap.release()
+
+            # Wait before reconnecting, longer after each consecutive failure
+            if self.running.is_set():
+                self.connected.clear()
+                time.sleep(delay)
+                delay = min(2 * delay, self.limit)
+                self.reconnects += 1
+
+    def isOpened(self):
+        """!
+            @fn             isOpened
+            @brief          Returns True until reader is released, the stream being reconnected when it fails
+        """
+        return self.running.is_set()
+
+    def read(self):
+        """!
+            @fn             read
+            @brief          Returns newest decoded frame, waiting for a new one
+
+            @return         (True, frame), (False, None) if reader has been released
+        """
+        img = self.frames.get()
+        return img is not None, img
+
+    def get(self, prop = None):
+        """!
+            @fn             get
+            @brief          Returns width or height of frames, waiting for the first frame
+
+            @param[in]      prop                Property identifier, cv2.CAP_PROP_FRAME_WIDTH or cv2.CAP_PROP_FRAME_HEIGHT
+            @return         Value of the property, 0 if unknown
+        """
+        self.connected.wait(self.timeout)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return 0.0
+
+    def set(self, prop = None, value = None):
+        """!
+            @fn             set
+            @brief          Properties of a network stream are chosen by the camera
+
+            @return         False
+        """
+        return False
+
+    def release(self):
+        """!
+            @fn             release
+            @brief          Stop decoding frames
+        """
+        self.running.clear()
+        self.frames.close()
+        self.thread.join(timeout = self.timeout)
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       pipeline.py
+    @brief      Basic Processing Algorithm to run capture, recognition and display concurrently
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import collections, threading, time
+from lbph.core.metrics import metrics
+
+class latency(object):
+    """!
+        @class      latency
+        @brief      Thread-safe latency counter of a stage
+    """
+
+    def __init__(self):
+        """!
+            @fn             __init__
+            @brief          Create an empty counter
+        """
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds = None):
+        """!
+            @fn             add
+            @brief          Record the duration of a single run of the stage
+
+            @param[in]      seconds             Duration in seconds
+        """
+        with self.lock:
+            self.count += 1
+            self.total += seconds
+            self.maximum = max(self.maximum, seconds)
+
+    def mean(self):
+        """!
+            @fn             mean
+            @brief          Returns mean duration in seconds
+        """
+        with self.lock:
+            return self.total / self.count if self.count else 0.0
+
+class newest(object):
+    """!
+        @class      newest
+        @brief      Single slot holding the newest item only, an item being
+                    taken by a single consumer. Items overwritten before being
+                    taken are counted as dropped.
+    """
+
+    def __init__(self):
+        """!
+            @fn             __init__
+            @brief          Create an empty slot
+        """
+        self.condition = threading.Condition()
+        self.item = None
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item = None):
+        """!
+            @fn             put
+            @brief          Replace item of the slot
+
+            @param[in]      item                New item
+        """
+        with self.condition:
+            if self.item is not None:
+                self.dropped += 1
+            self.item = item
+            self.condition.notify()
+
+    def get(self, timeout = None):
+        """!
+            @fn             get
+            @brief          Take item of the slot, waiting for a new one
+
+            @param[in]      timeout             Maximum waiting time in seconds
+            @return         Item, None if slot has been closed or timeout expired
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.item is not None or self.closed, timeout)
+            item, self.item = self.item, None
+            return item
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Wake up every consumer
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class bounded(object):
+    """!
+        @class      bounded
+        @brief      Bounded queue with an explicit policy when it is full :
+                        - 'oldest' drops the oldest queued item
+                        - 'newest' drops the incoming item
+                        - 'block' waits for room
+    """
+
+    # Define available drop policies
+    POLICIES = ('oldest', 'newest', 'block')
+
+    def __init__(self, size = 4, policy = 'oldest'):
+        """!
+            @fn             __init__
+            @brief          Create an empty queue
+
+            @param[in]      size                Maximum number of queued items
+            @param[in]      policy              Drop policy when queue is full
+        """
+        if policy not in bounded.POLICIES:
+            raise ValueError('Unknown drop policy {0}'.format(policy))
+        self.condition = threading.Condition()
+        self.items = collections.deque()
+        self.size = size
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item = None):
+        """!
+            @fn             put
+            @brief          Queue given item, applying drop policy when queue is full
+
+            @param[in]      item                New item
+        """
+        with self.condition:
+            if len(self.items) >= self.size:
+                if self.policy == 'oldest':
+                    self.items.popleft()
+                    self.dropped += 1
+                elif self.policy == 'newest':
+                    self.dropped += 1
+                    return
+                else:
+                    self.condition.wait_for(lambda: len(self.items) < self.size or self.closed)
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self, timeout = None):
+        """!
+            @fn             get
+            @brief          Take oldest queued item
+
+            @param[in]      timeout             Maximum waiting time in seconds
+            @return         Item, None if queue has been closed or timeout expired
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Wake up every producer and consumer
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class pipeline(object):
+    """!
+        @class      pipeline
+        @brief      Staged processing of a video capture :
+                        - a capture thread keeping the newest frame only
+                        - a pool of worker threads processing frames
+                        - an output stage, run by the calling thread
+    """
+
+    def __init__(self, cap = None, factory = None, workers = 2, size = 4, policy = 'oldest'):
+        """!
+            @fn             __init__
+            @brief          Create a pipeline over given video capture
+
+            @param[in]      cap                 Opened video capture
+            @param[in]      factory             Function returning the processing function (frame -> results)
+                                                of a worker, called once by each worker thread
+            @param[in]      workers             Number of worker threads
+            @param[in]      size                Maximum number of processed frames waiting for output
+            @param[in]      policy              Drop policy of processed frames, see bounded
+        """
+        self.cap = cap
+        self.factory = factory
+        self.workers = workers
+        self.frames = newest()
+        self.results = bounded(size = size, policy = policy)
+        self.running = threading.Event()
+        self.stale = 0
+        self.stages = collections.OrderedDict((stage, latency()) for stage in ('capture', 'process', 'output', 'total'))
+
+    def __capture__(self):
+        """!
+            @fn             __capture__
+            @brief          Read frames until pipeline stops or capture ends
+        """
+        index = 0
+        while self.running.is_set():
+            start = time.perf_counter()
+            ret, img = self.cap.read()
+            if not ret:
+                break
+            self.stages['capture'].add(time.perf_counter() - start)
+            metrics.stop('capture', start)
+
+            # Overwrite previous frame if no worker took it
+            self.frames.put((index, start, img))
+            index += 1
+
+        # Stop every stage
+        self.running.clear()
+        self.frames.close()
+
+    def __work__(self):
+        """!
+            @fn             __work__
+            @brief          Process newest frames until pipeline stops
+        """
+        process = self.factory()
+        while self.running.is_set():
+            item = self.frames.get(timeout = 0.1)
+            if item is None:
+                continue
+            index, captured, img = item
+
+            start = time.perf_counter()
+            results = process(img)
+            self.stages['process'].add(time.perf_counter() - start)
+
+            self.results.put((index, captured, img, results))
+
+    def run(self, output = None):
+        """!
+            @fn             run
+            @brief          Start capture and worker threads, then give processed frames
+                            to output, in capture order, until output or capture stops
+
+            @param[in]      output              Function (frame, results) returning False to stop
+        """
+        self.running.set()
+        threads = [threading.Thread(target = self.__capture__, daemon = True)]
+        threads += [threading.Thread(target = self.__work__, daemon = True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        last = -1
+        try:
+            while self.running.is_set() or self.results.items:
+                item = self.results.get(timeout = 0.1)
+                if item is None:
+                    continue
+                index, captured, img, results = item
+
+                # Workers may finish out of order, never go back in time
+                if index < last:
+                    self.stale += 1
+                    continue
+                last = index
+
+                start = time.perf_counter()
+                proceed = output(img, results)
+                self.stages['output'].add(time.perf_counter() - start)
+                self.stages['total'].add(time.perf_counter() - captured)
+                if not proceed:
+                    break
+        finally:
+            # Stop every stage, even when interrupted
+            self.running.clear()
+            self.frames.close()
+            self.results.close()
+            for thread in threads:
+                thread.join(timeout = 1)
+
+    def report(self):
+        """!
+            @fn             report
+            @brief          Returns report lines of stages latencies and dropped frames
+        """
+        lines = ['Stage {0:<8} : {1} Frames, Mean {2:.1f} ms, Max {3:.1f} ms'.format(stage, counter.count, 1000 * counter.mean(), 1000 * counter.maximum)
+                for stage, counter in self.stages.items()]
+        lines.append('Dropped : {0} Captured Frames, {1} Processed Frames, {2} Stale Frames'.format(self.frames.dropped, self.results.dropped, self.stale))
+        return lines
+
+
+class multiplexer(object):
+    """!
+        @class      multiplexer
+        @brief      Staged processing of several video captures :
+                        - a capture thread per source keeping its newest frame only
+                        - a pool of worker threads shared by every source, taking
+                          newest frames of sources in turn
+                        - an output stage, run by the calling thread
+    """
+
+    def __init__(self, caps = None, factory = None, workers = 2, size = 4, policy = 'oldest'):
+        """!
+            @fn             __init__
+            @brief          Create a pipeline over given video captures
+
+            @param[in]      caps                List of opened video captures
+            @param[in]      factory             Function returning the processing function (frame, source -> results)
+                                                of a worker, called once by each worker thread
+            @param[in]      workers             Number of worker threads
+            @param[in]      size                Maximum number of processed frames waiting for output
+            @param[in]      policy              Drop policy of processed frames, see bounded
+        """
+        self.caps = caps
+        self.factory = factory
+        self.workers = workers
+        self.condition = threading.Condition()
+        self.frames = [None] * len(caps)
+        self.live = len(caps)
+        self.turn = 0
+        self.dropped = [0] * len(caps)
+        self.results = bounded(size = size, policy = policy)
+        self.running = threading.Event()
+        self.stale = [0] * len(caps)
+        self.stages = [collections.OrderedDict((stage, latency()) for stage in ('capture', 'process', 'output', 'total')) for _ in caps]
+        self.elapsed = 0.0
+
+    def __capture__(self, source = None):
+        """!
+            @fn             __capture__
+            @brief          Read frames of a source until pipeline stops or its capture ends
+
+            @param[in]      source              Index of the source
+        """
+        index = 0
+        while self.running.is_set():
+            start = time.perf_counter()
+            ret, img = self.caps[source].read()
+            if not ret:
+                break
+            self.stages[source]['capture'].add(time.perf_counter() - start)
+            metrics.stop('capture', start)
+
+            # Overwrite previous frame of the source if no worker took it
+            with self.condition:
+                if self.frames[source] is not None:
+                    self.dropped[source] += 1
+                self.frames[source] = (index, start, img)
+                self.condition.notify()
+            index += 1
+
+        # Stop every stage when every capture ended
+        with self.condition:
+            self.live -= 1
+            if not self.live:
+                self.running.clear()
+            self.condition.notify_all()
+
+    def __take__(self, timeout = None):
+        """!
+            @fn             __take__
+            @brief          Take newest frame of the next source having one, so that
+                            a fast source never starves the others
+
+            @param[in]      timeout             Maximum waiting time in seconds
+            @return         (source, index, time of capture, frame), None if pipeline stopped or timeout expired
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: any(frame is not None for frame in self.frames) or not self.running.is_set(), timeout)
+            for offset in range(len(self.frames)):
+                source = (self.turn + offset) % len(self.frames)
+                if self.frames[source] is not None:
+                    item, self.frames[source] = self.frames[source], None
+                    self.turn = source + 1
+                    return (source,) + item
+            return None
+
+    def __work__(self):
+        """!
+            @fn             __work__
+            @brief          Process newest frames of every source until pipeline stops
+        """
+        process = self.factory()
+        while self.running.is_set():
+            item = self.__take__(timeout = 0.1)
+            if item is None:
+                continue
+            source, index, captured, img = item
+
+            start = time.perf_counter()
+            results = process(img, source)
+            self.stages[source]['process'].add(time.perf_counter() - start)
+
+            self.results.put((source, index, captured, img, results))
+
+    def run(self, output = None):
+        """!
+            @fn             run
+            @brief          Start capture and worker threads, then give processed frames
+                            to output, in capture order of each source, until output or every capture stops
+
+            @param[in]      output              Function (source, frame, results) returning False to stop
+        """
+        self.running.set()
+        threads = [threading.Thread(target = self.__capture__, args = (source,), daemon = True) for source in range(len(self.caps))]
+        threads += [threading.Thread(target = self.__work__, daemon = True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        begin = time.perf_counter()
+        last = [-1] * len(self.caps)
+        try:
+            while self.running.is_set() or self.results.items:
+                item = self.results.get(timeout = 0.1)
+                if item is None:
+                    continue
+                source, index, captured, img, results = item
+
+                # Workers may finish out of order, never go back in time
+                if index < last[source]:
+                    self.stale[source] += 1
+                    continue
+                last[source] = index
+
+                start = time.perf_counter()
+                proceed = output(source, img, results)
+                self.stages[source]['output'].add(time.perf_counter() - start)
+                self.stages[source]['total'].add(time.perf_counter() - captured)
+                if not proceed:
+                    break
+        finally:
+            self.elapsed = time.perf_counter() - begin
+
+            # Stop every stage, even when interrupted
+            self.running.clear()
+            with self.condition:
+                self.condition.notify_all()
+            self.results.close()
+            for thread in threads:
+                thread.join(timeout = 1)
+
+    def fps(self, source = None):
+        """!
+            @fn             fps
+            @brief          Returns number of output frames per second of given source
+
+            @param[in]      source              Index of the source
+        """
+        return self.stages[source]['output'].count / self.elapsed if self.elapsed else 0.0
+
+    def report(self, names = None):
+        """!
+            @fn             report
+            @brief          Returns report lines of frame rate, stages latencies and dropped frames of every source
+
+            @param[in]      names               List of names of sources, None to number them
+        """
+        lines = []
+        for source, stages in enumerate(self.stages):
+            name = names[source] if names else str(source)
+            lines.append('Source {0} : {1:.1f} FPS'.format(name, self.fps(source = source)))
+            lines += ['Source {0} Stage {1:<8} : {2} Frames, Mean {3:.1f} ms, Max {4:.1f} ms'.format(name, stage, counter.count, 1000 * counter.mean(), 1000 * counter.maximum)
+                    for stage, counter in stages.items()]
+            lines.append('Source {0} Dropped : {1} Captured Frames, {2} Stale Frames'.format(name, self.dropped[source], self.stale[source]))
+        lines.append('Dropped : {0} Processed Frames'.format(self.results.dropped))
+        return lines
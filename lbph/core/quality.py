@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       quality.py
+    @brief      Basic Processing Algorithm to hold a frame rate or a CPU budget
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import time
+from lbph.core.detection import detection
+from lbph.core.tracking import tracker
+
+class quality(object):
+    """!
+        @class      quality
+        @brief      Controller of the recognition quality, watching latency of every frame
+                    and processor usage, lowering quality level by level when a frame rate
+                    or a CPU budget is missed and restoring it when there is headroom again
+    """
+
+    # Define quality levels, from full quality : (frame stride, scale factor, min face size factor,
+    # frames between predictions, display delay in milliseconds)
+    LEVELS = (
+        (1, 1.2, 1.0, 1, 10),
+        (1, 1.2, 1.0, 1, 1),
+        (1, 1.3, 1.0, 1, 1),
+        (1, 1.3, 1.5, 2, 1),
+        (2, 1.3, 1.5, 2, 1),
+        (2, 1.4, 2.0, 3, 1),
+        (3, 1.4, 2.0, 4, 1),
+        (4, 1.5, 2.5, 4, 1)
+    )
+
+    def __init__(self, fps = None, cpu = None, window = 30, headroom = 0.7):
+        """!
+            @fn             __init__
+            @brief          Create a controller at full quality
+
+            @param[in]      fps                 Target frame rate, None to ignore latency
+            @param[in]      cpu                 Budget of processor usage in percent of a core, None to ignore usage
+            @param[in]      window              Number of frames measured before each decision
+            @param[in]      headroom            Load ratio of the budget below which quality is restored
+        """
+        self.budget = 1.0 / fps if fps else None
+        self.cpu = cpu
+        self.window = max(1, window)
+        self.headroom = headroom
+        self.hold = self.window
+        self.restored = False
+        self.degradations = 0
+        self.restorations = 0
+        self.previous = []
+        self.predicted = 0
+        self.__measure__()
+        self.__apply__(level = 0)
+
+    def __measure__(self):
+        """!
+            @fn             __measure__
+            @brief          Start a new measure window
+        """
+        self.busy = 0.0
+        self.count = 0
+        self.clock = (time.perf_counter(), time.process_time())
+
+    def __apply__(self, level = 0):
+        """!
+            @fn             __apply__
+            @brief          Switch to given quality level
+
+            @param[in]      level               Index of the quality level
+        """
+        self.level = level
+        self.stride, self.scale, self.size, self.every, self.delay = quality.LEVELS[level]
+
+    def describe(self):
+        """!
+            @fn             describe
+            @brief          Returns description of the current quality level
+        """
+        return "Quality Level {0} : Stride {1}, Scale Factor {2}, Min Size x{3}, Predict Every {4} Frames".format(self.level, self.stride, self.scale, self.size, self.every)
+
+    def observe(self, elapsed = None):
+        """!
+            @fn             observe
+            @brief          Record latency of a frame, and change quality level at the end of a measure window
+
+            @param[in]      elapsed             Time in seconds spent on the frame, capture waits excluded
+            @return         Description of the change, None if quality level is kept
+        """
+        self.busy += elapsed
+        self.count += 1
+        if self.count < self.hold:
+            return None
+
+        # Compare mean latency and processor usage of the window with their budgets
+        now, cpu = time.perf_counter(), time.process_time()
+        latency = self.busy / self.count
+        usage = 100.0 * (cpu - self.clock[1]) / max(now - self.clock[0], 1e-6)
+        load = max(latency / self.budget if self.budget else 0.0, usage / self.cpu if self.cpu else 0.0)
+        self.__measure__()
+
+        if load > 1.0 and self.level + 1 < len(quality.LEVELS):
+            # Wait longer before restoring quality again when the last restoration missed the budget
+            self.hold = min(2 * self.hold, 8 * self.window) if self.restored else self.window
+            self.restored = False
+            self.degradations += 1
+            self.__apply__(level = self.level + 1)
+            change = 'Lowered'
+        elif load < self.headroom and self.level > 0:
+            self.restored = True
+            self.restorations += 1
+            self.__apply__(level = self.level - 1)
+            change = 'Restored'
+        else:
+            # The last restoration, if any, held the budget for a whole window
+            self.restored = False
+            return None
+
+        return "{0} {1} (Latency {2:.1f} ms, CPU {3:.0f}%)".format(change, self.describe(), 1000 * latency, usage)
+
+    def detector(self, detect = None):
+        """!
+            @fn             detector
+            @brief          Returns given detection function, searching coarser scales and larger faces
+                            according to the current quality level
+
+            @param[in]      detect              Detection function
+            @return         Detection function
+        """
+        def adjusted(gray = None, minW = 0, minH = 0, maxW = 0, maxH = 0, minNeighbors = 5, scaleFactor = 1.2):
+            return detect(gray, minW * self.size, minH * self.size, maxW, maxH, minNeighbors, max(scaleFactor, self.scale))
+
+        # Coarse searches need the smallest face of the wrapped detector
+        adjusted.window = getattr(detect, 'window', detection.WINDOW)
+        return adjusted
+
+    def tracked(self, tracks = None, due = None):
+        """!
+            @fn             tracked
+            @brief          Returns tracks whose identity must be predicted, every few frames only
+                            according to the current quality level, tracks never predicted being
+                            predicted at once and other tracks keeping their voted identity in between
+
+            @param[in]      tracks              List of tracks of the frame
+            @param[in]      due                 Function (track -> True if the tracker schedules its prediction)
+            @return         List of tracks
+        """
+        reuse = self.predicted % self.every
+        self.predicted += 1
+
+        # Scheduling of the tracker is asked for every track, as it counts tracked faces
+        return [item for item in tracks if due(item) and (not reuse or item.predicted is None)]
+
+    def identify(self, faces = None, identify = None):
+        """!
+            @fn             identify
+            @brief          Returns identity of every face, predicted every few frames only
+                            according to the current quality level, faces overlapping a face
+                            of the previous frame keeping its identity in between
+
+            @param[in]      faces               List of rectangles of detected faces
+            @param[in]      identify            Function (faces -> list of (rectangle, name, distance))
+            @return         List of (rectangle, name, distance)
+        """
+        reuse = self.predicted % self.every
+        self.predicted += 1
+
+        # Find identities of the previous frame
+        results, pending = {}, []
+        for i, face in enumerate(faces):
+            match = max(self.previous, key = lambda item: tracker.iou(item[0], face), default = None) if reuse else None
+            if match is not None and tracker.iou(match[0], face) >= 0.3:
+                results[i] = (tuple(face),) + tuple(match[1:])
+            else:
+                pending.append(i)
+
+        # Predict new faces at once
+        results.update(zip(pending, identify([faces[i] for i in pending])))
+        self.previous = [results[i] for i in range(len(faces))]
+
+        return self.previous
@@ -52,9 +52,18 @@
                 © 2020 ENSISA (UHA) - All rights reserved.
 """
 
-import cv2, os, time
+import cv2, functools, os, threading, time
 import numpy as np
-from lbph.core.train import training
+from lbph.core.access import argv
+from lbph.core.detection import detection, detector, regions
+from lbph.core.index import index
+from lbph.core.manifest import manifest
+from lbph.core.metrics import metrics
+from lbph.core.network import reader
+from lbph.core.pipeline import multiplexer, pipeline
+from lbph.core.replay import player, recorder
+from lbph.core.shared import processes
+from lbph.core.storage import storage
 
 class recognition(object):
     """!
@@ -64,32 +73,52 @@ class recognition(object):
                         - Face recognition
     """
 
+    # Time of previous displayed frame of every window
+    prev_frame_time = {}
+
     @staticmethod
-    def fromStream(video_source = None):
+    def __load__(backend = 'haar', strategy = 'fallback'):
         """!
-            @fn             fromStream
-            @brief          Perform face recognition process
+            @fn             __load__
+            @brief          Load pre-trained model, labels dictionnary and classifiers
 
-            @param[in]      video_source        Source video file to capture frame by frame 
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @return         recognizer, names, detector
         """
 
-        # Create LBPH face recognizer algorithm
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        # Map pre-trained model
+        recognizer = storage.read(path = 'models/mwoo.bin')
 
-        # Load pre-trained model
-        recognizer.read('models/mwoo.yml')
-        
-        # Load front Haar Classifier
-        front_detector = cv2.CascadeClassifier('res/haarcascade_frontalface_default.xml')
+        # Load labels dictionnary and check it matches the model
+        names = manifest.load(path = 'models/mwoo.json', recognizer = recognizer)
 
-        # Load profile Haar Classifier
-        profile_detector = cv2.CascadeClassifier('res/haarcascade_profileface.xml')
+        # Attach nearest neighbour index, if it follows the model
+        if os.path.isfile('models/mwoo.idx') and not index.load(path = 'models/mwoo.idx', recognizer = recognizer, digest = manifest.read(path = 'models/mwoo.json')['dataset']['fingerprint']):
+            print("[-] The Index Is Out Of Date, Using Exhaustive Search")
 
-        prev_frame_time = 0
-        new_frame_time = 0
+        # Load front and profile classifiers
+        return recognizer, names, detector(backend = backend, strategy = strategy)
+
+    @staticmethod
+    def __capture__(video_source = None, realtime = True):
+        """!
+            @fn             __capture__
+            @brief          Returns capture of a camera device, a reconnecting reader of a network stream,
+                            or a player of a recording
+
+            @param[in]      video_source        Index of a camera device, URL of a network stream or path of a recording
+            @param[in]      realtime            Replay recordings at recorded speed, or as fast as possible
+            @return         Video capture
+        """
 
-        # key in names, start from the second place, leave first empty
-        _, _, names = training.build_labels(datasets_path = 'datasets')
+        # Check if source is an RTSP or HTTP stream
+        if isinstance(video_source, str) and argv.is_remote_device(given_argv = video_source):
+            return reader(url = video_source)
+
+        # Check if source is a recording
+        if isinstance(video_source, str) and video_source.endswith(recorder.EXTENSION):
+            return player(path = video_source, realtime = realtime)
 
         # Create a VideoCapture object
         cap = cv2.VideoCapture(video_source)
@@ -98,154 +127,552 @@ class recognition(object):
         cap.set(3, 640)
         cap.set(4, 480)
 
+        return cap
+
+    @staticmethod
+    def __counters__(cap = None, name = None):
+        """!
+            @fn             __counters__
+            @brief          Display dropped frames and reconnections of a network stream
+
+            @param[in]      cap                 Video capture
+            @param[in]      name                Name of the source
+        """
+        if isinstance(cap, reader):
+            print("[+] Source {0} : {1} Decoded Frames, {2} Dropped Frames, {3} Reconnections".format(name, cap.decoded, cap.dropped, cap.reconnects))
+
+    @staticmethod
+    def __worker__(recognizer = None, names = None, minW = 0, minH = 0, tracker = None, lock = None, gate = None, control = None, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             __worker__
+            @brief          Returns processing function of a worker, with its own classifiers
+
+            @param[in]      recognizer          LBPH model
+            @param[in]      names               Labels dictionnary
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @param[in]      tracker             Face tracker shared by workers, list of trackers of every source,
+                                                or None to detect on every frame
+            @param[in]      lock                Lock serializing access to trackers
+            @param[in]      gate                Motion gate shared by workers, list of motion gates of every source,
+                                                or None to search whole frames
+            @param[in]      control             Quality controller of a single source recognized sequentially, None to keep full quality
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @return         Function (frame, source -> results)
+        """
+
+        # A classifier must not be shared between threads
+        classifiers = detector(backend = backend, strategy = strategy)
+
+        # Search coarser scales and larger faces when quality is lowered
+        if control is not None:
+            classifiers = control.detector(detect = classifiers)
+
+        # Multi-resolution searches follow previous detections of this worker, source by source
+        searched = {}
+
+        def search(gray, source = 0):
+            if not downscale:
+                return classifiers(gray = gray, minW = minW, minH = minH)
+            if source not in searched:
+                searched[source] = regions(downscale = downscale, padding = padding)
+            return searched[source].detect(gray = gray, detect = classifiers, minW = minW, minH = minH)
+
+        def detect(gray, source = 0):
+            # Check if detection is skipped on unchanged frames, and restricted to changed regions
+            watcher = gate[source] if isinstance(gate, list) else gate
+            if watcher is None:
+                return search(gray, source)
+            return watcher.detect(gray = gray, scan = lambda gray: search(gray, source), detect = classifiers, minW = minW, minH = minH)
+
+        def process(img, source = 0):
+            start = metrics.start()
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            metrics.stop('convert', start)
+
+            # Check if faces are tracked between detections
+            follower = tracker[source] if isinstance(tracker, list) else tracker
+            if follower is None and control is not None:
+                return control.identify(faces = detect(gray, source), identify = lambda faces: recognition.__identify__(recognizer = recognizer, names = names, gray = gray, faces = faces))
+            if follower is None:
+                return recognition.__identify__(recognizer = recognizer, names = names, gray = gray, faces = detect(gray, source))
+
+            # Number the frame, then detect without holding the lock shared by workers
+            with lock:
+                sequence, due = follower.begin()
+            faces = detect(gray, source) if due else None
+
+            # Find tracks whose identity must be predicted again, a frame overtaken by a newer one reports tracks as they are
+            with lock:
+                tracks = follower.end(sequence = sequence, gray = gray, faces = faces)
+                if tracks is None:
+                    return [(item.box,) + item.identity() for item in follower.tracks]
+                due = lambda item: follower.due(item = item, gray = gray)
+                pending = control.tracked(tracks = tracks, due = due) if control is not None else [item for item in tracks if due(item)]
+                boxes = [item.box for item in pending]
+
+            # Predict pending tracks at once
+            results = recognition.__identify__(recognizer = recognizer, names = names, gray = gray, faces = boxes)
+
+            # Vote, then report voted identity of every track
+            with lock:
+                for item, (_, name, distance) in zip(pending, results):
+                    follower.predicted(item = item, gray = gray, name = name, distance = distance)
+                return [(item.box,) + item.identity() for item in tracks]
+
+        return process
+
+    @staticmethod
+    def __shared__(downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             __shared__
+            @brief          Returns processing function of a worker process, which maps the model
+                            and its bin-major copy itself, so that both are shared by page cache
+                            instead of being pickled
+
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @return         Function (frame -> results)
+        """
+        recognizer, names, _ = recognition.__load__(backend = backend, strategy = strategy)
+        workers = {}
+
+        def process(img):
+            # Define min window size to be recognized as a face, from the size of frames
+            if not workers:
+                workers[0] = recognition.__worker__(recognizer = recognizer, names = names, minW = 0.1 * img.shape[1], minH = 0.1 * img.shape[0], downscale = downscale, padding = padding, backend = backend, strategy = strategy)
+            return [(tuple(int(value) for value in box), name, distance) for box, name, distance in workers[0](img)]
+
+        return process
+
+    @staticmethod
+    def __search__(gray = None, detector = None, minW = 0, minH = 0, downscale = None, padding = 0.5):
+        """!
+            @fn             __search__
+            @brief          Detect faces of a whole image, at full resolution or at multiple resolutions
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detector            Front and profile classifiers
+            @param[in]      minW                Min window width to be recognized as a face
+            @param[in]      minH                Min window height to be recognized as a face
+            @param[in]      downscale           Downscale factor of the coarse search, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @return         List of rectangles of detected faces
+        """
+
+        # Check if image is searched at full resolution only
+        if not downscale:
+            return detector(gray = gray, minW = minW, minH = minH)
+
+        return detection.multiresolution(gray = gray, detect = detector, downscale = downscale, padding = padding, minW = minW, minH = minH)
+
+    @staticmethod
+    def __predict__(recognizer = None, names = None, crops = None):
+        """!
+            @fn             __predict__
+            @brief          Predict identity of every face crop in a single batch
+
+            @param[in]      recognizer          LBPH model
+            @param[in]      names               Labels dictionnary
+            @param[in]      crops               List of grayscale face images
+            @return         List of (name, distance)
+        """
+
+        # Check if list of crops is empty
+        if not len(crops):
+            return []
+
+        # What you get as "confidence", is actually the opposite - the distance to the closest item in the database.
+        start = metrics.start()
+        ids, distances = recognizer.predict(crops)
+        metrics.stop('predict', start)
+
+        # Check if confidence is less then 100 ==> "0" is perfect match
+        results = [(names[id] if confidence < 100 and id in names else 'unknown', float(confidence)) for id, confidence in zip(ids, distances)]
+        metrics.count('unknowns', sum(name == 'unknown' for name, _ in results))
+
+        return results
+
+    @staticmethod
+    def __identify__(recognizer = None, names = None, gray = None, faces = None):
+        """!
+            @fn             __identify__
+            @brief          Predict identity of every detected face in a single batch
+
+            @param[in]      recognizer          LBPH model
+            @param[in]      names               Labels dictionnary
+            @param[in]      gray                Grayscale image
+            @param[in]      faces               List of rectangles of detected faces
+            @return         List of (rectangle, name, distance)
+        """
+        predictions = recognition.__predict__(recognizer = recognizer, names = names, crops = [gray[y:y + h, x:x + w] for (x, y, w, h) in faces])
+        return [((x, y, w, h), name, distance) for (x, y, w, h), (name, distance) in zip(faces, predictions)]
+
+    @staticmethod
+    def __draw__(img = None, results = None):
+        """!
+            @fn             __draw__
+            @brief          Draw rectangle, name and confidence of every recognized face
+
+            @param[in]      img                 Color image
+            @param[in]      results             List of (rectangle, name, distance)
+        """
+
+        for (x, y, w, h), id, confidence in results:
+            # Draw rectangle around detected face
+            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
+            # Put name and confidence
+            confidence = "  {0}%".format(round(100 - confidence))
+            cv2.putText(img, str(id), (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            cv2.putText(img, str(confidence), (x + 5, y + h - 5), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 1)
+
+    @staticmethod
+    def __show__(img = None, results = None, window = '<-> MWOO <->', delay = 10):
+        """!
+            @fn             __show__
+            @brief          Draw results and frame rate, display the frame and check user interruptions
+
+            @param[in]      img                 Color image
+            @param[in]      results             List of (rectangle, name, distance)
+            @param[in]      window              Name of the window, one per source
+            @param[in]      delay               Time in milliseconds waiting for a key
+            @return         False if user pressed 'ESC', True otherwise
+        """
+
+        # Compute frame rate between two displayed frames of the window
+        new_frame_time = time.time()
+        fps = str(int(1 / max(new_frame_time - recognition.prev_frame_time.get(window, 0), 1e-6)))
+        recognition.prev_frame_time[window] = new_frame_time
+        cv2.putText(img, fps, (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 3, (100, 255, 0), 3, cv2.LINE_AA)
+
+        start = metrics.start()
+        recognition.__draw__(img = img, results = results)
+        metrics.stop('draw', start)
+
+        # Press 'ESC' for exiting video
+        start = metrics.start()
+        cv2.imshow(window, img)
+        proceed = cv2.waitKey(delay) & 0xff != 27
+        metrics.stop('display', start)
+
+        return proceed
+
+    @staticmethod
+    def __output__(display = True, events = None, source = None, window = '<-> MWOO <->', control = None):
+        """!
+            @fn             __output__
+            @brief          Returns output function of recognized frames, writing events and displaying frames
+
+            @param[in]      display             Draw results and display frames in a window
+            @param[in]      events              Sink of recognition events, None to write no event
+            @param[in]      source              Name of the source in events
+            @param[in]      window              Name of the window
+            @param[in]      control             Quality controller shortening waits for a key, None to keep full quality
+            @return         Function (frame, results) returning False if user pressed 'ESC', True otherwise
+        """
+        def output(img, results):
+            metrics.frame(results = results)
+            if events is not None:
+                events.write(source = source, results = results)
+            if display:
+                return recognition.__show__(img = img, results = results, window = window, delay = control.delay if control is not None else 10)
+            return True
+
+        return output
+
+    @staticmethod
+    def fromStream(video_source = None, threaded = False, workers = 2, policy = 'oldest', tracker = None, gate = None, control = None, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback', display = True, events = None, realtime = True):
+        """!
+            @fn             fromStream
+            @brief          Perform face recognition process
+
+            @param[in]      video_source        Source video file to capture frame by frame 
+            @param[in]      threaded            Run capture, recognition and display stages concurrently
+            @param[in]      workers             Number of recognition threads of the staged pipeline
+            @param[in]      policy              Drop policy of recognized frames waiting for display
+            @param[in]      tracker             Face tracker, None to detect faces on every frame
+            @param[in]      gate                Motion gate, None to search whole frames
+            @param[in]      control             Quality controller of sequential recognition, None to keep full quality
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @param[in]      display             Draw results and display frames in a window
+            @param[in]      events              Sink of recognition events, None to write no event
+            @param[in]      realtime            Replay recordings at recorded speed, or as fast as possible
+        """
+
+        # Quality controller measures frames recognized one after the other only
+        if threaded and control is not None:
+            print("[-] The Quality Controller Does Not Run With The Staged Pipeline, Full Quality Is Kept")
+            control = None
+
+        # Load pre-trained model and labels dictionnary, classifiers are loaded by workers
+        recognizer, names, _ = recognition.__load__(backend = backend, strategy = strategy)
+
+        # Create a VideoCapture object, a reader of a network stream or a player of a recording
+        cap = recognition.__capture__(video_source = video_source, realtime = realtime)
+
+        # Write events and display frames, without display, stop with Ctrl+C
+        output = recognition.__output__(display = display, events = events, source = str(video_source), control = control)
+
         # Define min window size to be recognized as a face
         minW = 0.1 * cap.get(3)
         minH = 0.1 * cap.get(4)
 
+        # Tracker is shared by every worker
+        lock = threading.Lock()
+
         # Displaying message
         print("[+] Initiating The Recognition Process ...")
         print("[+] Look At The Camera And Wait ...")
 
-        while True:
-            # Read image
-            ret, img = cap.read()
+        try:
+            if threaded:
+                # Capture, recognize and display in separate stages
+                stream = pipeline(cap = cap,
+                                    factory = lambda: recognition.__worker__(recognizer = recognizer, names = names, minW = minW, minH = minH, tracker = tracker, lock = lock, gate = gate, downscale = downscale, padding = padding, backend = backend, strategy = strategy),
+                                    workers = workers,
+                                    policy = policy)
+                try:
+                    stream.run(output = output)
+                finally:
+                    # Displaying stages latencies
+                    for line in stream.report():
+                        print("[+] " + line)
+            else:
+                process = recognition.__worker__(recognizer = recognizer, names = names, minW = minW, minH = minH, tracker = tracker, lock = lock, gate = gate, control = control, downscale = downscale, padding = padding, backend = backend, strategy = strategy)
+                frames, begin, results = 0, time.perf_counter(), []
+                while True:
+                    # Read image
+                    start = metrics.start()
+                    ret, img = cap.read()
+                    if not ret:
+                        break
+                    metrics.stop('capture', start)
+
+                    # Detect or track faces, predict every face at once, frames skipped by the quality controller keep previous results
+                    busy = time.perf_counter()
+                    if control is None or not frames % control.stride:
+                        results = process(img)
+                    frames += 1
+
+                    # Output results and check user interruptions
+                    if not output(img, results):
+                        break
+
+                    # Adapt quality to the latency of the frame
+                    if control is not None:
+                        change = control.observe(elapsed = time.perf_counter() - busy)
+                        if change is not None:
+                            print("[+] " + change)
+
+                # Displaying throughput, deterministic when a recording is replayed as fast as possible
+                elapsed = time.perf_counter() - begin
+                print("[+] {0} Frames Recognized In {1:.2f} Seconds, {2:.1f} FPS".format(frames, elapsed, frames / elapsed if elapsed else 0.0))
+        except KeyboardInterrupt:
+            print("[+] Interrupted By User")
+
+        # Displaying detections and predictions count
+        if tracker is not None:
+            print("[+] {0} Full Detections For {1} Frames, {2} Stale Frames".format(tracker.detections, tracker.frames, tracker.stale))
+            print("[+] {0} Predictions For {1} Tracked Faces".format(tracker.predictions, tracker.faces))
+
+        # Displaying changes of quality level
+        if control is not None and not threaded:
+            print("[+] Quality Lowered {0} Times And Restored {1} Times, {2}".format(control.degradations, control.restorations, control.describe()))
+
+        # Displaying frames skipped by motion gating
+        if gate is not None:
+            print("[+] {0} Idle Frames, {1} Partial Scans And {2} Full Scans For {3} Frames".format(gate.idle, gate.partial, gate.scans, gate.frames))
+
+        # Displaying dropped frames and reconnections of a network stream
+        recognition.__counters__(cap = cap, name = video_source)
 
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            new_frame_time  = time.time()
-            fps = 1 / (new_frame_time - prev_frame_time)
-            prev_frame_time = new_frame_time
-            fps = int(fps) 
-            fps = str(fps)
-            cv2.putText(img, fps, (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 3, (100, 255, 0), 3, cv2.LINE_AA)
+        # Do a bit of cleanup
+        print("[+] End Of Recognition Process")
+        if events is not None:
+            events.flush()
+        cap.release()
+        if display:
+            cv2.destroyAllWindows()
+
+    @staticmethod
+    def fromProcesses(video_source = None, workers = 2, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback', display = True, events = None, realtime = True):
+        """!
+            @fn             fromProcesses
+            @brief          Perform face recognition process with capture, recognition and display
+                            in separate processes, sharing frames through shared memory
+
+            @param[in]      video_source        Source to capture frame by frame
+            @param[in]      workers             Number of recognition processes
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @param[in]      display             Draw results and display frames in a window
+            @param[in]      events              Sink of recognition events, None to write no event
+            @param[in]      realtime            Replay recordings at recorded speed, or as fast as possible
+        """
 
-            # Detects objects of different sizes in the input image and return as a list of rectangles
-            faces = front_detector.detectMultiScale(
-                gray,
-                scaleFactor = 1.2,
-                minNeighbors = 5,
-                minSize = (int(minW), int(minH))
-            )
-
-            # Check if list of rectangles is empty
-            if not len(faces):
-                faces = profile_detector.detectMultiScale(
-                    gray,
-                    scaleFactor = 1.2,
-                    minNeighbors = 5,
-                    minSize = (int(minW), int(minH))
-                )
-
-            for (x, y, w, h) in faces:
-                # Draw rectangle around detected face
-                cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-                # What you get as "confidence", is actually the opposite - the distance to the closest item in the database.
-                id, confidence = recognizer.predict(gray[y:y + h, x:x + w])
-
-                # Check if confidence is less then 100 ==> "0" is perfect match
-                if (confidence < 100):
-                    id = names[id]
-                    confidence = "  {0}%".format(round(100 - confidence))
-                else:
-                    id = "unknown"
-                    confidence = "  {0}%".format(round(100 - confidence))
-
-                # Put name and confidence
-                cv2.putText(img, str(id), (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                cv2.putText(img, str(confidence), (x + 5, y + h - 5), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 1)
+        # Check that the model can be loaded before starting processes, each of them loads it
+        recognition.__load__(backend = backend, strategy = strategy)
 
-            cv2.imshow('<-> MWOO <->', img)
+        # Displaying message
+        print("[+] Initiating The Recognition Process ...")
+        print("[+] Look At The Camera And Wait ...")
 
-            # Check user interruptions
-            # Press 'ESC' for exiting video
-            k = cv2.waitKey(10) & 0xff
-            if k == 27:
-                break
+        # Capture, recognize and display in separate processes
+        stream = processes(opener = functools.partial(recognition.__capture__, video_source = video_source, realtime = realtime),
+                            factory = functools.partial(recognition.__shared__, downscale = downscale, padding = padding, backend = backend, strategy = strategy),
+                            workers = workers)
+        try:
+            stream.run(output = recognition.__output__(display = display, events = events, source = str(video_source)))
+        except KeyboardInterrupt:
+            print("[+] Interrupted By User")
+
+        # Displaying stages latencies
+        for line in stream.report():
+            print("[+] " + line)
 
         # Do a bit of cleanup
         print("[+] End Of Recognition Process")
-        cap.release()
-        cv2.destroyAllWindows()
+        if events is not None:
+            events.flush()
+        if display:
+            cv2.destroyAllWindows()
 
     @staticmethod
-    def fromImage(image_source = None):
+    def fromDevices(video_sources = None, workers = 2, policy = 'oldest', trackers = None, gates = None, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback', display = True, events = None, realtime = True):
         """!
-            @fn             fromImage
-            @brief          Perform face recognition process
-
-            @param[in]      image_source        Source image file to capture frame by frame 
+            @fn             fromDevices
+            @brief          Perform face recognition process of several sources at once, sharing
+                            a single model between a pool of recognition threads
+
+            @param[in]      video_sources       List of sources to capture frame by frame
+            @param[in]      workers             Number of recognition threads shared by every source
+            @param[in]      policy              Drop policy of recognized frames waiting for display
+            @param[in]      trackers            List of face trackers of every source, None to detect faces on every frame
+            @param[in]      gates               List of motion gates of every source, None to search whole frames
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @param[in]      display             Draw results and display frames in a window per source
+            @param[in]      events              Sink of recognition events, None to write no event
+            @param[in]      realtime            Replay recordings at recorded speed, or as fast as possible
         """
 
-        # Create LBPH face recognizer algorithm
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        # Load pre-trained model and labels dictionnary once, classifiers are loaded by workers
+        recognizer, names, _ = recognition.__load__(backend = backend, strategy = strategy)
 
-        # Load pre-trained model
-        recognizer.read('models/mwoo.yml')
-        
-        # Load front Haar classifier
-        front_detector = cv2.CascadeClassifier('res/haarcascade_frontalface_default.xml')
+        # Create a VideoCapture object, a reader of a network stream or a player of a recording, per source
+        caps = [recognition.__capture__(video_source = video_source, realtime = realtime) for video_source in video_sources]
+
+        # Define min window size to be recognized as a face, in the smallest source
+        minW = 0.1 * min(cap.get(3) for cap in caps)
+        minH = 0.1 * min(cap.get(4) for cap in caps)
 
-        # Load profile Haar Classifier
-        profile_detector = cv2.CascadeClassifier('res/haarcascade_profileface.xml')
+        # Trackers are shared by every worker
+        lock = threading.Lock()
 
-        prev_frame_time = 0
-        new_frame_time = 0
+        # Displaying message
+        print("[+] Initiating The Recognition Process Of {0} Sources ...".format(len(caps)))
+        print("[+] Look At The Cameras And Wait ...")
+
+        # Capture every source, recognize frames in turn, write events and display them in a window per source
+        sources = [str(video_source) for video_source in video_sources]
+        outputs = [recognition.__output__(display = display, events = events, source = source, window = '<-> MWOO <-> ' + source) for source in sources]
+        stream = multiplexer(caps = caps,
+                            factory = lambda: recognition.__worker__(recognizer = recognizer, names = names, minW = minW, minH = minH, tracker = trackers, lock = lock, gate = gates, downscale = downscale, padding = padding, backend = backend, strategy = strategy),
+                            workers = workers,
+                            policy = policy)
+        try:
+            stream.run(output = lambda source, img, results: outputs[source](img, results))
+        except KeyboardInterrupt:
+            print("[+] Interrupted By User")
+
+        # Displaying frame rate and stages latencies of every source
+        for line in stream.report(names = sources):
+            print("[+] " + line)
+        for cap, name in zip(caps, sources):
+            recognition.__counters__(cap = cap, name = name)
+        for gate, name in zip(gates or [], sources):
+            print("[+] Source {0} : {1} Idle Frames, {2} Partial Scans And {3} Full Scans".format(name, gate.idle, gate.partial, gate.scans))
+
+        # Do a bit of cleanup
+        print("[+] End Of Recognition Process")
+        if events is not None:
+            events.flush()
+        for cap in caps:
+            cap.release()
+        if display:
+            cv2.destroyAllWindows()
+
+    @staticmethod
+    def fromImage(image_source = None, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback', display = True, events = None):
+        """!
+            @fn             fromImage
+            @brief          Perform face recognition process
+
+            @param[in]      image_source        Source image file to capture frame by frame 
+            @param[in]      downscale           Downscale factor of the coarse search, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+            @param[in]      display             Draw results and display the image in a window
+            @param[in]      events              Sink of recognition events, None to write no event
+        """
 
-        # key in names, start from the second place, leave first empty
-        _, _, names = training.build_labels(datasets_path = 'datasets')
+        # Load pre-trained model, labels dictionnary and classifiers
+        recognizer, names, classifiers = recognition.__load__(backend = backend, strategy = strategy)
 
         # Read an image with its default color
         img = cv2.imread(image_source)
 
+        # Define min window size to be recognized as a face
+        minW = 0.1 * img.shape[1]
+        minH = 0.1 * img.shape[0]
+
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        new_frame_time  = time.time()
-        fps = 1 / (new_frame_time - prev_frame_time)
-        prev_frame_time = new_frame_time
-        fps = int(fps) 
-        fps = str(fps) 
-        cv2.putText(img, fps, (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 3, (100, 255, 0), 3, cv2.LINE_AA)
 
-        # Detects objects of different sizes in the input image and return as a list of rectangles
-        faces = front_detector.detectMultiScale(
-            gray,
-            scaleFactor = 1.2,
-            minNeighbors = 5,
-            minSize = (int(minW), int(minH))
-        )
-
-        # Check if list of rectangles is empty
-        if not len(faces):
-            faces = profile_detector.detectMultiScale(
-                gray,
-                scaleFactor = 1.2,
-                minNeighbors = 5,
-                minSize = (int(minW), int(minH))
-            )
-
-        for (x, y, w, h) in faces:
-            # Draw rectangle around detected face
-            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        # Detect front and profile faces
+        faces = recognition.__search__(gray = gray, detector = classifiers, minW = minW, minH = minH, downscale = downscale, padding = padding)
+        classifiers.close()
 
-            # What you get as "confidence", is actually the opposite - the distance to the closest item in the database.
-            id, confidence = recognizer.predict(gray[y:y + h, x:x + w])
+        # Predict every detected face at once
+        results = recognition.__identify__(recognizer = recognizer, names = names, gray = gray, faces = faces)
 
-            # Check if confidence is less then 100 ==> "0" is perfect match
-            if (confidence < 100):
-                id = names[id]
-                confidence = "  {0}%".format(round(100 - confidence))
-            else:
-                id = "unknown"
-                confidence = "  {0}%".format(round(100 - confidence))
+        if events is not None:
+            events.write(source = image_source, results = results)
+            events.flush()
 
-            # Put name and confidence
-            cv2.putText(img, str(id), (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            cv2.putText(img, str(confidence), (x + 5, y + h - 5), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 1)
+        if display:
+            prev_frame_time = 0
+            new_frame_time = 0
 
-        cv2.imshow('<-> MWOO <->', img)
+            new_frame_time  = time.time()
+            fps = 1 / (new_frame_time - prev_frame_time)
+            prev_frame_time = new_frame_time
+            fps = int(fps) 
+            fps = str(fps) 
+            cv2.putText(img, fps, (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 3, (100, 255, 0), 3, cv2.LINE_AA)
+
+            # Draw results
+            recognition.__draw__(img = img, results = results)
+
+            cv2.imshow('<-> MWOO <->', img)
         
-        # Check user interruptions
-        cv2.waitKey(0)
+            # Check user interruptions
+            cv2.waitKey(0)
 
         # Do a bit of cleanup
         print("[+] End Of Recognition Process")
-        cv2.destroyAllWindows()
\ No newline at end of file
+        if display:
+            cv2.destroyAllWindows()
\ No newline at end of file
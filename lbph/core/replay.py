@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       replay.py
+    @brief      Basic Processing Algorithm to record and replay frames of a source
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, struct, threading, time
+import numpy as np
+from lbph.core.pipeline import bounded
+
+class recorder(object):
+    """!
+        @class      recorder
+        @brief      Recording of frames and their timestamps into a compact file :
+                    a header (magic, version), then a record per frame (timestamp
+                    in seconds since the first frame, length, lossless PNG image).
+                    Frames are encoded by a writer thread, so that recording
+                    does not slow the capture down : frames of a live source
+                    arriving while the writer queue is full are dropped and
+                    counted, frames of a video file wait for the writer.
+    """
+
+    # Define magic number, version and extension of recordings
+    MAGIC = b'MWOOREC\x00'
+    VERSION = 1
+    EXTENSION = '.mwrec'
+
+    # Define header of a record (timestamp, length)
+    RECORD = struct.Struct('<dI')
+
+    def __init__(self, path = None, compression = 1, size = 64, policy = 'newest'):
+        """!
+            @fn             __init__
+            @brief          Create a recording
+
+            @param[in]      path                Path of the recording
+            @param[in]      compression         PNG compression level, 0 (fastest) to 9 (smallest)
+            @param[in]      size                Maximum number of frames waiting for the writer
+            @param[in]      policy              Drop policy of frames waiting for the writer, see bounded,
+                                                'block' to record every frame of a video file
+        """
+        self.file = open(path, 'wb')
+        self.file.write(recorder.MAGIC + struct.pack('<I', recorder.VERSION))
+        self.compression = compression
+        self.frames = bounded(size = size, policy = policy)
+        self.first = None
+        self.count = 0
+        self.thread = threading.Thread(target = self.__write__, daemon = True)
+        self.thread.start()
+
+    def __write__(self):
+        """!
+            @fn             __write__
+            @brief          Encode and write queued frames until recording is closed
+        """
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            timestamp, img = item
+            _, data = cv2.imencode('.png', img, [cv2.IMWRITE_PNG_COMPRESSION, self.compression])
+            self.file.write(recorder.RECORD.pack(timestamp, len(data)) + data.tobytes())
+            self.count += 1
+
+    def write(self, img = None, timestamp = None):
+        """!
+            @fn             write
+            @brief          Queue a frame for writing
+
+            @param[in]      img                 Frame
+            @param[in]      timestamp           Time of capture in seconds, None for now
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        if self.first is None:
+            self.first = timestamp
+        self.frames.put((timestamp - self.first, img))
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Write queued frames and close the recording
+        """
+        self.frames.close()
+        self.thread.join()
+        self.file.close()
+
+    @staticmethod
+    def make(cap = None, path = None, frames = 0, display = True, policy = 'newest'):
+        """!
+            @fn             make
+            @brief          Record frames of a video capture until it ends, given number of frames
+                            is captured, user presses 'ESC' or Ctrl+C
+
+            @param[in]      cap                 Opened video capture
+            @param[in]      path                Path of the recording
+            @param[in]      frames              Number of frames to capture, 0 for no limit
+            @param[in]      display             Display recorded frames
+            @param[in]      policy              Drop policy of frames waiting for the writer
+            @return         (number of recorded frames, number of frames dropped by a slow writer)
+        """
+        record = recorder(path = path, policy = policy)
+        count = 0
+        try:
+            while not frames or count < frames:
+                ret, img = cap.read()
+                if not ret:
+                    break
+                record.write(img = img)
+                count += 1
+
+                # Press 'ESC' for exiting video
+                if display:
+                    cv2.imshow('<-> MWOO <->', img)
+                    if cv2.waitKey(1) & 0xff == 27:
+                        break
+        except KeyboardInterrupt:
+            print("[+] Interrupted By User")
+        finally:
+            record.close()
+
+        return record.count, record.frames.dropped
+
+class player(object):
+    """!
+        @class      player
+        @brief      Video capture replaying a recording, at recorded speed or as fast as possible
+    """
+
+    def __init__(self, path = None, realtime = True):
+        """!
+            @fn             __init__
+            @brief          Open a recording
+
+            @param[in]      path                Path of the recording
+            @param[in]      realtime            Replay frames at recorded speed, or as fast as they are read
+        """
+        self.file = open(path, 'rb')
+        header = self.file.read(len(recorder.MAGIC) + 4)
+        if header[:len(recorder.MAGIC)] != recorder.MAGIC or struct.unpack('<I', header[len(recorder.MAGIC):])[0] != recorder.VERSION:
+            raise ValueError('Not a recording of this version: {0}'.format(path))
+        self.realtime = realtime
+        self.start = None
+        self.count = 0
+
+        # Read first frame ahead, for its size
+        self.first = self.__next__()
+        self.shape = self.first[1].shape if self.first is not None else (0, 0)
+
+    def __next__(self):
+        """!
+            @fn             __next__
+            @brief          Returns next recorded (timestamp, frame), None at the end of the recording
+        """
+        header = self.file.read(recorder.RECORD.size)
+        if len(header) < recorder.RECORD.size:
+            return None
+        timestamp, length = recorder.RECORD.unpack(header)
+        data = self.file.read(length)
+
+        # Recording may have been interrupted while writing its last frame
+        if len(data) < length:
+            return None
+        return timestamp, cv2.imdecode(np.frombuffer(data, dtype = np.uint8), cv2.IMREAD_UNCHANGED)
+
+    def isOpened(self):
+        """!
+            @fn             isOpened
+            @brief          Returns True if the recording holds a frame and is not closed
+        """
+        return self.shape[0] > 0 and not self.file.closed
+
+    def read(self):
+        """!
+            @fn             read
+            @brief          Returns next recorded frame, waiting for its recorded time when replayed in real time
+
+            @return         (True, frame), (False, None) at the end of the recording
+        """
+        if self.first is not None:
+            item, self.first = self.first, None
+        else:
+            item = self.__next__()
+        if item is None:
+            return False, None
+        timestamp, img = item
+
+        # Wait for recorded time of the frame since the first frame
+        if self.start is None:
+            self.start = time.perf_counter()
+        elif self.realtime:
+            delay = self.start + timestamp - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.count += 1
+        return True, img
+
+    def get(self, prop = None):
+        """!
+            @fn             get
+            @brief          Returns width or height of recorded frames
+
+            @param[in]      prop                Property identifier, cv2.CAP_PROP_FRAME_WIDTH or cv2.CAP_PROP_FRAME_HEIGHT
+            @return         Value of the property, 0 if unknown
+        """
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.shape[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.shape[0])
+        return 0.0
+
+    def set(self, prop = None, value = None):
+        """!
+            @fn             set
+            @brief          Properties of a recording are those of its source
+
+            @return         False
+        """
+        return False
+
+    def release(self):
+        """!
+            @fn             release
+            @brief          Close the recording
+        """
+        self.file.close()
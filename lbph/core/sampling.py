@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       sampling.py
+    @brief      Basic Processing Algorithm to select sharp and distinct face samples
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, json, os
+import numpy as np
+
+class sampling(object):
+    """!
+        @class      sampling
+        @brief      Selection of face samples : blurry faces (low variance of their
+                    Laplacian), small faces and near-duplicates of already kept
+                    samples (close perceptual difference hashes) are rejected, so
+                    that datasets, training and predictions scan useful samples only
+    """
+
+    # Define reasons of rejection
+    REASONS = ('blurry', 'small', 'duplicate')
+
+    def __init__(self, sharpness = 50.0, size = 64, distance = 4):
+        """!
+            @fn             __init__
+            @brief          Create a selection without any kept sample
+
+            @param[in]      sharpness           Minimum variance of the Laplacian of a face, resized to 100 * 100
+            @param[in]      size                Minimum width and height of a face, in pixels
+            @param[in]      distance            Number of different bits of 64 bits hashes at or below which
+                                                a face is a near-duplicate
+        """
+        self.sharpness = sharpness
+        self.size = size
+        self.distance = distance
+        self.hashes = []
+        self.rejected = {reason: 0 for reason in sampling.REASONS}
+
+    @staticmethod
+    def blur(gray = None):
+        """!
+            @fn             blur
+            @brief          Returns sharpness score of a face, the variance of the Laplacian
+                            of the face resized to 100 * 100 pixels, lower being blurrier
+
+            @param[in]      gray                Grayscale face image
+            @return         Variance
+        """
+        return float(cv2.Laplacian(cv2.resize(gray, (100, 100), interpolation = cv2.INTER_AREA), cv2.CV_64F).var())
+
+    @staticmethod
+    def hash(gray = None):
+        """!
+            @fn             hash
+            @brief          Returns 64 bits difference hash of a face, comparing brightness
+                            of neighbouring cells of a 9 * 8 thumbnail
+
+            @param[in]      gray                Grayscale face image
+            @return         Integer
+        """
+        thumbnail = cv2.resize(gray, (9, 8), interpolation = cv2.INTER_AREA)
+        return int(np.packbits((thumbnail[:, 1:] > thumbnail[:, :-1]).flatten()).view('>u8')[0])
+
+    def check(self, gray = None):
+        """!
+            @fn             check
+            @brief          Returns reason of rejection of a face, keeping its hash when it is accepted
+
+            @param[in]      gray                Grayscale face image
+            @return         Reason of rejection, None if the face is kept
+        """
+        if min(gray.shape[:2]) < self.size:
+            reason = 'small'
+        elif sampling.blur(gray = gray) < self.sharpness:
+            reason = 'blurry'
+        else:
+            # Compare with every kept sample, by Hamming distance of hashes
+            code = sampling.hash(gray = gray)
+            if not any(bin(code ^ other).count('1') <= self.distance for other in self.hashes):
+                self.hashes.append(code)
+                return None
+            reason = 'duplicate'
+
+        self.rejected[reason] += 1
+        return reason
+
+    @staticmethod
+    def prune(datasets_path = None, pruned_path = 'pruned', sharpness = 50.0, size = 64, distance = 4):
+        """!
+            @fn             prune
+            @brief          Move rejected samples of every person of the datasets into another directory,
+                            samples being checked in capture order, and add dropped samples to the report
+                            of previous runs
+
+            @param[in]      datasets_path       Relative of Absolute path to the datasets
+            @param[in]      pruned_path         Directory of dropped samples and of the report
+            @param[in]      sharpness           Minimum variance of the Laplacian of a face, resized to 100 * 100
+            @param[in]      size                Minimum width and height of a face, in pixels
+            @param[in]      distance            Number of different bits at or below which a face is a near-duplicate
+            @return         Dictionnary of kept samples count and samples dropped by this run of every person
+        """
+        report = {}
+        for person in sorted(os.listdir(datasets_path)):
+            directory = os.path.join(datasets_path, person)
+            if not os.path.isdir(directory):
+                continue
+
+            # Samples are numbered in capture order
+            selection = sampling(sharpness = sharpness, size = size, distance = distance)
+            report[person] = {'kept': 0, 'dropped': []}
+            for image in sorted(os.listdir(directory), key = lambda name: (0, int(os.path.splitext(name)[0]), name) if os.path.splitext(name)[0].isdigit() else (1, 0, name)):
+                gray = cv2.imread(os.path.join(directory, image), cv2.IMREAD_GRAYSCALE)
+                reason = 'unreadable' if gray is None else selection.check(gray = gray)
+                if reason is None:
+                    report[person]['kept'] += 1
+                    continue
+
+                # A sample dropped by a previous run is never overwritten, the sample is kept instead
+                destination = os.path.join(pruned_path, person, image)
+                if os.path.exists(destination):
+                    print("[-] {0} Already Exists, {1} Is Kept".format(destination, os.path.join(directory, image)))
+                    report[person]['kept'] += 1
+                    continue
+
+                os.makedirs(os.path.join(pruned_path, person), exist_ok = True)
+                os.replace(os.path.join(directory, image), destination)
+                report[person]['dropped'].append({'image': image, 'reason': reason})
+
+        # Merge with the report of previous runs, whose dropped samples are still in pruned_path
+        merged = {}
+        os.makedirs(pruned_path, exist_ok = True)
+        if os.path.isfile(os.path.join(pruned_path, 'report.json')):
+            with open(os.path.join(pruned_path, 'report.json')) as f:
+                merged = json.load(f)
+        for person, item in report.items():
+            merged[person] = {'kept': item['kept'], 'dropped': merged.get(person, {}).get('dropped', []) + item['dropped']}
+
+        # Write the merged report at once, an interrupted write leaves the previous one
+        with open(os.path.join(pruned_path, 'report.json.tmp'), 'w') as f:
+            json.dump(merged, f, indent = 4)
+        os.replace(os.path.join(pruned_path, 'report.json.tmp'), os.path.join(pruned_path, 'report.json'))
+
+        return report
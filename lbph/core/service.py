@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       service.py
+    @brief      Basic Processing Algorithm to serve face recognition over HTTP
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2, json, os, queue, socket, threading, time
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lbph.core.detection import detector
+from lbph.core.metrics import metrics
+from lbph.core.pipeline import latency
+from lbph.core.recognize import recognition
+
+class unix(ThreadingHTTPServer):
+    """!
+        @class      unix
+        @brief      HTTP server listening on a Unix socket
+    """
+
+    # Define family of the listening socket
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        """!
+            @fn             server_bind
+            @brief          Bind the socket, replacing a socket left by a previous run
+        """
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name, self.server_port = 'localhost', 0
+
+    def get_request(self):
+        """!
+            @fn             get_request
+            @brief          Accept a connection, Unix sockets have no client address
+        """
+        connection, _ = self.socket.accept()
+        return connection, ('local', 0)
+
+class service(object):
+    """!
+        @class      service
+        @brief      Resident face recognition service. Submitted images are
+                    coalesced into micro-batches : faces of every image of a batch
+                    are detected by a pool of threads, then predicted at once.
+                        - POST /recognize with an encoded image detects and predicts faces
+                        - POST /predict with an encoded face crop predicts it
+                        - GET /status returns counters of the service
+                        - GET /metrics returns stages measures as Prometheus text, when enabled
+    """
+
+    def __init__(self, size = 16, wait = 0.005, workers = 2, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             __init__
+            @brief          Load pre-trained model and labels dictionnary once, and start batching submissions
+
+            @param[in]      size                Maximum number of images of a batch
+            @param[in]      wait                Maximum time in seconds a batch waits for more images after its first one
+            @param[in]      workers             Number of detection threads
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+        """
+        self.recognizer, self.names, _ = recognition.__load__(backend = backend, strategy = strategy)
+        self.size = max(1, size)
+        self.wait = wait
+        self.downscale = downscale
+        self.padding = padding
+        self.backend = backend
+        self.strategy = strategy
+
+        # A classifier must not be shared between threads, each detection thread loads its own
+        self.local = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers = workers)
+
+        self.submissions = queue.Queue()
+        self.requests = 0
+        self.batches = 0
+        self.latency = latency()
+        self.thread = threading.Thread(target = self.__batch__, daemon = True)
+        self.thread.start()
+
+    def submit(self, gray = None, detect = True):
+        """!
+            @fn             submit
+            @brief          Submit an image to the next batch
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detect              Detect faces of the image, or predict the image as a face crop
+            @return         Future of the list of (rectangle, name, distance)
+        """
+        future = Future()
+        self.submissions.put((gray, detect, future, time.perf_counter()))
+        return future
+
+    def __detect__(self, gray = None, detect = True):
+        """!
+            @fn             __detect__
+            @brief          Returns faces of an image, with the classifiers of the calling thread
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detect              Detect faces of the image, or return the whole image as a face
+            @return         List of rectangles
+        """
+        if not detect:
+            return [(0, 0, gray.shape[1], gray.shape[0])]
+        if not hasattr(self.local, 'detector'):
+            self.local.detector = detector(backend = self.backend, strategy = self.strategy)
+        return recognition.__search__(gray = gray,
+                                        detector = self.local.detector,
+                                        minW = 0.1 * gray.shape[1],
+                                        minH = 0.1 * gray.shape[0],
+                                        downscale = self.downscale,
+                                        padding = self.padding)
+
+    def __batch__(self):
+        """!
+            @fn             __batch__
+            @brief          Collect submissions into batches and process them, forever
+        """
+        while True:
+            # Wait for a first submission, then for more until the batch is full or has waited enough
+            items = [self.submissions.get()]
+            deadline = time.perf_counter() + self.wait
+            while len(items) < self.size:
+                try:
+                    items.append(self.submissions.get(timeout = max(0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    break
+
+            try:
+                # Detect faces of every image concurrently, then predict every face at once
+                faces = list(self.executor.map(self.__detect__, [gray for gray, _, _, _ in items], [detect for _, detect, _, _ in items]))
+                crops = [gray[y:y + h, x:x + w] for (gray, _, _, _), boxes in zip(items, faces) for (x, y, w, h) in boxes]
+                predictions = iter(recognition.__predict__(recognizer = self.recognizer, names = self.names, crops = crops))
+
+                for (_, _, future, submitted), boxes in zip(items, faces):
+                    future.set_result([(tuple(int(value) for value in box),) + next(predictions) for box in boxes])
+                    self.latency.add(time.perf_counter() - submitted)
+            except Exception as err:
+                for _, _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(err)
+
+            self.requests += len(items)
+            self.batches += 1
+
+    def status(self):
+        """!
+            @fn             status
+            @brief          Returns counters of the service
+        """
+        return {
+            'samples': len(self.recognizer.labels),
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean batch': self.requests / self.batches if self.batches else 0.0,
+            'mean latency ms': 1000 * self.latency.mean(),
+            'max latency ms': 1000 * self.latency.maximum
+        }
+
+    def handler(self):
+        """!
+            @fn             handler
+            @brief          Returns HTTP request handler class of the service
+        """
+        owner = self
+
+        class handler(BaseHTTPRequestHandler):
+            # Keep connections of clients alive between requests
+            protocol_version = 'HTTP/1.1'
+
+            def reply(self, code = 200, data = None):
+                body = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/status':
+                    self.reply(data = owner.status())
+                elif self.path == '/metrics' and metrics.enabled:
+                    body = metrics.prometheus().encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.reply(code = 404, data = {'error': 'unknown path'})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path not in ('/recognize', '/predict'):
+                    self.reply(code = 404, data = {'error': 'unknown path'})
+                    return
+
+                # Decode submitted image in grayscale
+                gray = cv2.imdecode(np.frombuffer(body, dtype = np.uint8), cv2.IMREAD_GRAYSCALE) if body else None
+                if gray is None:
+                    self.reply(code = 400, data = {'error': 'unreadable image'})
+                    return
+
+                try:
+                    results = owner.submit(gray = gray, detect = self.path == '/recognize').result()
+                except Exception as err:
+                    self.reply(code = 500, data = {'error': str(err)})
+                    return
+                self.reply(data = {'faces': [{'box': list(box), 'name': name, 'distance': distance} for box, name, distance in results]})
+
+            def log_message(self, format, *args):
+                pass
+
+        return handler
+
+    def serve(self, address = None):
+        """!
+            @fn             serve
+            @brief          Serve requests until interrupted
+
+            @param[in]      address             HOST:PORT to listen on TCP, or path of a Unix socket
+        """
+        host, _, port = address.rpartition(':')
+        if port.isdigit():
+            server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), self.handler())
+        else:
+            server = unix(address, self.handler())
+        server.daemon_threads = True
+
+        # Displaying message
+        print("[+] Serving Face Recognition On {0} ...".format(address))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("[+] Interrupted By User")
+        finally:
+            server.server_close()
+            if server.address_family == socket.AF_UNIX and os.path.exists(address):
+                os.remove(address)
+
+        # Displaying counters
+        for key, value in self.status().items():
+            print("[+] {0} : {1}".format(key.capitalize(), round(value, 3)))
+        print("[+] End Of The Recognition Service")
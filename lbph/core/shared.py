@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       shared.py
+    @brief      Basic Processing Algorithm to run capture, recognition and display in separate processes
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import collections, cv2, multiprocessing, queue, signal, time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from lbph.core.pipeline import latency
+
+class ring(object):
+    """!
+        @class      ring
+        @brief      Preallocated frame slots in shared memory. A slot is owned by
+                    a single process at a time, only its index crosses processes.
+    """
+
+    def __init__(self, slots = 8, shape = None, dtype = 'uint8', name = None):
+        """!
+            @fn             __init__
+            @brief          Create slots, or attach slots created by another process
+
+            @param[in]      slots               Number of slots
+            @param[in]      shape               Shape of a frame
+            @param[in]      dtype               Type of frame values
+            @param[in]      name                Name of existing shared memory, None to create it
+        """
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self.memory = shared_memory.SharedMemory(name = name, create = name is None, size = size)
+        self.owner = name is None
+        self.frames = np.ndarray((slots,) + self.shape, dtype = self.dtype, buffer = self.memory.buf)
+
+    def __getitem__(self, slot = None):
+        """!
+            @fn             __getitem__
+            @brief          Returns frame of given slot, a view on shared memory
+        """
+        return self.frames[slot]
+
+    def close(self):
+        """!
+            @fn             close
+            @brief          Detach slots, and free them if this process created them
+        """
+        del self.frames
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+class processes(object):
+    """!
+        @class      processes
+        @brief      Staged processing of a video source across processes sharing
+                    a ring of frame slots :
+                        - a capture process decoding frames straight into free slots
+                        - worker processes processing frames of their slots in place
+                        - an output stage, run by the calling process, which gives
+                          slots back once frames are output
+                    Frames are neither pickled nor copied, queues carry slot
+                    indices and small results only.
+    """
+
+    def __init__(self, opener = None, factory = None, workers = 2, slots = None):
+        """!
+            @fn             __init__
+            @brief          Create a pipeline over a video source
+
+            @param[in]      opener              Picklable function returning the opened video capture,
+                                                called by the capture process
+            @param[in]      factory             Picklable function returning the processing function
+                                                (frame -> results) of a worker, called by each worker process
+            @param[in]      workers             Number of worker processes
+            @param[in]      slots               Number of frame slots, None for two per worker plus two
+        """
+        self.opener = opener
+        self.factory = factory
+        self.workers = workers
+        self.slots = slots or 2 * workers + 2
+        self.stale = 0
+        self.stages = collections.OrderedDict((stage, latency()) for stage in ('process', 'output', 'total'))
+        self.dropped = None
+        self.failed = 0
+
+    @staticmethod
+    def __capture__(opener = None, control = None, free = None, frames = None, running = None, dropped = None, workers = 2):
+        """!
+            @fn             __capture__
+            @brief          Capture process : decode frames into free slots until pipeline stops or capture ends
+        """
+
+        # Interruptions are handled by the calling process
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        cap = opener()
+        ret, img = cap.read()
+
+        # Slots are created by the calling process, for frames of this size
+        control.put((img.shape, img.dtype.str) if ret else None)
+        name, slots = control.get() if ret else (None, 0)
+
+        if ret:
+            buffer = ring(slots = slots, shape = img.shape, dtype = img.dtype, name = name)
+
+            # First frame gave the size of slots, it is processed too
+            slot = free.get()
+            buffer[slot][...] = img
+            frames.put((slot, 0, time.time()))
+            index = 1
+            while running.is_set():
+                # Keep capturing when every slot is busy, newest frames matter most
+                try:
+                    slot = free.get_nowait()
+                except queue.Empty:
+                    ret, img = cap.read()
+                    if not ret:
+                        break
+                    with dropped.get_lock():
+                        dropped.value += 1
+                    continue
+
+                # Decode straight into the slot, frames of other captures are copied into it
+                if isinstance(cap, cv2.VideoCapture):
+                    ret = cap.read(buffer[slot])[0]
+                else:
+                    ret, img = cap.read()
+                    if ret and img.shape != buffer.shape:
+                        # Frame size changed, the frame does not fit in a slot
+                        free.put(slot)
+                        with dropped.get_lock():
+                            dropped.value += 1
+                        continue
+                    if ret:
+                        buffer[slot][...] = img
+                if not ret:
+                    break
+                frames.put((slot, index, time.time()))
+                index += 1
+            img = None
+            buffer.close()
+
+        # Stop every worker
+        cap.release()
+        for _ in range(workers):
+            frames.put(None)
+
+    @staticmethod
+    def __work__(factory = None, name = None, slots = None, shape = None, dtype = None, frames = None, results = None):
+        """!
+            @fn             __work__
+            @brief          Worker process : process frames of given slots in place until capture ends
+        """
+
+        # Interruptions are handled by the calling process
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        buffer, item = None, None
+        try:
+            process = factory()
+            buffer = ring(slots = slots, shape = shape, dtype = dtype, name = name)
+            while True:
+                item = frames.get()
+                if item is None:
+                    break
+                slot, index, captured = item
+
+                start = time.perf_counter()
+                results.put((slot, index, captured, process(buffer[slot]), time.perf_counter() - start))
+                item = None
+        except Exception as error:
+            print("[-] Worker {0} Failed : {1!r}".format(multiprocessing.current_process().name, error))
+
+            # Give back the slot of the failed frame, without results
+            if item is not None:
+                results.put(item[:3] + (None, 0.0))
+        finally:
+            # Tell output that this worker ended
+            if buffer is not None:
+                buffer.close()
+            results.put(None)
+
+    def run(self, output = None):
+        """!
+            @fn             run
+            @brief          Start capture and worker processes, then give processed frames
+                            to output, in capture order, until output or capture stops
+
+            @param[in]      output              Function (frame, results) returning False to stop
+        """
+        context = multiprocessing.get_context()
+
+        # Child processes share the resource tracker of this process, so that slots are
+        # freed once, by this process, instead of when the first attached process ends
+        resource_tracker.ensure_running()
+        control, free, frames, results = context.Queue(), context.Queue(), context.Queue(), context.Queue()
+        running = context.Event()
+        running.set()
+        self.dropped = context.Value('i', 0)
+
+        # Every slot is free at first
+        for slot in range(self.slots):
+            free.put(slot)
+
+        capture = context.Process(target = processes.__capture__, args = (self.opener, control, free, frames, running, self.dropped, self.workers), daemon = True)
+        capture.start()
+
+        # Create slots for frames of the size of the first frame
+        header = control.get()
+        if header is None:
+            capture.join()
+            return
+        buffer = ring(slots = self.slots, shape = header[0], dtype = header[1])
+        control.put((buffer.memory.name, self.slots))
+
+        children = [context.Process(target = processes.__work__, args = (self.factory, buffer.memory.name, self.slots, header[0], header[1], frames, results), daemon = True) for _ in range(self.workers)]
+        for child in children:
+            child.start()
+
+        last, ended = -1, 0
+        try:
+            while ended < self.workers:
+                try:
+                    item = results.get(timeout = 0.5)
+                except queue.Empty:
+                    # Workers or capture killed without telling it end the run
+                    if not any(child.is_alive() for child in children) or capture.exitcode:
+                        print("[-] Recognition Processes Ended Unexpectedly")
+                        break
+                    continue
+                if item is None:
+                    ended += 1
+                    continue
+                slot, index, captured, found, seconds = item
+
+                # Frame of a failed worker has no results
+                if found is None:
+                    self.failed += 1
+                    free.put(slot)
+                    continue
+                self.stages['process'].add(seconds)
+
+                # Workers may finish out of order, never go back in time
+                if index < last or not running.is_set():
+                    self.stale += index < last
+                    free.put(slot)
+                    continue
+                last = index
+
+                # Output draws into the slot, then gives it back
+                start = time.perf_counter()
+                proceed = output(buffer[slot], found)
+                self.stages['output'].add(time.perf_counter() - start)
+                self.stages['total'].add(time.time() - captured)
+                free.put(slot)
+                if not proceed:
+                    running.clear()
+        finally:
+            # Stop capture, which stops workers, then free slots
+            running.clear()
+            capture.join(timeout = 5)
+            for child in children:
+                child.join(timeout = 5)
+            for child in [capture] + children:
+                if child.is_alive():
+                    child.terminate()
+            buffer.close()
+
+    def report(self):
+        """!
+            @fn             report
+            @brief          Returns report lines of stages latencies and dropped frames
+        """
+        lines = ['Stage {0:<8} : {1} Frames, Mean {2:.1f} ms, Max {3:.1f} ms'.format(stage, counter.count, 1000 * counter.mean(), 1000 * counter.maximum)
+                for stage, counter in self.stages.items()]
+        lines.append('Dropped : {0} Captured Frames, {1} Stale Frames, {2} Failed Frames'.format(self.dropped.value if self.dropped else 0, self.stale, self.failed))
+        return lines
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       storage.py
+    @brief      Basic Processing Algorithm to store LBPH models in a memory-mapped binary format
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import os
+import numpy as np
+from lbph.core.engine import model
+
+class storage(object):
+    """!
+        @class      storage
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Binary model writing
+                        - Memory-mapped model reading
+                        - Conversion from YAML models
+
+                    A binary model is made of a fixed size header followed
+                    by one record (label, histogram) per sample, so that
+                    the gallery is usable as soon as the file is mapped.
+                    A bin-major copy of the gallery, searched exhaustively,
+                    is written next to it and mapped the same way, so that
+                    processes sharing a model share its pages too.
+    """
+
+    # Identify binary models
+    MAGIC = b'MWOOLBPH'
+
+    # Version of the binary layout
+    VERSION = 1
+
+    # Define fixed size header (64 bytes)
+    HEADER = np.dtype([
+        ('magic', 'S8'),
+        ('version', '<u4'),
+        ('radius', '<u4'),
+        ('neighbors', '<u4'),
+        ('grid_x', '<u4'),
+        ('grid_y', '<u4'),
+        ('reserved', '<u4'),
+        ('threshold', '<f8'),
+        ('count', '<u8'),
+        ('padding', 'V16')
+    ])
+
+    # Identify bin-major copies, and the model file they have been made of (64 bytes)
+    COLUMNS = np.dtype([
+        ('magic', 'S8'),
+        ('version', '<u4'),
+        ('bins', '<u4'),
+        ('count', '<u8'),
+        ('size', '<u8'),
+        ('mtime', '<i8'),
+        ('padding', 'V24')
+    ])
+
+    @staticmethod
+    def record(dimension = None):
+        """!
+            @fn             record
+            @brief          Returns data type of a single sample of given histogram dimension
+
+            @param[in]      dimension           Number of bins of a spatial histogram
+            @return         Structured data type (label, histogram)
+        """
+        return np.dtype([('label', '<i4'), ('histogram', '<f4', (dimension,))])
+
+    @staticmethod
+    def header(path = None):
+        """!
+            @fn             header
+            @brief          Returns validated header of given binary model
+
+            @param[in]      path                Path of the binary model
+            @return         Header as a numpy record
+        """
+
+        # Read header only
+        header = np.fromfile(path, dtype = storage.HEADER, count = 1)
+
+        # Check if file is a binary model of a known version
+        if not len(header) or header[0]['magic'] != storage.MAGIC:
+            raise ValueError('{0} is not a binary LBPH model'.format(path))
+        if header[0]['version'] != storage.VERSION:
+            raise ValueError('{0} has unsupported version {1}'.format(path, header[0]['version']))
+
+        return header[0]
+
+    @staticmethod
+    def write(recognizer = None, path = None):
+        """!
+            @fn             write
+            @brief          Save given model into a binary file
+
+            @param[in]      recognizer          LBPH model
+            @param[in]      path                Path of the binary model
+        """
+
+        # Fill header
+        header = np.zeros(1, dtype = storage.HEADER)
+        header['magic'] = storage.MAGIC
+        header['version'] = storage.VERSION
+        header['radius'] = recognizer.radius
+        header['neighbors'] = recognizer.neighbors
+        header['grid_x'] = recognizer.grid_x
+        header['grid_y'] = recognizer.grid_y
+        header['threshold'] = recognizer.threshold
+        header['count'] = len(recognizer.labels)
+
+        # Write into a temporary file and replace existing model at once
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        with open(path + '.tmp', 'wb') as f:
+            header.tofile(f)
+
+            # Fill and write records block by block, so that the gallery is not copied at once
+            records = np.empty(max(1, min(len(recognizer.labels), 4096)), dtype = storage.record(dimension = recognizer.histograms.shape[1]))
+            for start in range(0, len(recognizer.labels), len(records)):
+                block = records[:len(recognizer.labels[start:start + len(records)])]
+                block['label'] = recognizer.labels[start:start + len(block)]
+                block['histogram'] = recognizer.histograms[start:start + len(block)]
+                block.tofile(f)
+        os.replace(path + '.tmp', path)
+        storage.transpose(path = path)
+
+    @staticmethod
+    def read(path = None, mmap = True):
+        """!
+            @fn             read
+            @brief          Load a model from a binary file
+
+            @param[in]      path                Path of the binary model
+            @param[in]      mmap                Map histograms from file instead of loading them in memory
+            @return         LBPH model
+        """
+
+        # Read and check header
+        header = storage.header(path = path)
+        recognizer = model(radius = int(header['radius']),
+                            neighbors = int(header['neighbors']),
+                            grid_x = int(header['grid_x']),
+                            grid_y = int(header['grid_y']),
+                            threshold = float(header['threshold']))
+
+        # Check if file holds every sample, trailing bytes belong to an unfinished append
+        dtype = storage.record(dimension = recognizer.histograms.shape[1])
+        count = int(header['count'])
+        if os.path.getsize(path) < storage.HEADER.itemsize + count * dtype.itemsize:
+            raise ValueError('{0} is truncated or corrupted'.format(path))
+
+        # Check if model is empty
+        if not count:
+            return recognizer
+
+        # Map records, no parsing required
+        if mmap:
+            records = np.memmap(path, dtype = dtype, mode = 'r', offset = storage.HEADER.itemsize, shape = (count,))
+        else:
+            records = np.fromfile(path, dtype = dtype, count = count, offset = storage.HEADER.itemsize)
+
+        recognizer.histograms = records['histogram']
+        recognizer.labels = records['label']
+
+        # Map bin-major copy, if it has been made of this file
+        if mmap:
+            columns = storage.columns(path = path, count = count, bins = recognizer.histograms.shape[1])
+            if columns is not None:
+                recognizer.cache = (recognizer.histograms,) + columns
+
+        return recognizer
+
+    @staticmethod
+    def transposed(path = None):
+        """!
+            @fn             transposed
+            @brief          Returns path of the bin-major copy of given binary model
+
+            @param[in]      path                Path of the binary model
+            @return         Path of the bin-major copy
+        """
+        return os.path.splitext(path)[0] + '.col'
+
+    @staticmethod
+    def transpose(path = None, chunk = 256):
+        """!
+            @fn             transpose
+            @brief          Write bin-major copy of given binary model, bins by bins so that
+                            the gallery is never copied at once
+
+            @param[in]      path                Path of the binary model
+            @param[in]      chunk               Number of bins copied at once
+        """
+        recognizer = storage.read(path = path)
+        count, bins = recognizer.histograms.shape
+
+        # Check if model is empty, there is nothing to search
+        if not count:
+            if os.path.isfile(storage.transposed(path = path)):
+                os.remove(storage.transposed(path = path))
+            return
+
+        # Fill header with identity of the model file
+        header = np.zeros(1, dtype = storage.COLUMNS)
+        header['magic'] = b'MWOOCOLS'
+        header['version'] = storage.VERSION
+        header['bins'] = bins
+        header['count'] = count
+        header['size'] = os.stat(path).st_size
+        header['mtime'] = os.stat(path).st_mtime_ns
+
+        # Write into a temporary file and replace existing copy at once
+        destination = storage.transposed(path = path)
+        with open(destination + '.tmp', 'wb') as f:
+            header.tofile(f)
+            f.truncate(storage.COLUMNS.itemsize + (bins + 1) * count * 4)
+        columns = np.memmap(destination + '.tmp', dtype = np.float32, mode = 'r+', offset = storage.COLUMNS.itemsize, shape = (bins + 1, count))
+        for start in range(0, bins, chunk):
+            columns[start:start + chunk] = recognizer.histograms[:, start:start + chunk].T
+        for start in range(0, count, chunk):
+            columns[bins, start:start + chunk] = recognizer.histograms[start:start + chunk].sum(axis = 1)
+        columns.flush()
+
+        # Release mappings before replacing existing copy
+        del columns, recognizer
+        os.replace(destination + '.tmp', destination)
+
+    @staticmethod
+    def columns(path = None, count = None, bins = None):
+        """!
+            @fn             columns
+            @brief          Map bin-major copy of given binary model, if it has been made of this file
+
+            @param[in]      path                Path of the binary model
+            @param[in]      count               Number of samples of the model
+            @param[in]      bins                Number of bins of a histogram
+            @return         columns (bins * count), totals (count), None if there is no up to date copy
+        """
+        source = storage.transposed(path = path)
+        if not os.path.isfile(source):
+            return None
+
+        # Check if copy has been made of the current model file
+        header = np.fromfile(source, dtype = storage.COLUMNS, count = 1)
+        if (not len(header) or header[0]['magic'] != b'MWOOCOLS' or header[0]['version'] != storage.VERSION
+                or header[0]['bins'] != bins or header[0]['count'] != count
+                or header[0]['size'] != os.stat(path).st_size or header[0]['mtime'] != os.stat(path).st_mtime_ns
+                or os.path.getsize(source) < storage.COLUMNS.itemsize + (bins + 1) * count * 4):
+            return None
+
+        columns = np.memmap(source, dtype = np.float32, mode = 'r', offset = storage.COLUMNS.itemsize, shape = (bins + 1, count))
+        return columns[:bins], columns[bins]
+
+    @staticmethod
+    def append(recognizer = None, path = None):
+        """!
+            @fn             append
+            @brief          Append samples of given model at the end of an existing binary file
+
+            @param[in]      recognizer          LBPH model holding new samples only
+            @param[in]      path                Path of the binary model
+        """
+
+        # Read and check header
+        header = storage.header(path = path)
+        for key in ('radius', 'neighbors', 'grid_x', 'grid_y'):
+            if header[key] != getattr(recognizer, key):
+                raise ValueError('{0} has different {1} ({2} != {3})'.format(path, key, header[key], getattr(recognizer, key)))
+
+        # Fill records
+        dtype = storage.record(dimension = recognizer.histograms.shape[1])
+        records = np.empty(len(recognizer.labels), dtype = dtype)
+        records['label'] = recognizer.labels
+        records['histogram'] = recognizer.histograms
+
+        with open(path, 'r+b') as f:
+            # Drop leftovers of an unfinished append and write new records
+            f.truncate(storage.HEADER.itemsize + int(header['count']) * dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            records.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+            # Commit new records by updating the number of samples
+            header['count'] += len(records)
+            f.seek(0)
+            np.array([header], dtype = storage.HEADER).tofile(f)
+
+        # Make bin-major copy again, appended samples are new columns
+        storage.transpose(path = path)
+
+    @staticmethod
+    def remove(labels = None, path = None, chunk = 1024):
+        """!
+            @fn             remove
+            @brief          Remove every sample of given labels from a binary file
+
+            @param[in]      labels              List of labels to remove
+            @param[in]      path                Path of the binary model
+            @param[in]      chunk               Number of records copied at once
+        """
+
+        # Map existing records
+        recognizer = storage.read(path = path)
+        header = storage.header(path = path)
+        dtype = storage.record(dimension = recognizer.histograms.shape[1])
+
+        # Copy kept records into a temporary file, block by block
+        count = 0
+        with open(path + '.tmp', 'wb') as f:
+            header.tofile(f)
+            for start in range(0, len(recognizer.labels), chunk):
+                records = np.empty(len(recognizer.labels[start:start + chunk]), dtype = dtype)
+                records['label'] = recognizer.labels[start:start + chunk]
+                records['histogram'] = recognizer.histograms[start:start + chunk]
+                records = records[~np.isin(records['label'], labels)]
+                records.tofile(f)
+                count += len(records)
+
+            # Update the number of samples
+            header['count'] = count
+            f.seek(0)
+            np.array([header], dtype = storage.HEADER).tofile(f)
+
+        # Release mapping before replacing existing model
+        del recognizer
+        os.replace(path + '.tmp', path)
+        storage.transpose(path = path)
+
+    @staticmethod
+    def convert(source = None, destination = None):
+        """!
+            @fn             convert
+            @brief          Convert a YAML model written by OpenCV into a binary model
+
+            @param[in]      source              Path of the YAML model
+            @param[in]      destination         Path of the binary model
+            @return         Number of converted samples
+        """
+
+        # Parse YAML model once
+        recognizer = model()
+        recognizer.read(path = source)
+
+        # Save binary model
+        storage.write(recognizer = recognizer, path = destination)
+
+        return len(recognizer.labels)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       tracking.py
+    @brief      Basic Processing Algorithm to track faces between detections
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import cv2
+import numpy as np
+
+class track(object):
+    """!
+        @class      track
+        @brief      Face followed from frame to frame
+    """
+
+    def __init__(self, id = None, box = None, gray = None):
+        """!
+            @fn             __init__
+            @brief          Start a track at a detected face
+
+            @param[in]      id                  Identifier of the track
+            @param[in]      box                 Rectangle (x, y, w, h) of the face
+            @param[in]      gray                Grayscale image where the face has been detected
+        """
+        self.id = id
+        self.age = 0
+        self.score = 1.0
+        self.votes = {}
+        self.distances = {}
+        self.predicted = None
+        self.thumbnail = None
+        self.reset(box = box, gray = gray)
+
+    def reset(self, box = None, gray = None):
+        """!
+            @fn             reset
+            @brief          Move the track to a detected face and take its template again
+
+            @param[in]      box                 Rectangle (x, y, w, h) of the face
+            @param[in]      gray                Grayscale image where the face has been detected
+        """
+        x, y, w, h = [int(value) for value in box]
+        self.box = (x, y, w, h)
+        self.template = gray[y:y + h, x:x + w].copy()
+        self.score = 1.0
+
+    def crop(self, gray = None):
+        """!
+            @fn             crop
+            @brief          Returns small thumbnail of the tracked face, used to detect changes
+
+            @param[in]      gray                Grayscale image
+            @return         Matrix of 16 * 16 values
+        """
+        x, y, w, h = self.box
+        return cv2.resize(gray[y:y + h, x:x + w], (16, 16), interpolation = cv2.INTER_AREA).astype(np.float32)
+
+    def vote(self, name = None, distance = None, decay = 0.9):
+        """!
+            @fn             vote
+            @brief          Add a prediction to the identity votes of the track, older votes fading out
+
+            @param[in]      name                Predicted name
+            @param[in]      distance            Predicted distance, 0 being a perfect match
+            @param[in]      decay               Weight kept by previous votes
+        """
+        for key in self.votes:
+            self.votes[key] *= decay
+
+        # Weight vote by confidence, unknown faces never win
+        if name != 'unknown':
+            self.votes[name] = self.votes.get(name, 0.0) + max(0.0, 100 - distance)
+        self.distances[name] = distance
+
+    def identity(self):
+        """!
+            @fn             identity
+            @brief          Returns name with the highest vote, and its last distance
+        """
+        if not self.votes or max(self.votes.values()) <= 0:
+            return 'unknown', self.distances.get('unknown', float('inf'))
+        name = max(self.votes, key = self.votes.get)
+        return name, self.distances[name]
+
+class tracker(object):
+    """!
+        @class      tracker
+        @brief      Run full detection every few frames only, and follow detected
+                    faces in between by template matching within a region of
+                    interest around their previous position
+    """
+
+    def __init__(self, interval = 5, margin = 0.5, score = 0.6, overlap = 0.3, redetect = True, every = None, change = 12.0, decay = 0.9):
+        """!
+            @fn             __init__
+            @brief          Create a tracker without any track
+
+            @param[in]      interval            Number of frames between two full detections
+            @param[in]      margin              Padding of the searched region, relative to face size
+            @param[in]      score               Minimum normalized correlation of a tracked face
+            @param[in]      overlap             Minimum intersection over union to match a detection with a track
+            @param[in]      redetect            Run full detection as soon as a track is lost
+            @param[in]      every               Number of frames between two predictions of a track,
+                                                None to predict every track on every frame
+            @param[in]      change              Mean absolute difference of thumbnails, between 0 and 255,
+                                                above which a track is predicted again at once
+            @param[in]      decay               Weight kept by previous votes of a track at each prediction
+        """
+        self.interval = max(1, interval)
+        self.margin = margin
+        self.score = score
+        self.overlap = overlap
+        self.redetect = redetect
+        self.tracks = []
+        self.frames = 0
+        self.detections = 0
+        self.predictions = 0
+        self.faces = 0
+        self.next_id = 0
+        self.last = -1
+        self.lost = False
+        self.stale = 0
+        self.every = every
+        self.change = change
+        self.decay = decay
+
+    @staticmethod
+    def iou(a = None, b = None):
+        """!
+            @fn             iou
+            @brief          Returns intersection over union of two rectangles
+
+            @param[in]      a                   Rectangle (x, y, w, h)
+            @param[in]      b                   Rectangle (x, y, w, h)
+            @return         Ratio between 0 and 1
+        """
+        w = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+        h = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+        if w <= 0 or h <= 0:
+            return 0.0
+        return w * h / float(a[2] * a[3] + b[2] * b[3] - w * h)
+
+    def follow(self, item = None, gray = None):
+        """!
+            @fn             follow
+            @brief          Move given track to the best match of its template around its previous position
+
+            @param[in]      item                Track
+            @param[in]      gray                Grayscale image
+            @return         True if track has been found, False if it is lost
+        """
+        x, y, w, h = item.box
+        dx, dy = int(self.margin * w), int(self.margin * h)
+
+        # Define region of interest, clipped to image
+        left, top = max(0, x - dx), max(0, y - dy)
+        right, bottom = min(gray.shape[1], x + w + dx), min(gray.shape[0], y + h + dy)
+        if right - left < w or bottom - top < h:
+            item.score = 0.0
+            return False
+
+        # Find best match within region of interest
+        _, item.score, _, (mx, my) = cv2.minMaxLoc(cv2.matchTemplate(gray[top:bottom, left:right], item.template, cv2.TM_CCOEFF_NORMED))
+        item.box = (left + mx, top + my, w, h)
+
+        return item.score >= self.score
+
+    def match(self, gray = None, faces = None, late = False):
+        """!
+            @fn             match
+            @brief          Match detected faces with existing tracks,
+                            unmatched tracks end and unmatched faces start new tracks
+
+            @param[in]      gray                Grayscale image
+            @param[in]      faces               List of rectangles detected on given image
+            @param[in]      late                Faces have been detected on a frame older than tracks,
+                                                matched and unmatched tracks are kept as they are
+        """
+        self.detections += 1
+        faces = [tuple(int(value) for value in face) for face in faces]
+
+        # Greedy matching, best overlaps first
+        pairs = sorted(((tracker.iou(item.box, face), i, j) for i, item in enumerate(self.tracks) for j, face in enumerate(faces)), reverse = True)
+        matched_tracks, matched_faces, tracks = set(), set(), []
+        for ratio, i, j in pairs:
+            if ratio < self.overlap:
+                break
+            if i in matched_tracks or j in matched_faces:
+                continue
+            matched_tracks.add(i)
+            matched_faces.add(j)
+            if not late:
+                self.tracks[i].reset(box = faces[j], gray = gray)
+                tracks.append(self.tracks[i])
+
+        # Keep tracks followed on newer frames
+        if late:
+            tracks = list(self.tracks)
+
+        # Start new tracks
+        for j, face in enumerate(faces):
+            if j not in matched_faces:
+                tracks.append(track(id = self.next_id, box = face, gray = gray))
+                self.next_id += 1
+
+        self.tracks = tracks
+
+    def begin(self):
+        """!
+            @fn             begin
+            @brief          Number a new frame and tell if full detection must run on it,
+                            every interval frames, or after a track has been lost.
+                            Detection itself runs out of the tracker, so that workers
+                            sharing the tracker only hold its lock to number and apply frames
+
+            @return         (sequence number of the frame, True if full detection is due)
+        """
+        sequence = self.frames
+        self.frames += 1
+        due = not sequence % self.interval or self.lost
+        self.lost = False
+        return sequence, due
+
+    def end(self, sequence = None, gray = None, faces = None):
+        """!
+            @fn             end
+            @brief          Returns tracks of a numbered frame, matching detected faces
+                            with tracks, or following tracks when no detection ran
+
+            @param[in]      sequence            Sequence number of the frame, given by begin
+            @param[in]      gray                Grayscale image
+            @param[in]      faces               List of rectangles detected on given image,
+                                                None if detection was not due
+            @return         List of tracks, None if a newer frame already moved the tracks
+        """
+
+        # Workers may finish out of order, tracks never go back in time, late detections only start new tracks
+        if sequence <= self.last:
+            self.stale += 1
+            if faces is not None:
+                self.match(gray = gray, faces = faces, late = True)
+            return None
+        self.last = sequence
+
+        if faces is not None:
+            self.match(gray = gray, faces = faces)
+        else:
+            # Follow every track, dropping lost ones
+            found = [item for item in self.tracks if self.follow(item = item, gray = gray)]
+            self.lost = self.redetect and len(found) < len(self.tracks)
+            self.tracks = found
+
+        for item in self.tracks:
+            item.age += 1
+
+        return self.tracks
+
+    def update(self, gray = None, detect = None):
+        """!
+            @fn             update
+            @brief          Returns tracks of given frame, running full detection every
+                            interval frames, or on the frame following a lost track
+
+            @param[in]      gray                Grayscale image
+            @param[in]      detect              Function (gray -> list of rectangles)
+            @return         List of tracks
+        """
+        sequence, due = self.begin()
+        return self.end(sequence = sequence, gray = gray, faces = detect(gray) if due else None)
+
+    def due(self, item = None, gray = None):
+        """!
+            @fn             due
+            @brief          Returns True if given track must be predicted on given frame
+
+            @param[in]      item                Track
+            @param[in]      gray                Grayscale image
+            @return         True if prediction is scheduled or face changed, False otherwise
+        """
+        self.faces += 1
+
+        # Check if identity cache is disabled or empty
+        if self.every is None or item.predicted is None:
+            return True
+
+        # Check if prediction is scheduled or face changed significantly
+        if self.frames - item.predicted >= self.every:
+            return True
+        return np.abs(item.crop(gray = gray) - item.thumbnail).mean() > self.change
+
+    def predicted(self, item = None, gray = None, name = None, distance = None):
+        """!
+            @fn             predicted
+            @brief          Record a prediction of given track
+
+            @param[in]      item                Track
+            @param[in]      gray                Grayscale image
+            @param[in]      name                Predicted name
+            @param[in]      distance            Predicted distance
+        """
+        self.predictions += 1
+        item.predicted = self.frames
+        item.thumbnail = item.crop(gray = gray)
+
+        # Check if identity cache is disabled
+        if self.every is None:
+            item.votes, item.distances = {}, {}
+        item.vote(name = name, distance = distance, decay = self.decay)
@@ -52,8 +52,13 @@
                 © 2020 ENSISA (UHA) - All rights reserved.
 """
 
-import cv2, os
+import os
 import numpy as np
+from lbph.core.engine import model
+from lbph.core.index import index
+from lbph.core.loader import loader
+from lbph.core.manifest import manifest
+from lbph.core.storage import storage
 
 class training(object):
     """!
@@ -64,12 +69,73 @@ class training(object):
     """
 
     @staticmethod
-    def build_labels(datasets_path = None):
+    def build_names(datasets_path = None):
+        """!
+            @fn     build_names
+            @brief  Get labels dictionnary without reading any image
+
+             @param[in]      datasets_path        Relative of Absolute path to the datasets
+             @return         dict_labels
+        """
+
+        # Get peoples
+        people = [person for person in sorted(os.listdir(datasets_path)) if os.path.isdir(os.path.join(datasets_path, person))]
+
+        return {i: person for i, person in enumerate(people)}
+
+    @staticmethod
+    def build_paths(datasets_path = None, dict_labels = None):
+        """!
+            @fn     build_paths
+            @brief  Get paths and labels of images, in label order
+
+             @param[in]      datasets_path        Relative of Absolute path to the datasets
+             @param[in]      dict_labels          Labels dictionnary
+             @return         paths, labels
+        """
+
+        # Define images paths
+        paths = []
+
+        # Define face labels
+        labels = []
+
+        for i, person in sorted(dict_labels.items()):
+            for image in sorted(os.listdir(os.path.join(datasets_path, person))):
+                paths.append(os.path.join(datasets_path, person, image))
+                labels.append(i)
+
+        return paths, labels
+
+    @staticmethod
+    def build_stream(datasets_path = None, dict_labels = None, workers = None, cache_path = 'models/cache'):
+        """!
+            @fn     build_stream
+            @brief  Decode images across a process pool, streaming them in label order
+
+             @param[in]      datasets_path        Relative of Absolute path to the datasets
+             @param[in]      dict_labels          Labels dictionnary
+             @param[in]      workers              Number of processes, None for one per core
+             @param[in]      cache_path           Directory of decoded images, None to disable cache
+             @return         Generator of (image, label), unreadable images are skipped
+        """
+
+        # Get images paths
+        paths, labels = training.build_paths(datasets_path = datasets_path, dict_labels = dict_labels)
+
+        for image, label in zip(loader.stream(paths = paths, workers = workers, cache_path = cache_path), labels):
+            if image is not None:
+                yield image, label
+
+    @staticmethod
+    def build_labels(datasets_path = None, workers = None, cache_path = 'models/cache'):
         """!
             @fn     __build_labels__
             @brief  Get images and label data
 
              @param[in]      datasets_path        Relative of Absolute path to the datasets
+             @param[in]      workers              Number of processes, None for one per core
+             @param[in]      cache_path           Directory of decoded images, None to disable cache
              @return         images, labels, dict_labels
         """
 
@@ -79,19 +145,12 @@ class training(object):
         # Define face labels
         labels = []
 
-        # Define labels dictionnary
-        dict_labels = {}
-
         # Get peoples
-        people = [person for person in os.listdir('datasets')]
-
-        for i, person in enumerate(people):
-            # Append person to dictionnay
-            dict_labels[i] = person
+        dict_labels = training.build_names(datasets_path = datasets_path)
 
-            for image in os.listdir('datasets/' + person):
-                images.append(cv2.imread('datasets/' + person + '/' + image, 0))
-                labels.append(i)
+        for image, label in training.build_stream(datasets_path = datasets_path, dict_labels = dict_labels, workers = workers, cache_path = cache_path):
+            images.append(image)
+            labels.append(label)
         
         # Creates numpy array of collected labels
         labels = np.array(labels)
@@ -99,31 +158,196 @@ class training(object):
         return images, labels, dict_labels
  
     @staticmethod
-    def make(datasets_path = None):
+    def update(datasets_path = None):
+        """!
+            @fn     update
+            @brief  Perform incremental training process, only new, changed
+                    or removed people directories are processed
+
+             @param[in]      datasets_path        Relative of Absolute path to the datasets
+        """
+
+        # Check if there is a model to update
+        if not os.path.isfile('models/mwoo.bin') or not os.path.isfile('models/mwoo.json'):
+            return training.make(datasets_path = datasets_path)
+
+        # Displaying message
+        print("[+] Initiating The Incremental Training Process ...")
+
+        # Load manifest of existing model
+        data = manifest.read(path = 'models/mwoo.json')
+        known = {person['name']: person for person in data['people']}
+
+        # Scan people directories, keyed on names, sizes and modification times of their files
+        fingerprints = {person: manifest.fingerprint(path = os.path.join(datasets_path, person))
+                        for person in training.build_names(datasets_path = datasets_path).values()}
+
+        # Find removed or changed people, and new or changed people
+        removed = [person for name, person in known.items() if fingerprints.get(name) != person['fingerprint']]
+        added = [name for name, fingerprint in fingerprints.items() if name not in known or known[name]['fingerprint'] != fingerprint]
+
+        # Check if model is up to date
+        if not removed and not added:
+            print("[+] The Model Is Up To Date")
+            print("[+] End Of The Training Process")
+            return
+
+        # Load index of existing model, if it follows the model
+        indexed = None
+        if os.path.isfile('models/mwoo.idx'):
+            indexed = index()
+            try:
+                indexed.read(path = 'models/mwoo.idx')
+            except ValueError:
+                indexed.digest = None
+            if indexed.digest != data['dataset']['fingerprint'] or len(indexed.cells) != storage.header(path = 'models/mwoo.bin')['count']:
+                print("[-] The Index Is Out Of Date, Build It Again")
+                indexed = None
+
+        # Remove samples of removed or changed people
+        keep = None
+        if removed:
+            keep = ~np.isin(storage.read(path = 'models/mwoo.bin').labels, [person['label'] for person in removed])
+            storage.remove(labels = [person['label'] for person in removed], path = 'models/mwoo.bin')
+            for person in removed:
+                print("[+] Removing {0} ...".format(person['name']))
+                data['people'].remove(person)
+
+        # Create LBPH face recognizer algorithm with parameters of existing model
+        header = storage.header(path = 'models/mwoo.bin')
+        recognizer = model(radius = int(header['radius']),
+                            neighbors = int(header['neighbors']),
+                            grid_x = int(header['grid_x']),
+                            grid_y = int(header['grid_y']),
+                            threshold = float(header['threshold']))
+
+        # Changed people keep their label, new people get unused labels
+        labels = [person['label'] for person in known.values()]
+        next_label = max(labels) + 1 if labels else 0
+
+        for name in added:
+            print("[+] Adding {0} ...".format(name))
+            if name in known:
+                label = known[name]['label']
+            else:
+                label, next_label = next_label, next_label + 1
+
+            # Compute histograms of this person only
+            images = [image for image, _ in training.build_stream(datasets_path = datasets_path, dict_labels = {label: name})]
+            recognizer.update(images, [label] * len(images))
+            data['people'].append({
+                'label': label,
+                'name': name,
+                'samples': len(images),
+                'fingerprint': fingerprints[name]
+            })
+
+        # Append new samples to models/mwoo.bin
+        storage.append(recognizer = recognizer, path = 'models/mwoo.bin')
+
+        # Update manifest into models/mwoo.json
+        data['people'].sort(key = lambda person: person['label'])
+        data['model']['samples'] = int(storage.header(path = 'models/mwoo.bin')['count'])
+        data['dataset']['fingerprint'] = manifest.digest(people = data['people'])
+        manifest.write(data = data, path = 'models/mwoo.json')
+
+        # Follow changes in models/mwoo.idx, without learning cells again
+        if indexed is not None:
+            indexed.update(histograms = recognizer.histograms, keep = keep)
+            indexed.write(path = 'models/mwoo.idx', digest = data['dataset']['fingerprint'])
+
+        # Evict decoded images of removed or changed files
+        loader.prune(paths = training.build_paths(datasets_path = datasets_path, dict_labels = training.build_names(datasets_path = datasets_path))[0], cache_path = 'models/cache')
+
+        # Print the numer of faces trained and end program
+        print("[+] There Are {0} Faces Trained".format(len(data['people'])))
+        print("[+] End Of The Training Process")
+
+    @staticmethod
+    def build_index(report = False):
+        """!
+            @fn     build_index
+            @brief  Build the nearest neighbour index of the model
+
+             @param[in]      report               Print recall and latency against exhaustive search
+        """
+
+        # Displaying message
+        print("[+] Initiating The Indexing Process ...")
+
+        # Map pre-trained model
+        recognizer = storage.read(path = 'models/mwoo.bin')
+
+        # Save the index into models/mwoo.idx
+        indexed = index()
+        indexed.build(histograms = recognizer.histograms)
+        indexed.write(path = 'models/mwoo.idx', digest = manifest.read(path = 'models/mwoo.json')['dataset']['fingerprint'])
+        print("[+] There Are {0} Samples In {1} Cells".format(len(indexed.cells), len(indexed.centroids)))
+
+        # Compare indexed search with exhaustive search
+        if report:
+            for result in index.report(recognizer = recognizer):
+                print("[+] Probes {0:>3} : Recall {1:.3f}, Latency {2:.2f} ms".format(result['probes'] or 'all', result['recall'], result['latency']))
+
+        print("[+] End Of The Indexing Process")
+
+    @staticmethod
+    def make(datasets_path = None, indexed = False):
         """!
             @fn     make
             @brief  Perform training process
 
              @param[in]      datasets_path        Relative of Absolute path to the datasets
+             @param[in]      indexed              Build the nearest neighbour index, which is
+                                                  always built again when it already exists
         """
 
         # Create LBPH face recognizer algorithm
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
-
-        # Load Haar classifier
-        detector = cv2.CascadeClassifier("res/haarcascade_frontalface_default.xml");
+        recognizer = model()
 
        # Displaying message
         print("[+] Initiating The Training Process ...")
         print("[+] It Will Take A Few Seconds. Wait  ...")
 
-        # Get images and labels data
-        faces, ids, _ = training.build_labels(datasets_path = datasets_path)
-        recognizer.train(faces, np.array(ids))
+        # Get labels dictionnary
+        names = training.build_names(datasets_path = datasets_path)
+
+        # Preallocate the gallery for every image, unreadable images are skipped
+        paths = training.build_paths(datasets_path = datasets_path, dict_labels = names)[0]
+        count = len(paths)
+        histograms = np.empty((count, recognizer.histograms.shape[1]), dtype = np.float32)
+        labels = np.empty(count, dtype = np.int32)
+
+        # Get images and labels data, describing faces while remaining images are decoded
+        faces, ids, filled = [], [], 0
+        for image, label in training.build_stream(datasets_path = datasets_path, dict_labels = names):
+            faces.append(image)
+            ids.append(label)
+            if len(faces) == 256:
+                histograms[filled:filled + len(faces)] = recognizer.describe(images = faces)
+                labels[filled:filled + len(faces)] = ids
+                filled += len(faces)
+                faces, ids = [], []
+        histograms[filled:filled + len(faces)] = recognizer.describe(images = faces)
+        labels[filled:filled + len(faces)] = ids
+        filled += len(faces)
 
-        # Save the model into models/mwoo.yml
-        recognizer.write('models/mwoo.yml')
+        # Block histograms are written in place, the gallery is never copied
+        recognizer.histograms, recognizer.labels = histograms[:filled], labels[:filled]
+
+        # Save the model into models/mwoo.bin
+        storage.write(recognizer = recognizer, path = 'models/mwoo.bin')
+
+        # Save its labels and metadata into models/mwoo.json
+        manifest.write(data = manifest.build(recognizer = recognizer, names = names, datasets_path = datasets_path), path = 'models/mwoo.json')
+
+        # Evict decoded images of removed or changed files
+        loader.prune(paths = paths, cache_path = 'models/cache')
 
         # Print the numer of faces trained and end program
-        print("[+] There Are {0} Faces Trained".format(len(np.unique(ids))))
+        print("[+] There Are {0} Faces Trained".format(len(np.unique(recognizer.labels))))
         print("[+] End Of The Training Process")
+
+        # Build the index into models/mwoo.idx
+        if indexed or os.path.isfile('models/mwoo.idx'):
+            training.build_index()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+# Copyright © 2020  Hethsron Jedaël BOUEYA and Yassine BENOMAR
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+"""!
+    @file       video.py
+    @brief      Basic Processing Algorithm to recognize faces of video files
+    @details    
+    
+    @author     BOUEYA Hethsron Jedaël <hethsron-jedael.boueya@uha.fr>
+                BENOMAR Yassine <yassine.benomar@uha.fr>
+    
+    @version    0.0.1
+    @date       October 23th, 2020
+    
+    @note       For this program, we recommand to use the existing virtual
+                environment that allows you to avoid installing Python
+                packages globally which could break system tools or other projects 
+    
+    @pre        Before you can start installing or using packages in the
+                existing virtual environment, you'll need to activate it.
+                Activating this virtual environment will put the virtual
+                environment-specifi python and pip executables into your
+                shell's PATH.
+                    -   On macOS and Linux, run :
+                            source env/bin/activate
+                    -   On Windows, run :
+                            .\env\Scripts\activate
+    @post       If you want to switch projects or otherwise leave this virtual
+                environment, simply run :
+                            deactivate
+    @bug        No known bug to date
+    @warning    Misuse could cause program crash
+    @attention
+    @remark
+    @copyright  GPLv3+ : GNU GPL version 3 or later
+                Licencied Material - Property of Stimul’Activ®
+                © 2020 ENSISA (UHA) - All rights reserved.
+"""
+
+import csv, cv2, json, os
+from multiprocessing import Pool
+from lbph.core.detection import regions
+from lbph.core.recognize import recognition
+
+class video(object):
+    """!
+        @class      video
+        @brief      Define useful static methods which implements various
+                    techniques such as :
+                        - Face recognition of video files split into segments
+                          processed in parallel, each worker seeking to its own start
+                        - Frame stride sampling
+                        - Time ordered JSON Lines or CSV results
+    """
+
+    # Model, labels dictionnary, classifiers and settings of a worker process
+    state = None
+
+    @staticmethod
+    def segments(path = None, count = 1, stride = 1):
+        """!
+            @fn             segments
+            @brief          Returns segments of given video, aligned on sampled frames
+
+            @param[in]      path                Path of the video file
+            @param[in]      count               Number of segments
+            @param[in]      stride              Number of frames between two sampled frames
+            @return         Frames per second, list of (start, stop) frame indices, None stop meaning end of file
+        """
+        cap = cv2.VideoCapture(path)
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        cap.release()
+
+        # Check if frame count is unknown, the file is then read at once
+        if frames <= 0:
+            return fps, [(0, None)]
+
+        # Segments hold a whole number of strides, so that every worker samples the same frames as a single reader
+        length = -(-frames // max(1, count * stride)) * stride
+        return fps, [(start, min(start + length, frames)) for start in range(0, frames, length)]
+
+    @staticmethod
+    def __initialize__(downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             __initialize__
+            @brief          Load model, labels dictionnary and classifiers once per worker process
+
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+        """
+        video.state = recognition.__load__(backend = backend, strategy = strategy) + (downscale, padding)
+
+    @staticmethod
+    def __process__(task = None):
+        """!
+            @fn             __process__
+            @brief          Recognize faces of sampled frames of a segment
+
+            @param[in]      task                Tuple (path, fps, start, stop, stride)
+            @return         List of dictionnaries (frame, time, faces) of frames with faces
+        """
+
+        recognizer, names, detector, downscale, padding = video.state
+        path, fps, start, stop, stride = task
+
+        # Seek to the start of the segment
+        cap = cv2.VideoCapture(path)
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        # Multi-resolution searches follow previous detections of the segment
+        searched = regions(downscale = downscale, padding = padding) if downscale else None
+
+        results = []
+        frame = start
+        while stop is None or frame < stop:
+            # Skip frames between sampled frames without decoding them
+            if (frame - start) % stride:
+                if not cap.grab():
+                    break
+                frame += 1
+                continue
+
+            # Read sampled frame
+            ret, img = cap.read()
+            if not ret:
+                break
+
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            minW, minH = 0.1 * gray.shape[1], 0.1 * gray.shape[0]
+            if searched is None:
+                faces = detector(gray = gray, minW = minW, minH = minH)
+            else:
+                faces = searched.detect(gray = gray, detect = detector, minW = minW, minH = minH)
+
+            # Predict every detected face at once
+            faces = recognition.__identify__(recognizer = recognizer, names = names, gray = gray, faces = faces)
+            if faces:
+                results.append({
+                    'frame': frame,
+                    'time': frame / fps,
+                    'faces': [{'box': [int(value) for value in box], 'name': name, 'distance': distance} for box, name, distance in faces]
+                })
+            frame += 1
+
+        cap.release()
+
+        return results
+
+    @staticmethod
+    def make(path = None, output = None, workers = None, stride = 1, downscale = None, padding = 0.5, backend = 'haar', strategy = 'fallback'):
+        """!
+            @fn             make
+            @brief          Recognize faces of a video file split into segments across a process pool
+
+            @param[in]      path                Path of the video file
+            @param[in]      output              Path of the JSON Lines or CSV results
+            @param[in]      workers             Number of processes, None for one per core
+            @param[in]      stride              Number of frames between two sampled frames
+            @param[in]      downscale           Downscale factor of coarse searches, None to search at full resolution only
+            @param[in]      padding             Padding of regions refined at full resolution, relative to face size
+            @param[in]      backend             Name of a detector backend, or paths of front and profile cascades
+            @param[in]      strategy            Way to combine front and profile cascades
+        """
+
+        # Displaying message
+        print("[+] Initiating The Video Recognition Process ...")
+
+        # Several segments per worker balance the load of uneven segments
+        fps, segments = video.segments(path = path, count = 4 * (workers or os.cpu_count() or 1), stride = stride)
+        print("[+] Processing {0} Segments At {1:.2f} Frames Per Second".format(len(segments), fps))
+
+        with Pool(processes = workers, initializer = video.__initialize__, initargs = (downscale, padding, backend, strategy)) as pool:
+            # Check if results are written as CSV
+            is_csv = output.lower().endswith('.csv')
+
+            frames = 0
+            with open(output, 'w', newline = '') as f:
+                if is_csv:
+                    writer = csv.writer(f)
+                    writer.writerow(['frame', 'time', 'x', 'y', 'w', 'h', 'name', 'distance'])
+
+                # Segments are written in time order, as soon as previous segments are done
+                tasks = [(path, fps, start, stop, stride) for start, stop in segments]
+                for number, results in enumerate(pool.imap(video.__process__, tasks), 1):
+                    for result in results:
+                        if is_csv:
+                            for face in result['faces']:
+                                writer.writerow([result['frame'], result['time']] + face['box'] + [face['name'], face['distance']])
+                        else:
+                            f.write(json.dumps(result) + '\n')
+                    frames += len(results)
+
+                    # Displaying progress
+                    f.flush()
+                    print("[+] {0}/{1} Segments Recognized".format(number, len(segments)))
+
+        print("[+] {0} Frames With Faces".format(frames))
+        print("[+] End Of The Video Recognition Process")
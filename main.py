@@ -51,11 +51,27 @@
                 Licencied Material - Property of Stimul’Activ®
                 © 2020 ENSISA (UHA) - All rights reserved.
 """
-import os, sys, glob
+import os, sys, glob, json
+from datetime import datetime
 from art import tprint
+from lbph.core.batch import batch
+from lbph.core.benchmark import benchmark
 from lbph.core.capture import shooting
+from lbph.core.detection import detection, detector
+from lbph.core.events import events
+from lbph.core.journal import journal
 from lbph.core.train import training
 from lbph.core.recognize import recognition
+from lbph.core.replay import recorder
+from lbph.core.sampling import sampling
+from lbph.core.service import service
+from lbph.core.manifest import manifest
+from lbph.core.metrics import metrics
+from lbph.core.motion import motion
+from lbph.core.quality import quality
+from lbph.core.storage import storage
+from lbph.core.tracking import tracker
+from lbph.core.video import video
 from lbph.core.access import argv
 from getopt import getopt, GetoptError
 
@@ -97,22 +113,252 @@ class mwoo(object):
             @brief  Parse and interpret options.
         """
         try:
-            opts, args = getopt(sys.argv[1:], 'chi:trv', [ 'capture', 'help', 'image=', 'train', 'recognize', 'version' ])
+            opts, args = getopt(sys.argv[1:], 'b:chi:o:ptruvw:x', [ 'backend=', 'batch=', 'benchmark=', 'benchmark-detection=', 'capture', 'convert=', 'cpu=', 'downscale=', 'drop=', 'duplicate=', 'events=', 'fps=', 'frames=', 'headless', 'help', 'image=', 'index', 'max-batch=', 'max-wait=', 'metrics=', 'min-face=', 'motion=', 'output=', 'padding=', 'people=', 'pipeline', 'processes', 'prune', 'record=', 'rescan=', 'strategy=', 'stride=', 'track=', 'track-score=', 'train', 'until=', 'recognize', 'samples=', 'serve=', 'sharpness=', 'since=', 'speed=', 'update', 'version', 'video=', 'visits=', 'vote=', 'vote-change=', 'workers=' ])
         except GetoptError as err:
             print(err)
 
             # Unsucessful termination occurs when parsing command-line options
             sys.exit(2)
 
+        # Collect settings first, they apply to commands whatever their position
+        settings = {
+            'backend': 'haar',
+            'cpu': None,
+            'downscale': None,
+            'drop': 'oldest',
+            'duplicate': 4,
+            'events': None,
+            'fps': None,
+            'frames': 0,
+            'headless': False,
+            'max-batch': 16,
+            'max-wait': 5.0,
+            'metrics': None,
+            'min-face': 64,
+            'motion': None,
+            'output': 'results.jsonl',
+            'padding': 0.5,
+            'people': 20,
+            'pipeline': False,
+            'processes': False,
+            'rescan': 50,
+            'samples': 30,
+            'sharpness': 50.0,
+            'since': None,
+            'speed': 'recorded',
+            'strategy': 'fallback',
+            'stride': 1,
+            'track': 0,
+            'track-score': 0.6,
+            'until': None,
+            'vote': None,
+            'vote-change': 12.0,
+            'workers': None
+        }
+
+        for o, a in opts:
+            if o == '--backend':
+                # Check if given argument is a registered backend or a pair of cascades
+                if a in detector.BACKENDS:
+                    settings['backend'] = a
+                elif len(a.split(',')) == 2 and all(os.path.isfile(path) for path in a.split(',')):
+                    settings['backend'] = tuple(a.split(','))
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o in ('--cpu', '--downscale', '--fps', '--motion', '--padding'):
+                # Check if given argument is a valid positive number
+                try:
+                    settings[o[2:]] = float(a)
+                    assert settings[o[2:]] > 0, 'Invalid argument'
+                except ValueError:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--drop':
+                # Check if given argument is a valid drop policy
+                if a in ('oldest', 'newest', 'block'):
+                    settings['drop'] = a
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o in ('--duplicate', '--min-face'):
+                # Check if given argument is a valid non-negative integer
+                if a.isdigit():
+                    settings[o[2:]] = int(a)
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--events':
+                settings['events'] = a
+            elif o == '--headless':
+                settings['headless'] = True
+            elif o == '--max-batch':
+                # Check if given argument is a valid positive integer
+                if a.isdigit() and int(a) > 0:
+                    settings['max-batch'] = int(a)
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--max-wait':
+                # Check if given argument is a valid duration in milliseconds
+                try:
+                    settings['max-wait'] = float(a)
+                    assert settings['max-wait'] >= 0, 'Invalid argument'
+                except ValueError:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--metrics':
+                settings['metrics'] = a
+            elif o == '--sharpness':
+                # Check if given argument is a valid variance
+                try:
+                    settings['sharpness'] = float(a)
+                    assert settings['sharpness'] >= 0, 'Invalid argument'
+                except ValueError:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o in ('-o', '--output'):
+                settings['output'] = a
+            elif o in ('-p', '--pipeline'):
+                settings['pipeline'] = True
+            elif o == '--processes':
+                settings['processes'] = True
+            elif o in ('--since', '--until'):
+                # Check if given argument is a time in seconds since the epoch or an ISO 8601 date
+                try:
+                    settings[o[2:]] = float(a)
+                except ValueError:
+                    try:
+                        settings[o[2:]] = datetime.fromisoformat(a).timestamp()
+                    except ValueError:
+                        # Built-in assert statement to find errors
+                        assert False, 'Invalid argument'
+            elif o == '--speed':
+                # Check if given argument is a valid replay speed
+                if a in ('recorded', 'max'):
+                    settings['speed'] = a
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--strategy':
+                # Check if given argument is a valid strategy
+                if a in detector.STRATEGIES:
+                    settings['strategy'] = a
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o in ('--frames', '--people', '--rescan', '--samples', '--stride', '--track'):
+                # Check if given argument is a valid positive integer
+                if a.isdigit() and int(a) > 0:
+                    settings[o[2:]] = int(a)
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--track-score':
+                # Check if given argument is a valid correlation
+                try:
+                    settings['track-score'] = float(a)
+                except ValueError:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--vote':
+                # Check if given argument is a valid positive integer
+                if a.isdigit() and int(a) > 0:
+                    settings['vote'] = int(a)
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--vote-change':
+                # Check if given argument is a valid mean absolute difference of pixels
+                try:
+                    settings['vote-change'] = float(a)
+                    assert 0 <= settings['vote-change'] <= 255, 'Invalid argument'
+                except ValueError:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o in ('-w', '--workers'):
+                # Check if given argument is a valid positive integer
+                if a.isdigit() and int(a) > 0:
+                    settings['workers'] = int(a)
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+
+        # Recognition events are written without display to standard output by default
+        sink = None
+        if settings['events'] or settings['headless']:
+            if settings['events'] and settings['events'].lower().endswith(journal.EXTENSIONS):
+                sink = journal(path = settings['events'])
+            else:
+                sink = events(output = settings['events'] or '-')
+
+            # Keep standard output for events, messages are displayed on standard error
+            if sink.stream is sys.stdout:
+                sys.stdout = sys.stderr
+
+        # Measure stages only when they are exported
+        if settings['metrics']:
+            metrics.enable(path = settings['metrics'])
+
         for o, a in opts:
-            if o in ('-c', '--capture'):
+            if o in ('-b', '--batch'):
+                # Every remaining argument is a source too
+                batch.make(sources = [a] + args,
+                            output = settings['output'],
+                            workers = settings['workers'],
+                            downscale = settings['downscale'],
+                            padding = settings['padding'],
+                            backend = settings['backend'],
+                            strategy = settings['strategy'])
+            elif o == '--benchmark':
                 # Check if there is no argument
                 if not args:
-                    # Make a shooting of 30 pictures
-                    shooting.make(video_source = 0)
+                    benchmark.make(output = a,
+                                    people = settings['people'],
+                                    samples = settings['samples'],
+                                    backend = settings['backend'],
+                                    strategy = settings['strategy'])
                 else:
                     # Built-in assert statement to find errors
                     assert False, 'The command does not run if the argument is provided'
+            elif o == '--benchmark-detection':
+                # Check if given argument is an existing labeled set
+                if os.path.isfile(a) and not args:
+                    print('[+] Initiating The Detection Benchmark ...')
+                    for report in detection.benchmark(labels = a):
+                        print('[+] {backend}/{strategy} : {images/s:.1f} Images/s, {detections/s:.1f} Detections/s, Recall {recall:.3f}, Precision {precision:.3f}'.format(**report))
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o in ('--backend', '--cpu', '--downscale', '--drop', '--duplicate', '--events', '--fps', '--frames', '--headless', '--max-batch', '--max-wait', '--metrics', '--min-face', '--motion', '-o', '--output', '--padding', '--people', '-p', '--pipeline', '--processes', '--rescan', '--samples', '--sharpness', '--since', '--speed', '--strategy', '--stride', '--track', '--track-score', '--until', '--vote', '--vote-change', '-w', '--workers'):
+                # Settings have already been collected
+                pass
+            elif o in ('-c', '--capture'):
+                # Check if there is no argument, or a single recording
+                if not args or (len(args) == 1 and argv.is_recording(given_argv = args[0])):
+                    # Make a shooting of 30 pictures
+                    shooting.make(video_source = args[0] if args else 0,
+                                    backend = settings['backend'],
+                                    sharpness = settings['sharpness'],
+                                    size = settings['min-face'],
+                                    distance = settings['duplicate'])
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--convert':
+                # Check if given argument is an existing YAML model
+                if os.path.isfile(a) and not args:
+                    print('[+] Converting {0} Into models/mwoo.bin ...'.format(a))
+                    print('[+] There Are {0} Samples Converted'.format(storage.convert(source = a, destination = 'models/mwoo.bin')))
+
+                    # Labels of previous releases follow the datasets listing
+                    manifest.write(data = manifest.build(recognizer = storage.read(path = 'models/mwoo.bin'),
+                                                        names = training.build_names(datasets_path = 'datasets'),
+                                                        datasets_path = 'datasets'),
+                                    path = 'models/mwoo.json')
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
             elif o in ('-h', '--help'):
                 # Check if there is no argument
                 if not args:
@@ -125,10 +371,23 @@ class mwoo(object):
                 # Check if given argument is a valid readable image
                 if argv.is_image(given_argv = a):
                     # Built-in tracking
-                    recognition.fromImage(image_source = a)
+                    recognition.fromImage(image_source = a,
+                                            downscale = settings['downscale'],
+                                            padding = settings['padding'],
+                                            backend = settings['backend'],
+                                            strategy = settings['strategy'],
+                                            display = not settings['headless'],
+                                            events = sink)
                 else:
                     # Built-in assert statement to find errors
                     assert False, 'Invalid argument'
+            elif o in ('-x', '--index'):
+                # Check if there is no argument
+                if not args:
+                    training.build_index(report = True)
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'The command does not run if the argument is provided'
             elif o in ('-t', '--train'):
                 # Check if there is no argument
                 if not args:
@@ -136,13 +395,130 @@ class mwoo(object):
                 else:
                     # Built-in assert statement to find errors
                     assert False, 'The command does not run if the argument is provided'
+            elif o in ('-u', '--update'):
+                # Check if there is no argument
+                if not args:
+                    training.update(datasets_path = 'datasets')
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'The command does not run if the argument is provided'
             elif o in ('-r', '--recognize'):
-                # Check if given argument is a valid integer
+                # Check if given arguments are valid devices or network streams, camera 0 by default
+                if all(argv.is_device(given_argv = arg) or argv.is_remote_device(given_argv = arg) or argv.is_recording(given_argv = arg) for arg in args):
+                    devices = [int(arg[3]) if argv.is_device(given_argv = arg) else arg for arg in args] or [0]
+
+                    # The quality controller only adapts sequential recognition of a single source
+                    if (settings['fps'] or settings['cpu']) and (len(devices) > 1 or settings['pipeline'] or settings['processes']):
+                        # Built-in assert statement to find errors
+                        assert False, 'The --fps and --cpu options do not run with --pipeline, --processes or several sources'
+
+                    if len(devices) == 1 and settings['processes']:
+                        # Capture, recognize and display in separate processes
+                        recognition.fromProcesses(video_source = devices[0],
+                                                workers = settings['workers'] or 2,
+                                                downscale = settings['downscale'],
+                                                padding = settings['padding'],
+                                                backend = settings['backend'],
+                                                strategy = settings['strategy'],
+                                                display = not settings['headless'],
+                                                events = sink,
+                                                realtime = settings['speed'] == 'recorded')
+                    elif len(devices) == 1:
+                        recognition.fromStream(video_source = devices[0],
+                                                threaded = settings['pipeline'],
+                                                workers = settings['workers'] or 2,
+                                                policy = settings['drop'],
+                                                tracker = tracker(interval = settings['track'], score = settings['track-score'], every = settings['vote'], change = settings['vote-change']) if settings['track'] else None,
+                                                gate = motion(threshold = settings['motion'], rescan = settings['rescan']) if settings['motion'] else None,
+                                                control = quality(fps = settings['fps'], cpu = settings['cpu']) if settings['fps'] or settings['cpu'] else None,
+                                                downscale = settings['downscale'],
+                                                padding = settings['padding'],
+                                                backend = settings['backend'],
+                                                strategy = settings['strategy'],
+                                                display = not settings['headless'],
+                                                events = sink,
+                                                realtime = settings['speed'] == 'recorded')
+                    else:
+                        # Every device is recognized by the same process
+                        recognition.fromDevices(video_sources = devices,
+                                                workers = settings['workers'] or 2,
+                                                policy = settings['drop'],
+                                                trackers = [tracker(interval = settings['track'], score = settings['track-score'], every = settings['vote'], change = settings['vote-change']) for _ in devices] if settings['track'] else None,
+                                                gates = [motion(threshold = settings['motion'], rescan = settings['rescan']) for _ in devices] if settings['motion'] else None,
+                                                downscale = settings['downscale'],
+                                                padding = settings['padding'],
+                                                backend = settings['backend'],
+                                                strategy = settings['strategy'],
+                                                display = not settings['headless'],
+                                                events = sink,
+                                                realtime = settings['speed'] == 'recorded')
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--prune':
+                # Check if there is no argument
+                if not args:
+                    print('[+] Pruning Blurry, Small And Near-Duplicate Samples Of The Datasets ...')
+                    report = sampling.prune(datasets_path = 'datasets',
+                                            pruned_path = 'pruned',
+                                            sharpness = settings['sharpness'],
+                                            size = settings['min-face'],
+                                            distance = settings['duplicate'])
+                    for person, item in report.items():
+                        print('[+] {0} : {1} Samples Kept, {2} Samples Dropped'.format(person, item['kept'], len(item['dropped'])))
+                    print('[+] Dropped Samples Moved Into pruned, Report Merged Into pruned/report.json')
+                    print('[+] Run The Update Process To Train The Model Again')
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'The command does not run if the argument is provided'
+            elif o == '--record':
+                # Check if given arguments are a valid device, network stream or video file, camera 0 by default
+                if len(args) <= 1 and all(argv.is_device(given_argv = arg) or argv.is_remote_device(given_argv = arg) or argv.is_video(given_argv = arg) for arg in args):
+                    source = (int(args[0][3]) if argv.is_device(given_argv = args[0]) else args[0]) if args else 0
+                    print('[+] Recording {0} Into {1} ...'.format(source, a))
+                    cap = recognition.__capture__(video_source = source)
+                    # Live sources never wait for the writer, video files are recorded frame by frame
+                    count, dropped = recorder.make(cap = cap, path = a, frames = settings['frames'], display = not settings['headless'], policy = 'block' if isinstance(source, str) and argv.is_video(given_argv = source) else 'newest')
+                    print('[+] {0} Frames Recorded, {1} Frames Dropped By The Writer'.format(count, dropped))
+                    cap.release()
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--serve':
+                # Check if there is no argument
                 if not args:
-                    recognition.fromStream(video_source = 0)
+                    service(size = settings['max-batch'],
+                            wait = settings['max-wait'] / 1000,
+                            workers = settings['workers'] or 2,
+                            downscale = settings['downscale'],
+                            padding = settings['padding'],
+                            backend = settings['backend'],
+                            strategy = settings['strategy']).serve(address = a)
                 else:
                     # Built-in assert statement to find errors
                     assert False, 'The command does not run if the argument is provided'
+            elif o == '--video':
+                # Check if given argument is a valid readable video
+                if argv.is_video(given_argv = a) and not args:
+                    video.make(path = a,
+                                output = settings['output'],
+                                workers = settings['workers'],
+                                stride = settings['stride'],
+                                downscale = settings['downscale'],
+                                padding = settings['padding'],
+                                backend = settings['backend'],
+                                strategy = settings['strategy'])
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
+            elif o == '--visits':
+                # Check if given argument is an existing journal, arguments being identities
+                if os.path.isfile(a) and a.lower().endswith(journal.EXTENSIONS):
+                    for visit in journal.query(path = a, identities = args, since = settings['since'], until = settings['until']):
+                        print(json.dumps(visit))
+                else:
+                    # Built-in assert statement to find errors
+                    assert False, 'Invalid argument'
             elif o in ('-v', '--version'):
                 # Check if there is no argument
                 if not args:
@@ -154,6 +530,13 @@ class mwoo(object):
                 # Built-in assert statement to find errors
                 assert False, 'Unhandled option'
 
+        # Write remaining events
+        if sink is not None:
+            sink.close()
+
+        # Write last measures
+        metrics.disable(path = settings['metrics'])
+
         # No problems occured (successful termination)
         sys.exit(0)
 
@@ -0,0 +1,49 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from lbph.core.benchmark import benchmark
+from lbph.core.detection import detection, detector, regions
+from lbph.core.tracking import tracker
+
+@pytest.fixture
+def classifiers(monkeypatch):
+    # Cascades are loaded from res/ of the project
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return detector(backend = 'haar', strategy = 'fallback')
+
+def frame(size = None, x = 300, y = 200):
+    """Returns a 640 x 480 frame holding a synthetic face of given size, or no face"""
+    img = np.full((480, 640), 120, np.uint8)
+    if size:
+        face = benchmark.face(rng = np.random.default_rng(4), size = 100).astype(np.uint8)
+        img[y:y + size, x:x + size] = cv2.resize(face, (size, size), interpolation = cv2.INTER_AREA)
+    return img
+
+def test_coarse_finds_face_of_default_minimum_size(classifiers):
+    # Recognition searches faces of a tenth of the frame at least
+    gray = frame(size = 64)
+    minW, minH = 0.1 * gray.shape[1], 0.1 * gray.shape[0]
+    assert classifiers(gray, minW, minH)
+
+    candidates = detection.coarse(gray = gray, detect = classifiers, downscale = 2.0, minW = minW, minH = minH)
+    assert any(tracker.iou(face, (300, 200, 64, 64)) > 0.5 for face in candidates)
+
+    faces = detection.multiresolution(gray = gray, detect = classifiers, downscale = 2.0, minW = minW, minH = minH)
+    assert any(tracker.iou(face, (300, 200, 64, 64)) > 0.5 for face in faces)
+
+def test_coarse_keeps_minimum_size_above_window(classifiers):
+    # A downscale factor of 8 would shrink faces of the minimum size below the cascade window
+    gray = frame(size = 64)
+    candidates = detection.coarse(gray = gray, detect = classifiers, downscale = 8.0, minW = 64, minH = 48)
+    assert any(tracker.iou(face, (300, 200, 64, 64)) > 0.5 for face in candidates)
+
+def test_regions_scan_whole_frame_without_previous_faces(classifiers):
+    search = regions(downscale = 2.0, interval = 10)
+    assert search.detect(gray = frame(), detect = classifiers, minW = 64, minH = 48) == []
+
+    # A face entering the frame is found before the next scheduled scan
+    faces = search.detect(gray = frame(size = 90), detect = classifiers, minW = 64, minH = 48)
+    assert any(tracker.iou(face, (300, 200, 90, 90)) > 0.5 for face in faces)
@@ -0,0 +1,33 @@
+import cv2
+import numpy as np
+
+from lbph.core.motion import motion
+
+def clip(count = 120, exposure = None, seed = 0):
+    """Returns frames of a static 640 x 480 scene with sensor noise, exposure of each frame being given by a function"""
+    rng = np.random.default_rng(seed)
+    scene = cv2.resize(rng.uniform(0, 255, (30, 40)).astype(np.float32), (640, 480))
+    return [np.clip(scene * (exposure(i) if exposure else 1.0) + rng.normal(0, 4, scene.shape), 0, 255).astype(np.uint8) for i in range(count)]
+
+def gate(frames = None):
+    watcher = motion()
+    for gray in frames:
+        watcher.changes(gray = gray, minW = 64, minH = 48)
+    return watcher
+
+def test_static_clip_skips_most_scans():
+    watcher = gate(frames = clip())
+    assert watcher.frames == 120
+    assert watcher.idle >= 110
+    assert watcher.scans <= 120 // watcher.rescan + 1
+
+def test_settling_exposure_skips_most_scans():
+    # Exposure of a camera settling over two seconds, the background follows it
+    watcher = gate(frames = clip(exposure = lambda i: 0.6 + 0.4 * min(1.0, i / 60.0)))
+    assert watcher.idle >= 100
+    assert watcher.scans <= 10
+
+def test_lighting_change_starts_background_again():
+    watcher = gate(frames = clip(exposure = lambda i: 0.7 if i < 30 else 1.0))
+    assert watcher.idle >= 110
+    assert watcher.scans <= 5
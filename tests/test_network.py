@@ -0,0 +1,71 @@
+import http.server, threading, time
+
+import cv2
+import numpy as np
+
+from lbph.core.network import reader
+
+class camera(http.server.BaseHTTPRequestHandler):
+    """Stand-in of a MJPEG network camera : the first connection is dropped after a few frames,
+    the second one is refused, the next ones stream brighter frames until the client leaves"""
+
+    connections = []
+
+    def do_GET(self):
+        camera.connections.append(time.perf_counter())
+        attempt = len(camera.connections)
+        if attempt == 2:
+            self.close_connection = True
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+        self.end_headers()
+        jpeg = cv2.imencode('.jpg', np.full((48, 64, 3), 50 if attempt == 1 else 200, np.uint8))[1].tobytes()
+        try:
+            for _ in range(10 if attempt == 1 else 1000):
+                self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+                time.sleep(0.02)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+def test_reader_reconnects_with_backoff():
+    camera.connections = []
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), camera)
+    server.daemon_threads = True
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    stream = reader(url = 'http://127.0.0.1:{0}/video.mjpg'.format(server.server_address[1]), timeout = 2.0, backoff = 0.2, limit = 1.0)
+    try:
+        # Frames of the first connection
+        ret, img = stream.read()
+        assert ret and abs(float(img.mean()) - 50) < 10
+        assert stream.get(cv2.CAP_PROP_FRAME_WIDTH) == 64
+
+        # Frames of the third connection, after a dropped and a refused connection
+        deadline = time.perf_counter() + 20
+        while time.perf_counter() < deadline:
+            ret, img = stream.read()
+            assert ret
+            if abs(float(img.mean()) - 200) < 10:
+                break
+        else:
+            assert False, 'stream has not been reconnected'
+        assert stream.reconnects >= 2
+
+        # Delay before reconnecting doubles after the refused connection
+        assert len(camera.connections) >= 3
+        assert camera.connections[2] - camera.connections[1] >= 2 * 0.2
+
+        # Newest frames keep coming
+        for _ in range(5):
+            ret, img = stream.read()
+            assert ret and abs(float(img.mean()) - 200) < 10
+    finally:
+        stream.release()
+        server.shutdown()
+        server.server_close()
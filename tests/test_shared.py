@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+
+from lbph.core.shared import processes
+
+class frames(object):
+    """Capture of a few synthetic frames"""
+
+    def __init__(self, count = 20):
+        self.count = count
+
+    def read(self):
+        if not self.count:
+            return False, None
+        self.count -= 1
+        return True, np.full((48, 64, 3), self.count, np.uint8)
+
+    def release(self):
+        pass
+
+def opener():
+    return frames()
+
+def failing_factory():
+    raise RuntimeError('no model')
+
+def failing_process():
+    def process(img):
+        if img[0, 0, 0] == 18:
+            raise RuntimeError('bad frame')
+        return []
+    return process
+
+def dying_process():
+    def process(img):
+        os._exit(1)
+    return process
+
+def run(factory = None, workers = 2):
+    outputs = []
+    stream = processes(opener = opener, factory = factory, workers = workers)
+    stream.run(output = lambda img, found: outputs.append(found) or True)
+    return stream, outputs
+
+def test_failing_factory_ends_the_run():
+    stream, outputs = run(factory = failing_factory)
+    assert outputs == []
+
+def test_failing_frame_gives_its_slot_back():
+    # The first frame put into a slot is never dropped, its worker fails and the other one processes the remaining frames
+    stream, outputs = run(factory = failing_process)
+    assert stream.failed == 1
+    assert len(outputs) + stream.failed + stream.stale + stream.dropped.value == 20
+
+def test_killed_workers_end_the_run():
+    stream, outputs = run(factory = dying_process)
+    assert outputs == []